@@ -1,4 +1,4 @@
-"""poll_steam_warframe — manual wrapper around the scheduled Celery task.
+"""poll_steam_sessions — manual wrapper around the scheduled Celery task.
 
 The task runs automatically via Celery beat every 5 minutes
 (see `config/celery.py`). This command calls the same logic inline
@@ -9,12 +9,12 @@ from __future__ import annotations
 
 from django.core.management.base import BaseCommand
 
-from apps.profiles.warframe.tasks import poll_steam_warframe
+from apps.integrations.tasks import poll_steam_sessions
 
 
 class Command(BaseCommand):
-    help = "Run one poll cycle of the Warframe session detector (normally scheduled via Celery beat)"
+    help = "Run one poll cycle of the Steam session detector (normally scheduled via Celery beat)"
 
     def handle(self, *args, **options):
         # Call the task's underlying function directly, not via Celery.
-        poll_steam_warframe()
+        poll_steam_sessions()
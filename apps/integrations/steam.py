@@ -1,7 +1,8 @@
 """Steam Web API Client.
 
 Used by:
-- Warframe session detector (`poll_steam_warframe` management command)
+- Steam session detector for tracked games (`poll_steam_sessions` task,
+  see `apps/integrations/steam_sessions.py`)
 - Steam proxy endpoints for Synthform's co-working overlay (`/api/steam/player`, `/api/steam/recent`)
 
 Requires STEAM_API_KEY in settings. Rate-limited at 4 req/sec.
@@ -27,17 +28,24 @@ class SteamClient:
     BASE_URL = "https://api.steampowered.com"
     MEDIA_URL = "https://media.steampowered.com/steamcommunity/public/images/apps"
     WARFRAME_APPID = 230410
+    DESTINY2_APPID = 1085660
 
     PLAYER_CACHE_TTL = 60
     RECENT_GAMES_CACHE_TTL = 300
 
-    def __init__(self):
+    def __init__(self, http: httpx.AsyncClient | None = None):
+        """Pass a long-lived `http` client to reuse its connection pool across calls."""
         self.api_key = settings.STEAM_API_KEY
+        self.http = http
         self.rate_limiter = RateLimiter(
             rate=getattr(settings, "STEAM_RATE_LIMIT", 4),
             key="steam_rate_limit",
         )
 
+    @staticmethod
+    def new_http() -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=15.0, follow_redirects=True)
+
     def _cache_key(self, name: str, params: dict) -> str:
         serialized = f"{name}:{sorted(params.items())}"
         return f"steam:{hashlib.md5(serialized.encode()).hexdigest()[:12]}"
@@ -56,10 +64,13 @@ class SteamClient:
 
         await self.rate_limiter.acquire()
 
-        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
-            response = await client.get(f"{self.BASE_URL}{path}", params=params)
-            response.raise_for_status()
-            data = response.json()
+        if self.http is not None:
+            response = await self.http.get(f"{self.BASE_URL}{path}", params=params)
+        else:
+            async with self.new_http() as client:
+                response = await client.get(f"{self.BASE_URL}{path}", params=params)
+        response.raise_for_status()
+        data = response.json()
 
         cache.set(cache_key, data, timeout=cache_ttl)
         return data
@@ -103,6 +114,12 @@ class SteamClient:
             return ""
         return f"{SteamClient.MEDIA_URL}/{appid}/{img_icon_url}.jpg"
 
+    async def current_appid(self, steam_id: str) -> int | None:
+        """The appid the player is in right now, or None if not in a game."""
+        summary = await self.get_player_summary(steam_id)
+        gameid = summary.get("gameid")
+        return int(gameid) if gameid else None
+
     async def is_playing(self, steam_id: str, appid: int) -> bool:
         """Check whether the player is currently in a specific game."""
         summary = await self.get_player_summary(steam_id)
@@ -0,0 +1,250 @@
+"""Steam presence polling for games whose archives are driven by play sessions.
+
+`SteamPresencePoller` is the one long-lived poller per worker process: it
+keeps an event loop, a pooled HTTP client for Steam and a pooled Redis client
+across ticks. Each tick makes one `GetPlayerSummaries` call; `dispatch` then
+reads every tracked game's previous state from a single Redis hash and hands
+the transitions (`session_start`, `session_end`, `still_playing`) to the
+handlers registered with `on_transition`.
+
+To track another game, add a `TrackedGame` to TRACKED_GAMES — its archive
+command just needs to be safe to run repeatedly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from collections.abc import Coroutine
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+import sentry_sdk
+from django.conf import settings
+from django.core.management import call_command
+
+from apps.integrations.steam import SteamClient
+from config.redis import get_sync_client
+from config.redis import publish_event_sync
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_KEY = "questlog:steam:presence"
+PRESENCE_TTL = 3600  # 1 hour — auto-resets if polling stops
+
+
+@dataclass(frozen=True)
+class TrackedGame:
+    appid: int
+    # Event source (`events:questlog:<source>`) and presence hash field prefix.
+    source: str
+    command: str
+    session_end_options: dict = field(default_factory=dict)
+    # Archive mid-session at most this often (seconds); None disables it.
+    periodic_interval: int | None = None
+    periodic_options: dict = field(default_factory=dict)
+    # Settings that must be non-empty for the archive command to run.
+    required_settings: tuple[str, ...] = ()
+
+    @property
+    def enabled(self) -> bool:
+        return all(getattr(settings, name, "") for name in self.required_settings)
+
+
+TRACKED_GAMES: list[TrackedGame] = [
+    TrackedGame(
+        appid=SteamClient.WARFRAME_APPID,
+        source="warframe",
+        command="archive_warframe",
+        session_end_options={"trigger": "session_end"},
+        # Conservative vs DE's unofficial endpoint (the home IP also logs into
+        # the game). ~2 calls/hour.
+        periodic_interval=1800,
+        periodic_options={"trigger": "scheduled"},
+    ),
+    TrackedGame(
+        appid=SteamClient.DESTINY2_APPID,
+        source="destiny",
+        command="archive_destiny",
+        session_end_options={"incremental": True, "pgcr": True},
+        required_settings=("BUNGIE_API_KEY",),
+    ),
+]
+
+
+def tracked_games() -> list[TrackedGame]:
+    """Tracked games whose archive commands are configured to run."""
+    return [game for game in TRACKED_GAMES if game.enabled]
+
+
+# ---- Transition handlers ----
+
+Handler = Callable[["SteamPresencePoller", TrackedGame], None]
+HANDLERS: dict[str, list[Handler]] = {
+    "session_start": [],
+    "session_end": [],
+    "still_playing": [],
+}
+
+
+def on_transition(transition: str) -> Callable[[Handler], Handler]:
+    """Register a handler for `session_start`, `session_end` or `still_playing`."""
+
+    def register(handler: Handler) -> Handler:
+        HANDLERS[transition].append(handler)
+        return handler
+
+    return register
+
+
+def classify(previous: str | None, current: str) -> str | None:
+    """Name the transition between two presence states, if it's one we act on."""
+    if previous == current:
+        return "still_playing" if current == "playing" else None
+    if current == "playing":
+        return "session_start"
+    if previous == "playing":
+        return "session_end"
+    return None
+
+
+@on_transition("session_start")
+def publish_session_start(poller: SteamPresencePoller, game: TrackedGame) -> None:
+    logger.info("%s session detected", game.source)
+    publish_event_sync(
+        game.source,
+        f"{game.source}:session_detected",
+        {"steam_id": settings.STEAM_ID},
+        redis_client=poller.redis,
+    )
+
+
+@on_transition("session_end")
+def archive_on_session_end(poller: SteamPresencePoller, game: TrackedGame) -> None:
+    logger.info("%s session ended — triggering archive", game.source)
+    publish_event_sync(
+        game.source,
+        f"{game.source}:session_end",
+        {"steam_id": settings.STEAM_ID},
+        redis_client=poller.redis,
+    )
+    poller.run_archive(game, game.session_end_options, raise_on_error=True)
+
+
+@on_transition("still_playing")
+def archive_periodically(poller: SteamPresencePoller, game: TrackedGame) -> None:
+    """Archive mid-session if the game's interval has elapsed since the last one."""
+    if not game.periodic_interval:
+        return
+    last_raw = poller.redis.hget(PRESENCE_KEY, f"{game.source}:last_archive")
+    last_ts = int(last_raw) if last_raw else 0
+    if time.time() - last_ts < game.periodic_interval:
+        return
+    logger.info("Periodic mid-session archive (%s)", game.source)
+    poller.run_archive(game, game.periodic_options, raise_on_error=False)
+
+
+# ---- Poller ----
+
+
+class SteamPresencePoller:
+    def __init__(self, steam: SteamClient | None = None, redis_client=None):
+        self._loop = asyncio.new_event_loop()
+        self.steam = steam or SteamClient(http=SteamClient.new_http())
+        self.redis = redis_client or get_sync_client()
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run a coroutine on the poller's loop, so the HTTP pool survives between ticks."""
+        return self._loop.run_until_complete(coro)
+
+    def current_appid(self) -> int | None:
+        return self.run(self.steam.current_appid(settings.STEAM_ID))
+
+    def dispatch(
+        self,
+        current_appid: int | None,
+        games: list[TrackedGame] | None = None,
+    ) -> dict[str, str | None]:
+        """Store each game's presence and dispatch its transition to the handlers.
+
+        Every game is handled even if one handler raises; the first failure is
+        re-raised afterwards so session-end archive errors stay loud. Returns
+        {source: transition}.
+        """
+        games = tracked_games() if games is None else games
+
+        previous = {
+            k.decode(): v.decode() for k, v in self.redis.hgetall(PRESENCE_KEY).items()
+        }
+        current = {
+            f"{game.source}:state": "playing"
+            if current_appid == game.appid
+            else "not_playing"
+            for game in games
+        }
+        pipe = self.redis.pipeline()
+        pipe.hset(PRESENCE_KEY, mapping=current)
+        pipe.expire(PRESENCE_KEY, PRESENCE_TTL)
+        pipe.execute()
+
+        transitions: dict[str, str | None] = {}
+        failures: list[Exception] = []
+        for game in games:
+            state_field = f"{game.source}:state"
+            logger.info(
+                "Steam state (%s): previous=%s, current=%s",
+                game.source,
+                previous.get(state_field),
+                current[state_field],
+            )
+            transition = classify(previous.get(state_field), current[state_field])
+            transitions[game.source] = transition
+            if transition is None:
+                continue
+            for handler in HANDLERS[transition]:
+                try:
+                    handler(self, game)
+                except Exception as exc:  # noqa: BLE001
+                    failures.append(exc)
+        if failures:
+            raise failures[0]
+        return transitions
+
+    def run_archive(
+        self, game: TrackedGame, options: dict, *, raise_on_error: bool
+    ) -> None:
+        """Run the game's archive command, stamp the last-archive time, surface failures.
+
+        Periodic runs swallow errors (the next poll retries); session-end re-raises
+        so the failure is loud (Sentry + a failed Celery task).
+        """
+        try:
+            call_command(game.command, **options)
+            self.redis.hset(
+                PRESENCE_KEY, f"{game.source}:last_archive", int(time.time())
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("%s failed (%s)", game.command, options)
+            sentry_sdk.capture_exception(exc)
+            publish_event_sync(
+                game.source,
+                f"{game.source}:archive_failed",
+                {"error": str(exc)},
+                redis_client=self.redis,
+            )
+            if raise_on_error:
+                raise
+
+
+_poller: SteamPresencePoller | None = None
+
+
+def get_poller() -> SteamPresencePoller:
+    """The process-wide poller, created on first use."""
+    global _poller
+    if _poller is None:
+        _poller = SteamPresencePoller()
+    return _poller
@@ -0,0 +1,49 @@
+"""Celery tasks for Steam-driven archiving.
+
+`poll_steam_sessions` is scheduled every 5 minutes via Celery beat (see
+`config/celery.py`). Each tick runs the process-wide `SteamPresencePoller`
+(`apps/integrations/steam_sessions.py`), which detects session transitions for
+every tracked game with one Steam call and dispatches them to the registered
+handlers — e.g. the game's archive command on session end.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import httpx
+from celery import shared_task
+from django.conf import settings
+
+from apps.integrations.steam_sessions import get_poller
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    bind=True, ignore_result=True, name="apps.integrations.tasks.poll_steam_sessions"
+)
+def poll_steam_sessions(self):
+    """Detect session transitions for every tracked game and archive on session end."""
+    if not settings.STEAM_API_KEY or not settings.STEAM_ID:
+        logger.info("STEAM_API_KEY or STEAM_ID not set, skipping Steam poll")
+        return
+
+    poller = get_poller()
+    try:
+        current_appid = poller.current_appid()
+    except httpx.TransportError as exc:
+        # Transient network blip reaching Steam — skip this tick. Presence
+        # state is left untouched, so a real session transition is still
+        # caught on a later poll. The daily staleness check is the backstop.
+        logger.warning("Steam poll skipped — transient network error: %s", exc)
+        return
+    except httpx.HTTPStatusError as exc:
+        # Upstream 5xx (Steam hiccup, e.g. 502) — skip like a network blip. A
+        # 4xx is a real problem (bad API key, revoked access), so let it surface.
+        if exc.response.status_code >= 500:
+            logger.warning("Steam poll skipped — upstream %s", exc.response.status_code)
+            return
+        raise
+
+    poller.dispatch(current_appid)
@@ -3,12 +3,18 @@ from __future__ import annotations
 from django.contrib import admin
 
 from .models import Activity
+from .models import ActivityRollup
 from .models import AggregateStats
 from .models import CarnageReport
 from .models import CarnageReportEntry
+from .models import CarnageWeaponUsage
 from .models import Character
+from .models import CollectibleState
+from .models import CoPlayer
 from .models import ManifestCache
+from .models import PresentationNodeProgress
 from .models import Profile
+from .models import RecordState
 
 
 class CharacterInline(admin.TabularInline):
@@ -93,6 +99,23 @@ class ActivityAdmin(admin.ModelAdmin):
     list_per_page = 50
 
 
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        "activity_name",
+        "mode_category",
+        "attempts",
+        "clears",
+        "fastest_clear_seconds",
+        "kills",
+        "deaths",
+        "updated_at",
+    ]
+    list_filter = ["mode_category"]
+    search_fields = ["activity_name"]
+    readonly_fields = ["id", "updated_at"]
+
+
 class CarnageReportEntryInline(admin.TabularInline):
     model = CarnageReportEntry
     extra = 0
@@ -139,6 +162,47 @@ class CarnageReportEntryAdmin(admin.ModelAdmin):
     list_select_related = ["report"]
 
 
+@admin.register(CarnageWeaponUsage)
+class CarnageWeaponUsageAdmin(admin.ModelAdmin):
+    list_display = ["weapon_name", "weapon_hash", "kills", "precision_kills", "entry"]
+    search_fields = ["weapon_name", "weapon_hash"]
+    raw_id_fields = ["entry"]
+
+
+@admin.register(CoPlayer)
+class CoPlayerAdmin(admin.ModelAdmin):
+    list_display = [
+        "display_name",
+        "membership_id",
+        "activities_together",
+        "clears_together",
+        "last_seen",
+    ]
+    search_fields = ["display_name", "membership_id"]
+    list_select_related = ["profile"]
+
+
+@admin.register(RecordState)
+class RecordStateAdmin(admin.ModelAdmin):
+    list_display = ["name", "record_hash", "completed", "state", "updated_at"]
+    list_filter = ["completed"]
+    search_fields = ["name", "record_hash"]
+
+
+@admin.register(CollectibleState)
+class CollectibleStateAdmin(admin.ModelAdmin):
+    list_display = ["name", "collectible_hash", "acquired", "state", "updated_at"]
+    list_filter = ["acquired"]
+    search_fields = ["name", "collectible_hash"]
+
+
+@admin.register(PresentationNodeProgress)
+class PresentationNodeProgressAdmin(admin.ModelAdmin):
+    list_display = ["name", "kind", "node_hash", "completed", "total", "updated_at"]
+    list_filter = ["kind"]
+    search_fields = ["name", "node_hash"]
+
+
 @admin.register(ManifestCache)
 class ManifestCacheAdmin(admin.ModelAdmin):
     list_display = ["version", "locale", "downloaded_at", "file_path"]
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
 from datetime import datetime
+from datetime import timedelta
+from typing import Literal
 
+from django.core.cache import cache
 from django.db.models import Count
-from django.db.models import Min
-from django.db.models import Q
+from django.db.models import Max
 from django.db.models import Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
 from ninja import Router
 from ninja import Schema
 from ninja import Status
 
 from .models import Activity
+from .models import ActivityRollup
 from .models import AggregateStats
+from .models import CarnageWeaponUsage
 from .models import Character
+from .models import CoPlayer
+from .models import PresentationNodeProgress
 from .models import Profile
 
 router = Router(tags=["Destiny 2"])
@@ -136,7 +144,7 @@ class ActivityDetailSchema(Schema):
     pgcr_entries: list[CarnageEntrySchema] | None
 
 
-class RaidBreakdownSchema(Schema):
+class ActivityBreakdownSchema(Schema):
     activity_name: str
     attempts: int
     clears: int
@@ -149,7 +157,66 @@ class RaidStatsSchema(Schema):
     clear_rate: float
     total_kills: int
     total_deaths: int
-    raids: list[RaidBreakdownSchema]
+    raids: list[ActivityBreakdownSchema]
+
+
+class ModeStatsSchema(Schema):
+    mode_category: str
+    total_attempts: int
+    total_clears: int
+    clear_rate: float
+    total_kills: int
+    total_deaths: int
+    activities: list[ActivityBreakdownSchema]
+
+
+class WeaponUsageSchema(Schema):
+    weapon_hash: int
+    weapon_name: str
+    kills: int
+    precision_kills: int
+    precision_rate: float
+    activities: int
+
+
+class CoPlayerSchema(Schema):
+    membership_id: str
+    membership_type: int
+    display_name: str
+    activities_together: int
+    clears_together: int
+    last_seen: datetime
+
+
+class NodeProgressSchema(Schema):
+    node_hash: int
+    name: str
+    parent_node_hash: int | None
+    completed: int
+    total: int
+    percent: float
+
+
+class NodeProgressListSchema(Schema):
+    parent_node_hash: int | None
+    completed: int
+    total: int
+    percent: float
+    nodes: list[NodeProgressSchema]
+
+
+class TimelineBucketSchema(Schema):
+    start: datetime
+    activities: int
+    seconds_played: int
+    kills: int
+    deaths: int
+
+
+class TimelineSchema(Schema):
+    bucket: str
+    mode_category: str | None
+    buckets: list[TimelineBucketSchema]
 
 
 # ---- Helpers ----
@@ -204,6 +271,38 @@ def _aggregate_schema(stat: AggregateStats) -> AggregateStatsSchema:
     )
 
 
+def _rollup_stats(profile: Profile | None, mode_category: str) -> dict:
+    """Totals + per-activity breakdown for a profile's mode category, from ActivityRollup.
+
+    A single query over the (small) rollup table — independent of how many
+    Activity rows have been archived.
+    """
+    rollups = list(
+        ActivityRollup.objects.filter(profile=profile, mode_category=mode_category).order_by(
+            "-attempts"
+        )
+    )
+    total_attempts = sum(r.attempts for r in rollups)
+    total_clears = sum(r.clears for r in rollups)
+    clear_rate = (total_clears / total_attempts) if total_attempts else 0.0
+    return {
+        "total_attempts": total_attempts,
+        "total_clears": total_clears,
+        "clear_rate": round(clear_rate, 3),
+        "total_kills": sum(r.kills for r in rollups),
+        "total_deaths": sum(r.deaths for r in rollups),
+        "activities": [
+            ActivityBreakdownSchema(
+                activity_name=r.activity_name or "Unknown",
+                attempts=r.attempts,
+                clears=r.clears,
+                fastest_seconds=r.fastest_clear_seconds or None,
+            )
+            for r in rollups
+        ],
+    }
+
+
 def _activity_schema(activity: Activity, has_pgcr: bool) -> ActivitySchema:
     return ActivitySchema(
         instance_id=activity.instance_id,
@@ -369,38 +468,207 @@ def get_activity(request, instance_id: str):
 @router.get("/destiny/raids/stats", response=RaidStatsSchema)
 def get_raid_stats(request):
     """Raid-specific breakdown: attempts, clears, fastest, per-raid stats."""
-    raids_qs = Activity.objects.filter(mode_category="raid")
-    total_attempts = raids_qs.count()
-    total_clears = raids_qs.filter(completed=True).count()
-    total_kills = raids_qs.aggregate(k=Sum("kills"))["k"] or 0
-    total_deaths = raids_qs.aggregate(d=Sum("deaths"))["d"] or 0
-
-    breakdown_qs = (
-        raids_qs.values("activity_name")
+    stats = _rollup_stats(Profile.objects.first(), "raid")
+    return RaidStatsSchema(raids=stats.pop("activities"), **stats)
+
+
+@router.get("/destiny/dungeons/stats", response=ModeStatsSchema)
+def get_dungeon_stats(request):
+    """Dungeon breakdown: attempts, clears, fastest, per-dungeon stats."""
+    stats = _rollup_stats(Profile.objects.first(), "dungeon")
+    return ModeStatsSchema(mode_category="dungeon", **stats)
+
+
+@router.get("/destiny/trials/stats", response=ModeStatsSchema)
+def get_trials_stats(request):
+    """Trials of Osiris breakdown: matches played and completed, per map."""
+    stats = _rollup_stats(Profile.objects.first(), "trials")
+    return ModeStatsSchema(mode_category="trials", **stats)
+
+
+@router.get("/destiny/weapons", response=list[WeaponUsageSchema])
+def list_weapon_usage(
+    request,
+    mode_category: str | None = None,
+    self_only: bool = True,
+    limit: int = 25,
+):
+    """Most-used weapons across archived PGCRs, by total kills.
+
+    Grouped in SQL over CarnageWeaponUsage; `self_only=false` includes
+    fireteam members' weapons too.
+    """
+    qs = CarnageWeaponUsage.objects.filter(
+        entry__report__activity__profile=Profile.objects.first()
+    )
+    if self_only:
+        qs = qs.filter(entry__is_self=True)
+    if mode_category:
+        qs = qs.filter(entry__report__activity__mode_category=mode_category)
+
+    limit = max(1, min(limit, 200))
+    rows = (
+        qs.values("weapon_hash")
         .annotate(
-            attempts=Count("id"),
-            clears=Count("id", filter=Q(completed=True)),
-            fastest=Min("duration_seconds", filter=Q(completed=True)),
+            name=Max("weapon_name"),
+            total_kills=Sum("kills"),
+            total_precision=Sum("precision_kills"),
+            activities=Count("entry__report", distinct=True),
         )
-        .order_by("-attempts")
+        .order_by("-total_kills", "weapon_hash")[:limit]
     )
-    raids = [
-        RaidBreakdownSchema(
-            activity_name=row["activity_name"] or "Unknown",
-            attempts=row["attempts"],
-            clears=row["clears"],
-            fastest_seconds=row["fastest"] if row["fastest"] else None,
+    return [
+        WeaponUsageSchema(
+            weapon_hash=r["weapon_hash"],
+            weapon_name=r["name"] or "",
+            kills=r["total_kills"] or 0,
+            precision_kills=r["total_precision"] or 0,
+            precision_rate=round((r["total_precision"] or 0) / r["total_kills"], 3)
+            if r["total_kills"]
+            else 0.0,
+            activities=r["activities"],
         )
-        for row in breakdown_qs
+        for r in rows
     ]
 
-    clear_rate = (total_clears / total_attempts) if total_attempts else 0.0
 
-    return RaidStatsSchema(
-        total_attempts=total_attempts,
-        total_clears=total_clears,
-        clear_rate=round(clear_rate, 3),
-        total_kills=total_kills,
-        total_deaths=total_deaths,
-        raids=raids,
+@router.get("/destiny/fireteam", response=list[CoPlayerSchema])
+def list_fireteam(request, limit: int = 25):
+    """Players most often seen in archived PGCRs, from the CoPlayer index."""
+    limit = max(1, min(limit, 200))
+    co_players = CoPlayer.objects.filter(profile=Profile.objects.first())
+    return [
+        CoPlayerSchema(
+            membership_id=c.membership_id,
+            membership_type=c.membership_type,
+            display_name=c.display_name,
+            activities_together=c.activities_together,
+            clears_together=c.clears_together,
+            last_seen=c.last_seen,
+        )
+        for c in co_players.order_by("-activities_together", "-last_seen")[:limit]
+    ]
+
+
+def _node_progress(kind: str, parent: int | None) -> NodeProgressListSchema:
+    """Children of `parent` (or the root nodes) with their precomputed totals."""
+    progress = PresentationNodeProgress.objects.filter(profile=Profile.objects.first(), kind=kind)
+    nodes = list(progress.filter(parent_node_hash=parent).order_by("name"))
+    if parent is None:
+        completed = sum(n.completed for n in nodes)
+        total = sum(n.total for n in nodes)
+    else:
+        own = progress.filter(node_hash=parent).first()
+        completed, total = (own.completed, own.total) if own else (0, 0)
+    return NodeProgressListSchema(
+        parent_node_hash=parent,
+        completed=completed,
+        total=total,
+        percent=round(completed / total * 100, 1) if total else 0.0,
+        nodes=[
+            NodeProgressSchema(
+                node_hash=n.node_hash,
+                name=n.name,
+                parent_node_hash=n.parent_node_hash,
+                completed=n.completed,
+                total=n.total,
+                percent=n.percent,
+            )
+            for n in nodes
+        ],
+    )
+
+
+@router.get("/destiny/triumphs", response=NodeProgressListSchema)
+def get_triumphs(request, parent_node_hash: int | None = None):
+    """Triumph completion per presentation node. Pass a node hash to drill down."""
+    return _node_progress("records", parent_node_hash)
+
+
+@router.get("/destiny/collections", response=NodeProgressListSchema)
+def get_collections(request, parent_node_hash: int | None = None):
+    """Collection completion per presentation node. Pass a node hash to drill down."""
+    return _node_progress("collectibles", parent_node_hash)
+
+
+# ---- Activity timeline (calendar heatmaps) ----
+
+TIMELINE_CACHE_KEY = "destiny:timeline:{bucket}:{mode_category}"
+
+
+def _bucket_start(now: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing `now` (weeks start Monday, like TruncWeek)."""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _timeline_rows(qs, bucket: str) -> list[dict]:
+    """Per-bucket totals, grouped in SQL on the truncated `period`."""
+    rows = (
+        qs.annotate(start=Trunc("period", bucket))
+        .values("start")
+        .annotate(
+            activities=Count("id"),
+            seconds_played=Sum("duration_seconds"),
+            total_kills=Sum("kills"),
+            total_deaths=Sum("deaths"),
+        )
+        .order_by("start")
+    )
+    return [
+        {
+            "start": r["start"],
+            "activities": r["activities"],
+            "seconds_played": r["seconds_played"] or 0,
+            "kills": r["total_kills"] or 0,
+            "deaths": r["total_deaths"] or 0,
+        }
+        for r in rows
+    ]
+
+
+@router.get("/destiny/activity/timeline", response=TimelineSchema)
+def get_activity_timeline(
+    request,
+    bucket: Literal["day", "week", "month"] = "day",
+    mode_category: str | None = None,
+):
+    """Activity counts, time played, kills and deaths per day/week/month.
+
+    Closed buckets never change between archive runs, so they're cached with
+    no expiry and only the current bucket is aggregated per request. The cache
+    entry is stamped with the profile's last_synced and the current bucket's
+    start, so an archive run (which can backfill past buckets) or rolling into
+    a new bucket recomputes it once.
+    """
+    profile = Profile.objects.first()
+    qs = Activity.objects.filter(profile=profile)
+    if mode_category:
+        qs = qs.filter(mode_category=mode_category)
+
+    current_start = _bucket_start(timezone.now(), bucket)
+    version = (profile.pk, profile.last_synced) if profile else None
+    key = TIMELINE_CACHE_KEY.format(bucket=bucket, mode_category=mode_category or "all")
+
+    cached = cache.get(key)
+    if cached and cached["version"] == version and cached["through"] == current_start:
+        closed = cached["rows"]
+    else:
+        closed = _timeline_rows(qs.filter(period__lt=current_start), bucket)
+        cache.set(
+            key,
+            {"version": version, "through": current_start, "rows": closed},
+            timeout=None,
+        )
+
+    current = _timeline_rows(qs.filter(period__gte=current_start), bucket)
+
+    return TimelineSchema(
+        bucket=bucket,
+        mode_category=mode_category,
+        buckets=[TimelineBucketSchema(**r) for r in closed + current],
     )
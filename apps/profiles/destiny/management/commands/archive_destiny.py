@@ -1,12 +1,21 @@
 """archive_destiny — pulls Destiny 2 history from Bungie's API into the archive.
 
+A full run first compares dateLastPlayed for the profile and each character
+(one component 100/200 call) against the last run's watermark. If nothing has
+been played, it stops there. Otherwise stats and activities are refreshed only
+for the characters that were played. Pass --force to skip the check.
+
 Phases (all idempotent, safe to re-run):
     1. manifest     — download/cache the Bungie manifest SQLite DB
-    2. profile      — fetch profile components, store raw blobs
+    2. profile      — fetch profile components, diff triumph/collectible
+                      state into RecordState/CollectibleState
     3. characters   — fetch character details, resolve class/race/gender
     4. stats        — account + per-character historical stats, every mode
-    5. activities   — paginate all activity history (supports --incremental)
-    6. pgcr         — Post-Game Carnage Reports for raids/dungeons (optional)
+    5. activities   — paginate all activity history (supports --incremental),
+                      folding each page of new rows into ActivityRollup
+    6. pgcr         — Post-Game Carnage Reports for raids/dungeons (optional),
+                      with per-weapon usage extracted into CarnageWeaponUsage
+                      and fireteam members folded into CoPlayer
 """
 
 from __future__ import annotations
@@ -19,6 +28,7 @@ from pathlib import Path
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.db import transaction
 from django.utils import timezone as django_tz
 
 from apps.integrations.bungie import BungieAPIError
@@ -31,9 +41,15 @@ from apps.profiles.destiny.models import Activity
 from apps.profiles.destiny.models import AggregateStats
 from apps.profiles.destiny.models import CarnageReport
 from apps.profiles.destiny.models import CarnageReportEntry
+from apps.profiles.destiny.models import CarnageWeaponUsage
 from apps.profiles.destiny.models import Character
 from apps.profiles.destiny.models import ManifestCache
 from apps.profiles.destiny.models import Profile
+from apps.profiles.destiny.rollups import apply_activity_rollups
+from apps.profiles.destiny.rollups import apply_co_players
+from apps.profiles.destiny.rollups import rebuild_activity_rollups
+from apps.profiles.destiny.rollups import rebuild_co_players
+from apps.profiles.destiny.triumphs import sync_triumphs
 
 PHASES = ["manifest", "profile", "characters", "stats", "activities", "pgcr"]
 
@@ -84,6 +100,161 @@ def parse_period(period_str: str) -> datetime:
         return datetime.now(tz=UTC)
 
 
+def extract_weapon_usage(entry: dict) -> list[dict]:
+    """Per-weapon kills from a PGCR entry's `extended.weapons` block."""
+    usage = []
+    for weapon in (entry.get("extended") or {}).get("weapons") or []:
+        weapon_hash = weapon.get("referenceId")
+        if not weapon_hash:
+            continue
+        values = weapon.get("values", {})
+        usage.append(
+            {
+                "weapon_hash": int(weapon_hash),
+                "kills": int(basic_value(values.get("uniqueWeaponKills"))),
+                "precision_kills": int(basic_value(values.get("uniqueWeaponPrecisionKills"))),
+            }
+        )
+    return usage
+
+
+def played_watermark(profile_component: dict, characters_component: dict) -> dict:
+    """dateLastPlayed for the profile and each of its characters."""
+    return {
+        "date_last_played": profile_component.get("dateLastPlayed", ""),
+        "characters": {
+            str(char_id): (characters_component.get(str(char_id)) or {}).get("dateLastPlayed", "")
+            for char_id in profile_component.get("characterIds", [])
+        },
+    }
+
+
+def watermark_changes(old: dict, new: dict) -> set[str] | None:
+    """Character ids played since `old`, or None if nothing changed at all."""
+    if old == new:
+        return None
+    old_characters = old.get("characters", {})
+    return {
+        char_id
+        for char_id, last_played in new.get("characters", {}).items()
+        if old_characters.get(char_id) != last_played
+    }
+
+
+def build_aggregate(
+    profile: Profile,
+    character: Character | None,
+    scope: str,
+    mode_key: str,
+    all_time: dict,
+) -> AggregateStats:
+    """Map one Bungie `allTime` block onto an unsaved AggregateStats row."""
+    fields = {"raw_stats": all_time}
+    for bungie_key, field_name in STAT_FIELD_MAP.items():
+        fields[field_name] = basic_value(all_time.get(bungie_key))
+
+    # fastestCompletionMs is in milliseconds — convert to seconds for the model.
+    if fields.get("fastest_completion"):
+        fields["fastest_completion"] = fields["fastest_completion"] / 1000.0
+
+    return AggregateStats(
+        profile=profile,
+        character=character,
+        scope=scope,
+        mode=mode_key,
+        **fields,
+    )
+
+
+def save_aggregates(rows: list[AggregateStats]) -> None:
+    """Upsert every scope's aggregate rows in a single INSERT ... ON CONFLICT.
+
+    Relies on the NULLS NOT DISTINCT unique constraint so account-scope rows
+    (character=NULL) update in place instead of piling up.
+    """
+    if not rows:
+        return
+    AggregateStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["profile", "character", "scope", "mode"],
+        update_fields=[*STAT_FIELD_MAP.values(), "raw_stats", "updated_at"],
+    )
+
+
+@transaction.atomic
+def store_pgcr(
+    profile: Profile,
+    activity: Activity,
+    data: dict,
+    resolver: ManifestResolver | None = None,
+) -> CarnageReport:
+    """Write a PGCR, its entries and their weapon usage in one transaction.
+
+    Entries and weapon rows go in with one bulk insert each rather than a
+    round trip per player, and the fireteam is folded into CoPlayer. Each
+    entry's dict is kept only on its row, so the report stores the envelope.
+    """
+    period = parse_period(data.get("period", ""))
+    report = CarnageReport.objects.create(
+        activity=activity,
+        instance_id=activity.instance_id,
+        activity_hash=activity.activity_hash,
+        activity_name=activity.activity_name,
+        period=period,
+        is_private=bool(data.get("activityWasStartedFromBeginning", False) is False and data.get("isPrivate", False)),
+        starting_phase_index=int(data.get("startingPhaseIndex", 0) or 0),
+        raw_data={k: v for k, v in data.items() if k != "entries"},
+    )
+
+    entries = []
+    weapons = []
+    for index, entry in enumerate(data.get("entries", [])):
+        player = entry.get("player", {})
+        dest_user = player.get("destinyUserInfo", {})
+        character_class = player.get("characterClass", "") or ""
+        values = entry.get("values", {})
+
+        membership_id = str(dest_user.get("membershipId", ""))
+        is_self = (
+            membership_id == profile.membership_id
+            and dest_user.get("membershipType") == profile.membership_type
+        )
+
+        row = CarnageReportEntry(
+            report=report,
+            entry_index=index,
+            membership_id=membership_id,
+            membership_type=int(dest_user.get("membershipType", 0) or 0),
+            display_name=dest_user.get("displayName", "") or "",
+            character_id=str(entry.get("characterId", "")),
+            character_class=character_class.lower() if character_class else "",
+            light_level=int(player.get("lightLevel", 0) or 0),
+            is_self=is_self,
+            kills=int(basic_value(values.get("kills"))),
+            deaths=int(basic_value(values.get("deaths"))),
+            assists=int(basic_value(values.get("assists"))),
+            score=int(basic_value(values.get("score"))),
+            completed=bool(basic_value(values.get("completed"))),
+            time_played_seconds=int(basic_value(values.get("timePlayedSeconds"))),
+            raw_values=entry,
+        )
+        entries.append(row)
+        weapons.extend(
+            CarnageWeaponUsage(
+                entry=row,
+                weapon_name=resolver.resolve_item_name(w["weapon_hash"]) if resolver else "",
+                **w,
+            )
+            for w in extract_weapon_usage(entry)
+        )
+
+    CarnageReportEntry.objects.bulk_create(entries)
+    CarnageWeaponUsage.objects.bulk_create(weapons, ignore_conflicts=True)
+    apply_co_players(profile, report, entries)
+    return report
+
+
 class Command(BaseCommand):
     help = "Archive Destiny 2 history from Bungie's API"
 
@@ -123,6 +294,16 @@ class Command(BaseCommand):
             default=["raid", "dungeon"],
             help="Which mode_categories to fetch PGCRs for",
         )
+        parser.add_argument(
+            "--rebuild-rollups",
+            action="store_true",
+            help="Recompute ActivityRollup and CoPlayer from the archived history",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run every phase even if nothing has been played since the last run",
+        )
 
     def handle(self, *args, **options):
         if not settings.BUNGIE_API_KEY:
@@ -139,9 +320,34 @@ class Command(BaseCommand):
         phase = options["phase"]
         run_all = phase == "all"
 
+        # Characters to refresh stats/activities for; None means all of them.
+        played: set[str] | None = None
+        if run_all and not options["force"]:
+            probe = await client.get_profile(
+                profile.membership_type,
+                profile.membership_id,
+                components=[100, 200],
+            )
+            played = watermark_changes(
+                profile.played_watermark,
+                played_watermark(
+                    probe.get("profile", {}).get("data", {}),
+                    probe.get("characters", {}).get("data", {}),
+                ),
+            )
+            if played is None:
+                self.stdout.write(
+                    self.style.SUCCESS("Nothing played since the last run — skipping archive.")
+                )
+                return
+            if profile.played_watermark:
+                self.stdout.write(f"Played since last run: {len(played)} character(s)")
+            else:
+                played = None
+
         resolver: ManifestResolver | None = None
         manifest_phase_ran = run_all or phase == "manifest"
-        needs_manifest = run_all or phase in {"characters", "activities"}
+        needs_manifest = run_all or phase in {"profile", "characters", "activities"}
 
         if manifest_phase_ran:
             resolver = await self._phase_manifest(client)
@@ -150,7 +356,7 @@ class Command(BaseCommand):
 
         try:
             if run_all or phase == "profile":
-                await self._phase_profile(client, profile)
+                await self._phase_profile(client, profile, resolver)
 
             if run_all or phase == "characters":
                 if resolver is None:
@@ -158,7 +364,7 @@ class Command(BaseCommand):
                 await self._phase_characters(client, profile, resolver)
 
             if run_all or phase == "stats":
-                await self._phase_stats(client, profile)
+                await self._phase_stats(client, profile, played)
 
             if run_all or phase == "activities":
                 if resolver is None:
@@ -170,18 +376,37 @@ class Command(BaseCommand):
                 incremental = options["incremental"] or (
                     not options["full"] and has_existing
                 )
-                await self._phase_activities(client, profile, resolver, incremental)
+                await self._phase_activities(client, profile, resolver, incremental, played)
 
             if options["pgcr"] or phase == "pgcr":
-                await self._phase_pgcr(client, profile, options["pgcr_modes"])
+                if resolver is None:
+                    # Weapon names only — skip them rather than download a manifest.
+                    resolver = await self._load_existing_manifest()
+                await self._phase_pgcr(client, profile, options["pgcr_modes"], resolver)
+
+            if options["rebuild_rollups"]:
+                rebuilt = await sync_to_async(
+                    rebuild_activity_rollups, thread_sensitive=True
+                )(profile)
+                self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} activity rollups"))
+                rebuilt = await sync_to_async(
+                    rebuild_co_players, thread_sensitive=True
+                )(profile)
+                self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} co-players"))
         finally:
             if resolver:
                 resolver.close()
 
         profile.last_synced = django_tz.now()
-        await sync_to_async(profile.save, thread_sensitive=True)(
-            update_fields=["last_synced", "updated_at"]
-        )
+        update_fields = ["last_synced", "updated_at"]
+        if run_all:
+            # Only advance the watermark once every phase has finished, so an
+            # interrupted run is retried in full next time.
+            profile.played_watermark = played_watermark(
+                profile.profile_data, getattr(profile, "_characters_component", {})
+            )
+            update_fields.append("played_watermark")
+        await sync_to_async(profile.save, thread_sensitive=True)(update_fields=update_fields)
         self.stdout.write(self.style.SUCCESS("Archive complete."))
 
     # ---- setup helpers ----
@@ -245,6 +470,14 @@ class Command(BaseCommand):
             return None
         return ManifestResolver(path)
 
+    async def _characters(self, profile: Profile, only: set[str] | None) -> list[Character]:
+        from asgiref.sync import sync_to_async
+
+        qs = Character.objects.filter(profile=profile)
+        if only is not None:
+            qs = qs.filter(character_id__in=only)
+        return await sync_to_async(list, thread_sensitive=True)(qs)
+
     # ---- phase 1: manifest ----
 
     async def _phase_manifest(self, client: BungieClient) -> ManifestResolver:
@@ -277,7 +510,12 @@ class Command(BaseCommand):
 
     # ---- phase 2: profile ----
 
-    async def _phase_profile(self, client: BungieClient, profile: Profile) -> None:
+    async def _phase_profile(
+        self,
+        client: BungieClient,
+        profile: Profile,
+        resolver: ManifestResolver | None = None,
+    ) -> None:
         from asgiref.sync import sync_to_async
 
         self.stdout.write("Phase 2: Profile")
@@ -294,11 +532,20 @@ class Command(BaseCommand):
         profile.bungie_name_code = user_info.get("bungieGlobalDisplayNameCode")
         profile.profile_data = profile_component
         profile.metrics_data = data.get("metrics", {}).get("data", {})
-        profile.collectibles_data = data.get("profileCollectibles", {}).get("data", {})
-        profile.records_data = data.get("profileRecords", {}).get("data", {})
 
         await sync_to_async(profile.save, thread_sensitive=True)()
 
+        written = await sync_to_async(sync_triumphs, thread_sensitive=True)(
+            profile,
+            data.get("profileRecords", {}).get("data", {}),
+            data.get("profileCollectibles", {}).get("data", {}),
+            resolver,
+        )
+        self.stdout.write(
+            f"  Triumphs: {written['records']} records, "
+            f"{written['collectibles']} collectibles, {written['nodes']} nodes changed"
+        )
+
         char_count = len(profile_component.get("characterIds", []))
         self.stdout.write(
             self.style.SUCCESS(
@@ -367,7 +614,12 @@ class Command(BaseCommand):
 
     # ---- phase 4: stats ----
 
-    async def _phase_stats(self, client: BungieClient, profile: Profile) -> None:
+    async def _phase_stats(
+        self,
+        client: BungieClient,
+        profile: Profile,
+        only: set[str] | None = None,
+    ) -> None:
         from asgiref.sync import sync_to_async
 
         self.stdout.write("Phase 4: Stats")
@@ -379,24 +631,15 @@ class Command(BaseCommand):
         merged_all = account_stats.get("mergedAllCharacters", {}).get("results", {})
         merged_deleted = account_stats.get("mergedDeletedCharacters", {}).get("results", {})
 
-        count = 0
-        for mode_key, mode_data in merged_all.items():
-            all_time = mode_data.get("allTime", {})
-            if not all_time:
-                continue
-            await self._save_aggregate(profile, None, "account", mode_key, all_time)
-            count += 1
-
-        for mode_key, mode_data in merged_deleted.items():
-            all_time = mode_data.get("allTime", {})
-            if not all_time:
-                continue
-            await self._save_aggregate(profile, None, "account_deleted", mode_key, all_time)
-            count += 1
+        rows: list[AggregateStats] = []
+        for scope, merged in (("account", merged_all), ("account_deleted", merged_deleted)):
+            for mode_key, mode_data in merged.items():
+                all_time = mode_data.get("allTime", {})
+                if not all_time:
+                    continue
+                rows.append(build_aggregate(profile, None, scope, mode_key, all_time))
 
-        characters = await sync_to_async(
-            list, thread_sensitive=True
-        )(Character.objects.filter(profile=profile))
+        characters = await self._characters(profile, only)
 
         for character in characters:
             try:
@@ -413,38 +656,10 @@ class Command(BaseCommand):
                 all_time = mode_data.get("allTime", {})
                 if not all_time:
                     continue
-                await self._save_aggregate(profile, character, "character", mode_key, all_time)
-                count += 1
+                rows.append(build_aggregate(profile, character, "character", mode_key, all_time))
 
-        self.stdout.write(self.style.SUCCESS(f"  {count} aggregate stat rows saved"))
-
-    async def _save_aggregate(
-        self,
-        profile: Profile,
-        character: Character | None,
-        scope: str,
-        mode_key: str,
-        all_time: dict,
-    ) -> None:
-        from asgiref.sync import sync_to_async
-
-        defaults = {"raw_stats": all_time}
-        for bungie_key, field_name in STAT_FIELD_MAP.items():
-            defaults[field_name] = basic_value(all_time.get(bungie_key))
-
-        # fastestCompletionMs is in milliseconds — convert to seconds for the model.
-        if defaults.get("fastest_completion"):
-            defaults["fastest_completion"] = defaults["fastest_completion"] / 1000.0
-
-        await sync_to_async(
-            AggregateStats.objects.update_or_create, thread_sensitive=True
-        )(
-            profile=profile,
-            character=character,
-            scope=scope,
-            mode=mode_key,
-            defaults=defaults,
-        )
+        await sync_to_async(save_aggregates, thread_sensitive=True)(rows)
+        self.stdout.write(self.style.SUCCESS(f"  {len(rows)} aggregate stat rows saved"))
 
     # ---- phase 5: activities ----
 
@@ -454,6 +669,7 @@ class Command(BaseCommand):
         profile: Profile,
         resolver: ManifestResolver,
         incremental: bool,
+        only: set[str] | None = None,
     ) -> None:
         from asgiref.sync import sync_to_async
 
@@ -461,9 +677,7 @@ class Command(BaseCommand):
             f"Phase 5: Activities ({'incremental' if incremental else 'full'})"
         )
 
-        characters = await sync_to_async(
-            list, thread_sensitive=True
-        )(Character.objects.filter(profile=profile))
+        characters = await self._characters(profile, only)
 
         for character in characters:
             self.stdout.write(
@@ -492,6 +706,7 @@ class Command(BaseCommand):
                 if not activities:
                     break
 
+                added: list[Activity] = []
                 for raw in activities:
                     details = raw.get("activityDetails", {})
                     instance_id = str(details.get("instanceId", ""))
@@ -508,9 +723,14 @@ class Command(BaseCommand):
                             break
                         continue
 
-                    await self._save_activity(profile, character, raw, resolver)
+                    added.append(
+                        await self._save_activity(profile, character, raw, resolver)
+                    )
                     total_added += 1
 
+                await sync_to_async(apply_activity_rollups, thread_sensitive=True)(
+                    profile, added
+                )
                 self.stdout.write(f"    Page {page}: {total_added} new so far")
                 page += 1
 
@@ -526,7 +746,7 @@ class Command(BaseCommand):
         character: Character,
         raw: dict,
         resolver: ManifestResolver,
-    ) -> None:
+    ) -> Activity:
         from asgiref.sync import sync_to_async
 
         details = raw.get("activityDetails", {})
@@ -573,7 +793,7 @@ class Command(BaseCommand):
             "raw_values": raw,
         }
 
-        await sync_to_async(
+        return await sync_to_async(
             Activity.objects.create, thread_sensitive=True
         )(instance_id=instance_id, **fields)
 
@@ -584,6 +804,7 @@ class Command(BaseCommand):
         client: BungieClient,
         profile: Profile,
         pgcr_modes: list[str],
+        resolver: ManifestResolver | None = None,
     ) -> None:
         from asgiref.sync import sync_to_async
 
@@ -605,53 +826,10 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f"  [{idx}/{total}] {activity.instance_id}: {e}"))
                 continue
 
-            period = parse_period(data.get("period", ""))
-            report = await sync_to_async(
-                CarnageReport.objects.create, thread_sensitive=True
-            )(
-                activity=activity,
-                instance_id=activity.instance_id,
-                activity_hash=activity.activity_hash,
-                activity_name=activity.activity_name,
-                period=period,
-                is_private=bool(data.get("activityWasStartedFromBeginning", False) is False and data.get("isPrivate", False)),
-                starting_phase_index=int(data.get("startingPhaseIndex", 0) or 0),
-                raw_data=data,
+            await sync_to_async(store_pgcr, thread_sensitive=True)(
+                profile, activity, data, resolver
             )
 
-            entries = data.get("entries", [])
-            for entry in entries:
-                player = entry.get("player", {})
-                dest_user = player.get("destinyUserInfo", {})
-                character_class = player.get("characterClass", "") or ""
-                values = entry.get("values", {})
-
-                membership_id = str(dest_user.get("membershipId", ""))
-                is_self = (
-                    membership_id == profile.membership_id
-                    and dest_user.get("membershipType") == profile.membership_type
-                )
-
-                await sync_to_async(
-                    CarnageReportEntry.objects.create, thread_sensitive=True
-                )(
-                    report=report,
-                    membership_id=membership_id,
-                    membership_type=int(dest_user.get("membershipType", 0) or 0),
-                    display_name=dest_user.get("displayName", "") or "",
-                    character_id=str(entry.get("characterId", "")),
-                    character_class=character_class.lower() if character_class else "",
-                    light_level=int(player.get("lightLevel", 0) or 0),
-                    is_self=is_self,
-                    kills=int(basic_value(values.get("kills"))),
-                    deaths=int(basic_value(values.get("deaths"))),
-                    assists=int(basic_value(values.get("assists"))),
-                    score=int(basic_value(values.get("score"))),
-                    completed=bool(basic_value(values.get("completed"))),
-                    time_played_seconds=int(basic_value(values.get("timePlayedSeconds"))),
-                    raw_values=entry,
-                )
-
             if idx % 10 == 0 or idx == total:
                 self.stdout.write(f"  [{idx}/{total}] {activity.activity_name}")
 
@@ -0,0 +1,82 @@
+"""backfill_destiny_weapons — extract per-weapon usage from archived PGCRs.
+
+New PGCRs get CarnageWeaponUsage rows as `archive_destiny --pgcr` stores them.
+This walks entries archived before that existed and pulls `extended.weapons`
+out of each entry's raw_values. Idempotent: entries that already have weapon
+rows are skipped, and inserts ignore (entry, weapon_hash) conflicts.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.profiles.destiny.management.commands.archive_destiny import (
+    extract_weapon_usage,
+)
+from apps.profiles.destiny.manifest import ManifestResolver
+from apps.profiles.destiny.models import CarnageReportEntry
+from apps.profiles.destiny.models import CarnageWeaponUsage
+from apps.profiles.destiny.models import ManifestCache
+
+
+class Command(BaseCommand):
+    help = "Backfill CarnageWeaponUsage from archived PGCR entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        resolver = self._load_manifest()
+        if resolver is None:
+            self.stdout.write(
+                self.style.WARNING("No cached manifest — weapon names left blank")
+            )
+
+        pending = (
+            CarnageReportEntry.objects.filter(weapons__isnull=True)
+            .only("id", "raw_values")
+            .order_by("id")
+        )
+        scanned = written = 0
+        batch: list[CarnageWeaponUsage] = []
+        try:
+            for entry in pending.iterator(chunk_size=batch_size):
+                scanned += 1
+                for w in extract_weapon_usage(entry.raw_values or {}):
+                    name = (
+                        resolver.resolve_item_name(w["weapon_hash"]) if resolver else ""
+                    )
+                    batch.append(CarnageWeaponUsage(entry=entry, weapon_name=name, **w))
+                if scanned % batch_size == 0:
+                    written += self._flush(batch)
+                    batch = []
+                    self.stdout.write(
+                        f"  {scanned} entries scanned, {written} weapon rows"
+                    )
+            written += self._flush(batch)
+        finally:
+            if resolver:
+                resolver.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfill complete: {scanned} entries, {written} weapon rows"
+            )
+        )
+
+    def _flush(self, batch: list[CarnageWeaponUsage]) -> int:
+        if not batch:
+            return 0
+        with transaction.atomic():
+            CarnageWeaponUsage.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
+
+    def _load_manifest(self) -> ManifestResolver | None:
+        latest = ManifestCache.objects.order_by("-downloaded_at").first()
+        if not latest or not latest.file_path or not Path(latest.file_path).exists():
+            return None
+        return ManifestResolver(latest.file_path)
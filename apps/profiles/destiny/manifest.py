@@ -110,6 +110,19 @@ class ManifestResolver:
             "director_activity_hash": defn.get("directActivityHash"),
         }
 
+    def resolve_item_name(self, item_hash: int) -> str:
+        defn = self.get_definition("DestinyInventoryItemDefinition", item_hash)
+        return self._display_name(defn)
+
+    def resolve_presentation_entry(self, table: str, hash_id: int) -> dict:
+        """Name and first parent node for a record, collectible or presentation node."""
+        defn = self.get_definition(table, hash_id)
+        parents = defn.get("parentNodeHashes") or []
+        return {
+            "name": self._display_name(defn),
+            "parent_node_hash": parents[0] if parents else None,
+        }
+
     def resolve_activity_mode(self, mode_hash: int) -> str:
         defn = self.get_definition("DestinyActivityModeDefinition", mode_hash)
         return self._display_name(defn)
@@ -0,0 +1,46 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+def dedupe_account_rows(apps, schema_editor):
+    """Drop duplicate character=NULL rows so NULLS NOT DISTINCT can be applied.
+
+    The old unique_together treated NULLs as distinct, so account-scope rows
+    were never protected. Keep the most recently updated row of each group.
+    """
+    AggregateStats = apps.get_model("destiny", "AggregateStats")
+    rows = (
+        AggregateStats.objects.filter(character__isnull=True)
+        .order_by("profile_id", "scope", "mode", "-updated_at")
+        .values_list("id", "profile_id", "scope", "mode")
+    )
+    seen = set()
+    stale = []
+    for pk, profile_id, scope, mode in rows:
+        key = (profile_id, scope, mode)
+        if key in seen:
+            stale.append(pk)
+        else:
+            seen.add(key)
+    if stale:
+        AggregateStats.objects.filter(pk__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0002_manifestcache_remove_profile_bungie_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_account_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='aggregatestats',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='aggregatestats',
+            constraint=models.UniqueConstraint(fields=('profile', 'character', 'scope', 'mode'), name='destiny_aggregatestats_unique_scope_mode', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:13
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Activity = apps.get_model("destiny", "Activity")
+    ActivityRollup = apps.get_model("destiny", "ActivityRollup")
+    grouped = (
+        Activity.objects.values("profile_id", "activity_name", "mode_category")
+        .annotate(
+            attempts=Count("id"),
+            clears=Count("id", filter=Q(completed=True)),
+            fastest=Min("duration_seconds", filter=Q(completed=True, duration_seconds__gt=0)),
+            total_kills=Sum("kills"),
+            total_deaths=Sum("deaths"),
+        )
+        .order_by()
+    )
+    ActivityRollup.objects.bulk_create(
+        [
+            ActivityRollup(
+                profile_id=g["profile_id"],
+                activity_name=g["activity_name"],
+                mode_category=g["mode_category"],
+                attempts=g["attempts"],
+                clears=g["clears"],
+                fastest_clear_seconds=g["fastest"],
+                kills=g["total_kills"] or 0,
+                deaths=g["total_deaths"] or 0,
+            )
+            for g in grouped
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0003_aggregatestats_nulls_not_distinct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('activity_name', models.CharField(blank=True, max_length=255)),
+                ('mode_category', models.CharField(choices=[('raid', 'Raid'), ('dungeon', 'Dungeon'), ('nightfall', 'Nightfall'), ('strike', 'Strike'), ('crucible', 'Crucible'), ('trials', 'Trials of Osiris'), ('ironbanner', 'Iron Banner'), ('gambit', 'Gambit'), ('story', 'Story'), ('patrol', 'Patrol'), ('social', 'Social'), ('other', 'Other')], default='other', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('clears', models.IntegerField(default=0)),
+                ('fastest_clear_seconds', models.IntegerField(blank=True, null=True)),
+                ('kills', models.BigIntegerField(default=0)),
+                ('deaths', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='destiny.profile')),
+            ],
+            options={
+                'ordering': ['mode_category', '-attempts'],
+                'indexes': [models.Index(fields=['mode_category', '-attempts'], name='destiny_act_mode_ca_0f645a_idx')],
+                'unique_together': {('profile', 'activity_name', 'mode_category')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0004_activityrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarnageWeaponUsage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('weapon_hash', models.BigIntegerField()),
+                ('weapon_name', models.CharField(blank=True, max_length=255)),
+                ('kills', models.IntegerField(default=0)),
+                ('precision_kills', models.IntegerField(default=0)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weapons', to='destiny.carnagereportentry')),
+            ],
+            options={
+                'verbose_name_plural': 'carnage weapon usage',
+                'ordering': ['-kills'],
+                'indexes': [models.Index(fields=['weapon_hash'], name='destiny_car_weapon__5e6e86_idx')],
+                'unique_together': {('entry', 'weapon_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:17
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def backfill_co_players(apps, schema_editor):
+    """Fold every archived non-self PGCR entry into CoPlayer, newest name wins."""
+    CarnageReportEntry = apps.get_model("destiny", "CarnageReportEntry")
+    CoPlayer = apps.get_model("destiny", "CoPlayer")
+    rows = (
+        CarnageReportEntry.objects.filter(is_self=False)
+        .exclude(membership_id="")
+        .order_by("report__period")
+        .values_list(
+            "report__activity__profile_id",
+            "membership_id",
+            "report_id",
+            "report__period",
+            "report__activity__completed",
+            "completed",
+            "membership_type",
+            "display_name",
+        )
+    )
+    folded = {}
+    for profile_id, membership_id, report_id, period, activity_completed, completed, mtype, name in rows.iterator(chunk_size=2000):
+        d = folded.setdefault((profile_id, membership_id), {"reports": set(), "cleared": set()})
+        d["reports"].add(report_id)
+        if completed and activity_completed:
+            d["cleared"].add(report_id)
+        d.update(last_seen=period, membership_type=mtype, display_name=name)
+
+    CoPlayer.objects.bulk_create(
+        [
+            CoPlayer(
+                profile_id=profile_id,
+                membership_id=membership_id,
+                membership_type=d["membership_type"],
+                display_name=d["display_name"],
+                activities_together=len(d["reports"]),
+                clears_together=len(d["cleared"]),
+                last_seen=d["last_seen"],
+            )
+            for (profile_id, membership_id), d in folded.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0005_carnageweaponusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoPlayer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('membership_id', models.CharField(max_length=50)),
+                ('membership_type', models.IntegerField(default=0)),
+                ('display_name', models.CharField(blank=True, max_length=255)),
+                ('activities_together', models.IntegerField(default=0)),
+                ('clears_together', models.IntegerField(default=0)),
+                ('last_seen', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_players', to='destiny.profile')),
+            ],
+            options={
+                'ordering': ['-activities_together', '-last_seen'],
+                'indexes': [models.Index(fields=['profile', '-activities_together'], name='destiny_cop_profile_3f70d2_idx')],
+                'unique_together': {('profile', 'membership_id')},
+            },
+        ),
+        migrations.RunPython(backfill_co_players, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:24
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 200
+
+
+def _entry_key(entry: dict) -> tuple[str, str]:
+    user = (entry.get("player") or {}).get("destinyUserInfo") or {}
+    return (str(user.get("membershipId", "")), str(entry.get("characterId", "")))
+
+
+def assign_entry_indexes(rows, raw_entries) -> None:
+    """Set each row's `entry_index` to its entry's position in `raw_entries`.
+
+    A row whose stored `raw_values` equals an entry takes that entry's
+    position. Rows left over fall back to (membershipId, characterId); that
+    key can be blank or repeated, so among equal keys the pairing is
+    arbitrary, but each position is still used once. Rows that match nothing
+    go after the list, so no two rows share an index.
+    """
+    free = dict(enumerate(raw_entries))
+    leftover = []
+    for row in rows:
+        index = next((i for i, e in free.items() if row.raw_values and e == row.raw_values), None)
+        if index is None:
+            leftover.append(row)
+        else:
+            row.entry_index = index
+            del free[index]
+
+    keys = {i: _entry_key(e) for i, e in free.items()}
+    unmatched = []
+    for row in leftover:
+        key = (row.membership_id, row.character_id)
+        index = next((i for i, k in keys.items() if k == key), None)
+        if index is None:
+            unmatched.append(row)
+            continue
+        row.entry_index = index
+        if not row.raw_values:
+            row.raw_values = free[index]
+        del keys[index]
+
+    for offset, row in enumerate(unmatched):
+        row.entry_index = len(raw_entries) + offset
+
+
+def strip_report_entries(apps, schema_editor):
+    """Index each entry into its PGCR and drop the duplicated list from the report."""
+    CarnageReport = apps.get_model("destiny", "CarnageReport")
+    CarnageReportEntry = apps.get_model("destiny", "CarnageReportEntry")
+    db = schema_editor.connection.alias
+
+    pending = CarnageReport.objects.using(db).filter(raw_data__has_key="entries").values_list("pk", flat=True)
+    ids = list(pending)
+    for start in range(0, len(ids), BATCH_SIZE):
+        with transaction.atomic(using=db):
+            reports = CarnageReport.objects.using(db).filter(pk__in=ids[start : start + BATCH_SIZE])
+            for report in reports:
+                raw_entries = report.raw_data.pop("entries") or []
+                rows = list(CarnageReportEntry.objects.using(db).filter(report=report))
+                assign_entry_indexes(rows, raw_entries)
+                CarnageReportEntry.objects.using(db).bulk_update(rows, ["entry_index", "raw_values"])
+                report.save(update_fields=["raw_data"])
+
+
+def restore_report_entries(apps, schema_editor):
+    CarnageReport = apps.get_model("destiny", "CarnageReport")
+    db = schema_editor.connection.alias
+    for report in CarnageReport.objects.using(db).exclude(raw_data__has_key="entries").iterator():
+        entries = report.entries.order_by("entry_index").values_list("raw_values", flat=True)
+        report.raw_data["entries"] = list(entries)
+        report.save(update_fields=["raw_data"])
+
+
+class Migration(migrations.Migration):
+
+    # Stripping commits per batch rather than rewriting every report in one
+    # transaction. The freed TOAST space isn't returned to the OS here; see
+    # README "Reclaiming snapshot space" for the off-hours VACUUM FULL.
+    atomic = False
+
+    dependencies = [
+        ('destiny', '0006_coplayer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carnagereportentry',
+            name='entry_index',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(strip_report_entries, restore_report_entries),
+    ]
@@ -0,0 +1,227 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:21
+
+import django.db.models.deletion
+import json
+import sqlite3
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Frozen copies of the state flags and row builders in
+# apps.profiles.destiny.models / triumphs, as of this migration.
+RECORD_OBJECTIVE_NOT_COMPLETED = 4
+RECORD_INVISIBLE = 16
+COLLECTIBLE_NOT_ACQUIRED = 1
+COLLECTIBLE_INVISIBLE = 4
+
+
+def record_rows(component: dict) -> dict[int, dict]:
+    rows = {}
+    for hash_str, record in (component.get("records") or {}).items():
+        state = int(record.get("state", 0) or 0)
+        objectives = [
+            {
+                "objective_hash": o.get("objectiveHash"),
+                "progress": o.get("progress", 0),
+                "completion_value": o.get("completionValue", 0),
+                "complete": bool(o.get("complete")),
+            }
+            for o in (record.get("objectives") or record.get("intervalObjectives") or [])
+        ]
+        rows[int(hash_str)] = {
+            "state": state,
+            "completed": not state & RECORD_OBJECTIVE_NOT_COMPLETED,
+            "objectives": objectives,
+        }
+    return rows
+
+
+def collectible_rows(component: dict) -> dict[int, dict]:
+    rows = {}
+    for hash_str, collectible in (component.get("collectibles") or {}).items():
+        state = int(collectible.get("state", 0) or 0)
+        rows[int(hash_str)] = {
+            "state": state,
+            "acquired": not state & COLLECTIBLE_NOT_ACQUIRED,
+        }
+    return rows
+
+
+def presentation_lookup(path: str):
+    """Name and first parent node per (table, hash) from a manifest SQLite file."""
+    conn = sqlite3.connect(path)
+    memo = {}
+
+    def lookup(table: str, hash_id: int) -> dict:
+        if (table, hash_id) not in memo:
+            signed = hash_id - (1 << 32) if hash_id >= (1 << 31) else hash_id
+            try:
+                row = conn.execute(f"SELECT json FROM {table} WHERE id = ?", (signed,)).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            defn = json.loads(row[0]) if row else {}
+            parents = defn.get("parentNodeHashes") or []
+            memo[(table, hash_id)] = {
+                "name": defn.get("displayProperties", {}).get("name", ""),
+                "parent_node_hash": parents[0] if parents else None,
+            }
+        return memo[(table, hash_id)]
+
+    return lookup, conn
+
+
+def node_progress(items: list[dict], done_field: str, invisible_flag: int, lookup) -> dict[int, dict]:
+    """completed/total per presentation node, rolled up through every ancestor."""
+    counts = defaultdict(lambda: [0, 0])
+    for item in items:
+        if item["state"] & invisible_flag:
+            continue
+        seen = set()
+        parent = item["parent_node_hash"]
+        while parent and parent not in seen:
+            seen.add(parent)
+            counts[parent][1] += 1
+            if item[done_field]:
+                counts[parent][0] += 1
+            parent = lookup("DestinyPresentationNodeDefinition", parent)["parent_node_hash"]
+    return {
+        node_hash: {
+            **lookup("DestinyPresentationNodeDefinition", node_hash),
+            "completed": completed,
+            "total": total,
+        }
+        for node_hash, (completed, total) in counts.items()
+    }
+
+
+def _store_states(db, profile, model, hash_field, table, rows, lookup) -> list[dict]:
+    """Insert one state row per item; returns the stored field values."""
+    unresolved = {"name": "", "parent_node_hash": None}
+    items = [
+        {hash_field: item_hash, **(lookup(table, item_hash) if lookup else unresolved), **values}
+        for item_hash, values in rows.items()
+    ]
+    model.objects.using(db).bulk_create([model(profile=profile, **item) for item in items], batch_size=1000)
+    return items
+
+
+def backfill_triumph_states(apps, schema_editor):
+    """Copy each profile's stored records/collectibles blobs into the new tables.
+
+    Names and parent nodes come from the cached manifest when its file is
+    still on disk; without it, states are stored unnamed and node totals are
+    left for the next archive run (which resolves them) to fill in.
+    """
+    Profile = apps.get_model("destiny", "Profile")
+    RecordState = apps.get_model("destiny", "RecordState")
+    CollectibleState = apps.get_model("destiny", "CollectibleState")
+    PresentationNodeProgress = apps.get_model("destiny", "PresentationNodeProgress")
+    ManifestCache = apps.get_model("destiny", "ManifestCache")
+    db = schema_editor.connection.alias
+
+    cache = ManifestCache.objects.using(db).order_by("-downloaded_at").first()
+    if cache and cache.file_path and Path(cache.file_path).is_file():
+        lookup, conn = presentation_lookup(cache.file_path)
+    else:
+        lookup, conn = None, None
+
+    try:
+        for profile in Profile.objects.using(db).only("pk", "records_data", "collectibles_data"):
+            records = _store_states(
+                db, profile, RecordState, "record_hash", "DestinyRecordDefinition",
+                record_rows(profile.records_data or {}), lookup,
+            )
+            collectibles = _store_states(
+                db, profile, CollectibleState, "collectible_hash", "DestinyCollectibleDefinition",
+                collectible_rows(profile.collectibles_data or {}), lookup,
+            )
+            if lookup is None:
+                continue
+            nodes = [
+                PresentationNodeProgress(profile=profile, kind=kind, node_hash=node_hash, **fields)
+                for kind, items, done_field, invisible in (
+                    ("records", records, "completed", RECORD_INVISIBLE),
+                    ("collectibles", collectibles, "acquired", COLLECTIBLE_INVISIBLE),
+                )
+                for node_hash, fields in node_progress(items, done_field, invisible, lookup).items()
+            ]
+            PresentationNodeProgress.objects.using(db).bulk_create(nodes, batch_size=1000)
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0007_split_pgcr_entries_raw'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectibleState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('collectible_hash', models.BigIntegerField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('parent_node_hash', models.BigIntegerField(blank=True, null=True)),
+                ('state', models.IntegerField(default=0)),
+                ('acquired', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collectible_states', to='destiny.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', 'parent_node_hash'], name='destiny_col_profile_3e9f2e_idx')],
+                'unique_together': {('profile', 'collectible_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PresentationNodeProgress',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('node_hash', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('records', 'Triumphs'), ('collectibles', 'Collections')], max_length=20)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('parent_node_hash', models.BigIntegerField(blank=True, null=True)),
+                ('completed', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='node_progress', to='destiny.profile')),
+            ],
+            options={
+                'verbose_name_plural': 'presentation node progress',
+                'ordering': ['kind', 'name'],
+                'indexes': [models.Index(fields=['profile', 'kind', 'parent_node_hash'], name='destiny_pre_profile_868895_idx')],
+                'unique_together': {('profile', 'kind', 'node_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RecordState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('record_hash', models.BigIntegerField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('parent_node_hash', models.BigIntegerField(blank=True, null=True)),
+                ('state', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('objectives', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='record_states', to='destiny.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', 'parent_node_hash'], name='destiny_rec_profile_00501b_idx')],
+                'unique_together': {('profile', 'record_hash')},
+            },
+        ),
+        migrations.RunPython(backfill_triumph_states, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='collectibles_data',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='records_data',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0008_triumph_states'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='played_watermark',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destiny', '0009_profile_played_watermark'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activityrollup',
+            name='destiny_act_mode_ca_0f645a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activityrollup',
+            index=models.Index(fields=['profile', 'mode_category', '-attempts'], name='destiny_act_profile_fb4353_idx'),
+        ),
+    ]
@@ -31,8 +31,11 @@ class Profile(models.Model):
 
     profile_data = models.JSONField(default=dict, blank=True)
     metrics_data = models.JSONField(default=dict, blank=True)
-    collectibles_data = models.JSONField(default=dict, blank=True)
-    records_data = models.JSONField(default=dict, blank=True)
+
+    # dateLastPlayed for the profile and each character as of the last full
+    # archive run; compared against a cheap component 100/200 call to skip
+    # runs when nothing has been played.
+    played_watermark = models.JSONField(default=dict, blank=True)
 
     last_synced = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -150,7 +153,15 @@ class AggregateStats(models.Model):
 
     class Meta:
         verbose_name_plural = "aggregate stats"
-        unique_together = [("profile", "character", "scope", "mode")]
+        constraints = [
+            # NULLS NOT DISTINCT so account-scope rows (character=NULL) collide
+            # too — archive_destiny upserts on these columns with ON CONFLICT.
+            models.UniqueConstraint(
+                fields=["profile", "character", "scope", "mode"],
+                nulls_distinct=False,
+                name="destiny_aggregatestats_unique_scope_mode",
+            ),
+        ]
         ordering = ["scope", "mode"]
 
     def __str__(self):
@@ -235,8 +246,53 @@ class Activity(models.Model):
         return f"{label} ({self.period.date()})"
 
 
+class ActivityRollup(models.Model):
+    """Per-activity totals, maintained incrementally as activities are archived.
+
+    Lets the raid/dungeon/trials stats endpoints read one small table instead
+    of aggregating the full Activity history on every request. Rebuild with
+    `archive_destiny --rebuild-rollups` if it ever drifts.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="activity_rollups",
+    )
+    activity_name = models.CharField(max_length=255, blank=True)
+    mode_category = models.CharField(
+        max_length=20,
+        choices=Activity.MODE_CATEGORIES,
+        default="other",
+    )
+
+    attempts = models.IntegerField(default=0)
+    clears = models.IntegerField(default=0)
+    fastest_clear_seconds = models.IntegerField(null=True, blank=True)
+    kills = models.BigIntegerField(default=0)
+    deaths = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("profile", "activity_name", "mode_category")]
+        indexes = [
+            models.Index(fields=["profile", "mode_category", "-attempts"]),
+        ]
+        ordering = ["mode_category", "-attempts"]
+
+    def __str__(self):
+        return f"{self.activity_name or 'Unknown'} ({self.clears}/{self.attempts})"
+
+
 class CarnageReport(models.Model):
-    """Post-Game Carnage Report (PGCR) for a single activity instance."""
+    """Post-Game Carnage Report (PGCR) for a single activity instance.
+
+    `raw_data` is the PGCR envelope without its `entries` list; each entry's
+    dict lives once, on its CarnageReportEntry, at its original `entry_index`.
+    Use `full_raw_data()` to reassemble the response as Bungie sent it.
+    """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     activity = models.OneToOneField(
@@ -262,6 +318,10 @@ class CarnageReport(models.Model):
     def __str__(self):
         return f"PGCR: {self.activity_name or self.instance_id}"
 
+    def full_raw_data(self) -> dict:
+        entries = self.entries.order_by("entry_index").values_list("raw_values", flat=True)
+        return {**self.raw_data, "entries": list(entries)}
+
 
 class CarnageReportEntry(models.Model):
     """One player's performance in a PGCR."""
@@ -272,6 +332,7 @@ class CarnageReportEntry(models.Model):
         on_delete=models.CASCADE,
         related_name="entries",
     )
+    entry_index = models.IntegerField(default=0)
 
     membership_id = models.CharField(max_length=30, db_index=True)
     membership_type = models.IntegerField(default=0)
@@ -298,6 +359,178 @@ class CarnageReportEntry(models.Model):
         return f"{self.display_name} ({self.kills}K/{self.deaths}D)"
 
 
+class CarnageWeaponUsage(models.Model):
+    """Per-weapon kills for one player in one PGCR (`entries[].extended.weapons`)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    entry = models.ForeignKey(
+        CarnageReportEntry,
+        on_delete=models.CASCADE,
+        related_name="weapons",
+    )
+
+    weapon_hash = models.BigIntegerField()
+    weapon_name = models.CharField(max_length=255, blank=True)
+    kills = models.IntegerField(default=0)
+    precision_kills = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "carnage weapon usage"
+        unique_together = [("entry", "weapon_hash")]
+        indexes = [
+            models.Index(fields=["weapon_hash"]),
+        ]
+        ordering = ["-kills"]
+
+    def __str__(self):
+        return f"{self.weapon_name or self.weapon_hash} ({self.kills}K)"
+
+
+class CoPlayer(models.Model):
+    """Someone who has shared a PGCR with the profile, with running totals.
+
+    Maintained in bulk as PGCRs are archived so "who do I play with most"
+    never has to group the entry table. Rebuild with
+    `archive_destiny --rebuild-rollups` if it ever drifts.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="co_players",
+    )
+    membership_id = models.CharField(max_length=50)
+    membership_type = models.IntegerField(default=0)
+    display_name = models.CharField(max_length=255, blank=True)
+
+    activities_together = models.IntegerField(default=0)
+    clears_together = models.IntegerField(default=0)
+    last_seen = models.DateTimeField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("profile", "membership_id")]
+        indexes = [
+            models.Index(fields=["profile", "-activities_together"]),
+        ]
+        ordering = ["-activities_together", "-last_seen"]
+
+    def __str__(self):
+        return f"{self.display_name or self.membership_id} ({self.activities_together})"
+
+
+class RecordState(models.Model):
+    """One triumph (DestinyRecordDefinition) and its current state for a profile."""
+
+    # DestinyRecordState bit flags.
+    REDEEMED = 1
+    OBJECTIVE_NOT_COMPLETED = 4
+    INVISIBLE = 16
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="record_states",
+    )
+    record_hash = models.BigIntegerField()
+    name = models.CharField(max_length=255, blank=True)
+    parent_node_hash = models.BigIntegerField(null=True, blank=True)
+
+    state = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    objectives = models.JSONField(default=list, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("profile", "record_hash")]
+        indexes = [
+            models.Index(fields=["profile", "parent_node_hash"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.record_hash} ({'done' if self.completed else 'open'})"
+
+
+class CollectibleState(models.Model):
+    """One collectible (DestinyCollectibleDefinition) and its current state for a profile."""
+
+    # DestinyCollectibleState bit flags.
+    NOT_ACQUIRED = 1
+    INVISIBLE = 4
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="collectible_states",
+    )
+    collectible_hash = models.BigIntegerField()
+    name = models.CharField(max_length=255, blank=True)
+    parent_node_hash = models.BigIntegerField(null=True, blank=True)
+
+    state = models.IntegerField(default=0)
+    acquired = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("profile", "collectible_hash")]
+        indexes = [
+            models.Index(fields=["profile", "parent_node_hash"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.collectible_hash} ({'owned' if self.acquired else 'missing'})"
+
+
+class PresentationNodeProgress(models.Model):
+    """Precomputed completion for a triumph or collections presentation node.
+
+    Counts include every visible record/collectible beneath the node, not just
+    direct children, so the triumphs endpoint reads one row per node.
+    """
+
+    KINDS = [
+        ("records", "Triumphs"),
+        ("collectibles", "Collections"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="node_progress",
+    )
+    node_hash = models.BigIntegerField()
+    kind = models.CharField(max_length=20, choices=KINDS)
+    name = models.CharField(max_length=255, blank=True)
+    parent_node_hash = models.BigIntegerField(null=True, blank=True)
+
+    completed = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "presentation node progress"
+        unique_together = [("profile", "kind", "node_hash")]
+        indexes = [
+            models.Index(fields=["profile", "kind", "parent_node_hash"]),
+        ]
+        ordering = ["kind", "name"]
+
+    def __str__(self):
+        return f"{self.name or self.node_hash} ({self.completed}/{self.total})"
+
+    @property
+    def percent(self) -> float:
+        return round(self.completed / self.total * 100, 1) if self.total else 0.0
+
+
 class ManifestCache(models.Model):
     """Tracks the downloaded Bungie manifest version on disk."""
 
@@ -0,0 +1,286 @@
+"""Incremental per-activity rollups for the Destiny archive.
+
+`ActivityRollup` holds attempts/clears/fastest/kills/deaths per
+(profile, activity_name, mode_category). The archive folds each page of newly
+inserted activities into it, so the stats endpoints never aggregate over the
+full Activity history. `rebuild_activity_rollups` recomputes from scratch.
+
+`CoPlayer` is the same idea for fireteam members: each stored PGCR folds its
+non-self entries into per-membership totals.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Min
+from django.db.models import Q
+from django.db.models import Sum
+
+from .models import Activity
+from .models import ActivityRollup
+from .models import CarnageReport
+from .models import CarnageReportEntry
+from .models import CoPlayer
+from .models import Profile
+
+ROLLUP_FIELDS = ["attempts", "clears", "fastest_clear_seconds", "kills", "deaths"]
+CO_PLAYER_FIELDS = [
+    "membership_type",
+    "display_name",
+    "activities_together",
+    "clears_together",
+    "last_seen",
+]
+
+
+def _min_or_none(a: int | None, b: int | None) -> int | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def fold_activities(activities: Iterable[Activity]) -> dict[tuple[str, str], dict]:
+    """Reduce activities to per-(activity_name, mode_category) deltas."""
+    deltas: dict[tuple[str, str], dict] = {}
+    for a in activities:
+        key = (a.activity_name, a.mode_category)
+        d = deltas.setdefault(
+            key,
+            {
+                "attempts": 0,
+                "clears": 0,
+                "fastest_clear_seconds": None,
+                "kills": 0,
+                "deaths": 0,
+            },
+        )
+        d["attempts"] += 1
+        d["kills"] += a.kills
+        d["deaths"] += a.deaths
+        if a.completed:
+            d["clears"] += 1
+            if a.duration_seconds > 0:
+                d["fastest_clear_seconds"] = _min_or_none(
+                    d["fastest_clear_seconds"], a.duration_seconds
+                )
+    return deltas
+
+
+def apply_activity_rollups(profile: Profile, activities: Iterable[Activity]) -> int:
+    """Fold newly inserted activities into the profile's rollups.
+
+    One locked read of the affected rollup rows plus one upsert, regardless of
+    how many activities are folded in. Returns the number of rollup rows written.
+    """
+    deltas = fold_activities(activities)
+    if not deltas:
+        return 0
+
+    names = {name for name, _ in deltas}
+    categories = {category for _, category in deltas}
+
+    with transaction.atomic():
+        existing = {
+            (r.activity_name, r.mode_category): r
+            for r in ActivityRollup.objects.select_for_update().filter(
+                profile=profile,
+                activity_name__in=names,
+                mode_category__in=categories,
+            )
+        }
+
+        rows = []
+        for (name, category), d in deltas.items():
+            row = existing.get((name, category)) or ActivityRollup(
+                profile=profile,
+                activity_name=name,
+                mode_category=category,
+            )
+            row.attempts += d["attempts"]
+            row.clears += d["clears"]
+            row.kills += d["kills"]
+            row.deaths += d["deaths"]
+            row.fastest_clear_seconds = _min_or_none(
+                row.fastest_clear_seconds, d["fastest_clear_seconds"]
+            )
+            rows.append(row)
+
+        ActivityRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["profile", "activity_name", "mode_category"],
+            update_fields=[*ROLLUP_FIELDS, "updated_at"],
+        )
+    return len(rows)
+
+
+def rebuild_activity_rollups(profile: Profile) -> int:
+    """Recompute every rollup for a profile from its Activity rows."""
+    grouped = (
+        Activity.objects.filter(profile=profile)
+        .values("activity_name", "mode_category")
+        .annotate(
+            attempts=Count("id"),
+            clears=Count("id", filter=Q(completed=True)),
+            fastest=Min(
+                "duration_seconds", filter=Q(completed=True, duration_seconds__gt=0)
+            ),
+            total_kills=Sum("kills"),
+            total_deaths=Sum("deaths"),
+        )
+        .order_by()
+    )
+    rows = [
+        ActivityRollup(
+            profile=profile,
+            activity_name=g["activity_name"],
+            mode_category=g["mode_category"],
+            attempts=g["attempts"],
+            clears=g["clears"],
+            fastest_clear_seconds=g["fastest"],
+            kills=g["total_kills"] or 0,
+            deaths=g["total_deaths"] or 0,
+        )
+        for g in grouped
+    ]
+    with transaction.atomic():
+        ActivityRollup.objects.filter(profile=profile).delete()
+        ActivityRollup.objects.bulk_create(rows)
+    return len(rows)
+
+
+# ---- Fireteam co-players ----
+
+
+def fold_co_players(rows: Iterable[dict]) -> dict[str, dict]:
+    """Reduce non-self PGCR entry rows to per-membership deltas.
+
+    Each row carries `report_id`, `period`, `activity_completed`,
+    `membership_id`, `membership_type`, `display_name` and `completed`. A
+    player who swapped characters mid-activity has several entries in one
+    report; they count once.
+    """
+    folded: dict[str, dict] = {}
+    for row in rows:
+        d = folded.setdefault(
+            row["membership_id"],
+            {"reports": set(), "cleared": set(), "last_seen": None},
+        )
+        d["reports"].add(row["report_id"])
+        if row["completed"] and row["activity_completed"]:
+            d["cleared"].add(row["report_id"])
+        if d["last_seen"] is None or row["period"] >= d["last_seen"]:
+            d["last_seen"] = row["period"]
+            d["membership_type"] = row["membership_type"]
+            d["display_name"] = row["display_name"]
+
+    return {
+        membership_id: {
+            "membership_type": d["membership_type"],
+            "display_name": d["display_name"],
+            "activities_together": len(d["reports"]),
+            "clears_together": len(d["cleared"]),
+            "last_seen": d["last_seen"],
+        }
+        for membership_id, d in folded.items()
+    }
+
+
+def _report_rows(
+    report: CarnageReport, entries: Iterable[CarnageReportEntry]
+) -> list[dict]:
+    return [
+        {
+            "report_id": report.pk,
+            "period": report.period,
+            "activity_completed": report.activity.completed,
+            "membership_id": e.membership_id,
+            "membership_type": e.membership_type,
+            "display_name": e.display_name,
+            "completed": e.completed,
+        }
+        for e in entries
+        if not e.is_self and e.membership_id
+    ]
+
+
+def apply_co_players(
+    profile: Profile,
+    report: CarnageReport,
+    entries: Iterable[CarnageReportEntry],
+) -> int:
+    """Fold a newly stored PGCR's fireteam into the profile's CoPlayer rows.
+
+    One locked read plus one upsert per report. Returns rows written.
+    """
+    deltas = fold_co_players(_report_rows(report, entries))
+    if not deltas:
+        return 0
+
+    with transaction.atomic():
+        existing = {
+            c.membership_id: c
+            for c in CoPlayer.objects.select_for_update().filter(
+                profile=profile,
+                membership_id__in=deltas,
+            )
+        }
+
+        rows = []
+        for membership_id, d in deltas.items():
+            row = existing.get(membership_id)
+            if row is None:
+                row = CoPlayer(profile=profile, membership_id=membership_id, **d)
+            else:
+                row.activities_together += d["activities_together"]
+                row.clears_together += d["clears_together"]
+                if d["last_seen"] >= row.last_seen:
+                    row.last_seen = d["last_seen"]
+                    row.membership_type = d["membership_type"]
+                    row.display_name = d["display_name"]
+            rows.append(row)
+
+        CoPlayer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["profile", "membership_id"],
+            update_fields=[*CO_PLAYER_FIELDS, "updated_at"],
+        )
+    return len(rows)
+
+
+def rebuild_co_players(profile: Profile) -> int:
+    """Recompute every CoPlayer for a profile from its archived PGCR entries."""
+    rows = (
+        CarnageReportEntry.objects.filter(
+            report__activity__profile=profile, is_self=False
+        )
+        .exclude(membership_id="")
+        .values(
+            "report_id",
+            "membership_id",
+            "membership_type",
+            "display_name",
+            "completed",
+            period=F("report__period"),
+            activity_completed=F("report__activity__completed"),
+        )
+        .iterator(chunk_size=2000)
+    )
+    folded = fold_co_players(rows)
+    with transaction.atomic():
+        CoPlayer.objects.filter(profile=profile).delete()
+        CoPlayer.objects.bulk_create(
+            [
+                CoPlayer(profile=profile, membership_id=m, **d)
+                for m, d in folded.items()
+            ],
+            batch_size=1000,
+        )
+    return len(folded)
@@ -0,0 +1,224 @@
+"""Normalized triumph and collection state for the Destiny archive.
+
+The profile phase hands the profileRecords/profileCollectibles components to
+`sync_triumphs`, which diffs them against the stored RecordState and
+CollectibleState rows and upserts only the ones whose state changed. It then
+recomputes PresentationNodeProgress — visible/completed counts rolled up
+through every ancestor node — so the triumphs endpoint reads precomputed
+totals instead of walking the component JSON.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from .manifest import ManifestResolver
+from .models import CollectibleState
+from .models import PresentationNodeProgress
+from .models import Profile
+from .models import RecordState
+
+NODE_FIELDS = ["name", "parent_node_hash", "completed", "total"]
+
+
+def record_rows(component: dict) -> dict[int, dict]:
+    """`profileRecords.data` → {record_hash: field values}."""
+    rows = {}
+    for hash_str, record in (component.get("records") or {}).items():
+        state = int(record.get("state", 0) or 0)
+        objectives = [
+            {
+                "objective_hash": o.get("objectiveHash"),
+                "progress": o.get("progress", 0),
+                "completion_value": o.get("completionValue", 0),
+                "complete": bool(o.get("complete")),
+            }
+            for o in (
+                record.get("objectives") or record.get("intervalObjectives") or []
+            )
+        ]
+        rows[int(hash_str)] = {
+            "state": state,
+            "completed": not state & RecordState.OBJECTIVE_NOT_COMPLETED,
+            "objectives": objectives,
+        }
+    return rows
+
+
+def collectible_rows(component: dict) -> dict[int, dict]:
+    """`profileCollectibles.data` → {collectible_hash: field values}."""
+    rows = {}
+    for hash_str, collectible in (component.get("collectibles") or {}).items():
+        state = int(collectible.get("state", 0) or 0)
+        rows[int(hash_str)] = {
+            "state": state,
+            "acquired": not state & CollectibleState.NOT_ACQUIRED,
+        }
+    return rows
+
+
+def _sync_states(
+    profile: Profile,
+    model: type[RecordState] | type[CollectibleState],
+    hash_field: str,
+    table: str,
+    incoming: dict[int, dict],
+    resolver: ManifestResolver | None,
+) -> tuple[int, list[dict]]:
+    """Upsert changed rows; return (rows written, every current row's values)."""
+    value_fields = list(next(iter(incoming.values())))
+    existing = {
+        row[hash_field]: row
+        for row in model.objects.filter(profile=profile).values(
+            hash_field, "name", "parent_node_hash", *value_fields
+        )
+    }
+
+    changed = []
+    current = []
+    for item_hash, values in incoming.items():
+        stored = existing.get(item_hash)
+        if resolver:
+            meta = resolver.resolve_presentation_entry(table, item_hash)
+        elif stored:
+            meta = {
+                "name": stored["name"],
+                "parent_node_hash": stored["parent_node_hash"],
+            }
+        else:
+            meta = {"name": "", "parent_node_hash": None}
+        row = {hash_field: item_hash, **meta, **values}
+        current.append(row)
+        if row != stored:
+            changed.append(model(profile=profile, **row))
+
+    if changed:
+        model.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["profile", hash_field],
+            update_fields=["name", "parent_node_hash", *value_fields, "updated_at"],
+            batch_size=1000,
+        )
+    return len(changed), current
+
+
+def _sync_nodes(
+    profile: Profile,
+    kind: str,
+    items: list[dict],
+    done_field: str,
+    invisible_flag: int,
+    resolver: ManifestResolver | None,
+) -> int:
+    """Recompute per-node completed/total for one kind; write only changed nodes."""
+    existing = {
+        row["node_hash"]: row
+        for row in PresentationNodeProgress.objects.filter(
+            profile=profile, kind=kind
+        ).values("node_hash", *NODE_FIELDS)
+    }
+    nodes: dict[int, dict] = {}
+
+    def node(node_hash: int) -> dict:
+        if node_hash not in nodes:
+            if resolver:
+                meta = resolver.resolve_presentation_entry(
+                    "DestinyPresentationNodeDefinition", node_hash
+                )
+            else:
+                stored = existing.get(node_hash, {})
+                meta = {
+                    "name": stored.get("name", ""),
+                    "parent_node_hash": stored.get("parent_node_hash"),
+                }
+            nodes[node_hash] = meta
+        return nodes[node_hash]
+
+    counts: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+    for item in items:
+        if item["state"] & invisible_flag:
+            continue
+        seen = set()
+        parent = item["parent_node_hash"]
+        while parent and parent not in seen:
+            seen.add(parent)
+            counts[parent][1] += 1
+            if item[done_field]:
+                counts[parent][0] += 1
+            parent = node(parent)["parent_node_hash"]
+
+    changed = []
+    for node_hash, (completed, total) in counts.items():
+        row = {
+            "node_hash": node_hash,
+            **node(node_hash),
+            "completed": completed,
+            "total": total,
+        }
+        if row != existing.get(node_hash):
+            changed.append(PresentationNodeProgress(profile=profile, kind=kind, **row))
+
+    stale = set(existing) - set(counts)
+    if stale:
+        PresentationNodeProgress.objects.filter(
+            profile=profile, kind=kind, node_hash__in=stale
+        ).delete()
+    if changed:
+        PresentationNodeProgress.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["profile", "kind", "node_hash"],
+            update_fields=[*NODE_FIELDS, "updated_at"],
+            batch_size=1000,
+        )
+    return len(changed) + len(stale)
+
+
+@transaction.atomic
+def sync_triumphs(
+    profile: Profile,
+    records_component: dict,
+    collectibles_component: dict,
+    resolver: ManifestResolver | None = None,
+) -> dict[str, int]:
+    """Store record/collectible state and node totals. Returns rows written per table.
+
+    Without a resolver, names and parent nodes already stored are kept.
+    """
+    written = {"records": 0, "collectibles": 0, "nodes": 0}
+    records = record_rows(records_component)
+    if records:
+        written["records"], current = _sync_states(
+            profile,
+            RecordState,
+            "record_hash",
+            "DestinyRecordDefinition",
+            records,
+            resolver,
+        )
+        written["nodes"] += _sync_nodes(
+            profile, "records", current, "completed", RecordState.INVISIBLE, resolver
+        )
+
+    collectibles = collectible_rows(collectibles_component)
+    if collectibles:
+        written["collectibles"], current = _sync_states(
+            profile,
+            CollectibleState,
+            "collectible_hash",
+            "DestinyCollectibleDefinition",
+            collectibles,
+            resolver,
+        )
+        written["nodes"] += _sync_nodes(
+            profile,
+            "collectibles",
+            current,
+            "acquired",
+            CollectibleState.INVISIBLE,
+            resolver,
+        )
+    return written
@@ -5,6 +5,7 @@ from django.db.models import Count
 
 from .models import Challenge
 from .models import Checkpoint
+from .models import CheckpointFunnel
 from .models import CheckpointResult
 from .models import Run
 
@@ -86,3 +87,12 @@ class CheckpointResultAdmin(admin.ModelAdmin):
     list_select_related = ["run__highest_checkpoint", "checkpoint"]
     search_fields = ["run__seed_number"]
     readonly_fields = ["timestamp"]
+
+
+@admin.register(CheckpointFunnel)
+class CheckpointFunnelAdmin(admin.ModelAdmin):
+    list_display = ["checkpoint", "challenge", "entered", "survived"]
+    list_filter = ["challenge"]
+    list_select_related = ["checkpoint", "challenge"]
+    ordering = ["challenge", "checkpoint__order"]
+    readonly_fields = ["challenge", "checkpoint", "entered", "survived"]
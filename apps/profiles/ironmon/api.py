@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from collections import Counter
 from datetime import datetime
 
-from django.db.models import Count
+from django.db import transaction
+from ninja import Field
 from ninja import Router
 from ninja import Schema
 from ninja import Status
@@ -10,6 +12,12 @@ from ninja.pagination import paginate
 
 from config.auth import ApiKeyAuth
 
+from . import funnel
+from .events import MAX_BATCH
+from .events import EventResult
+from .events import IronMONEvent
+from .events import apply_events
+from .events import defeated_by
 from .models import Challenge
 from .models import Checkpoint
 from .models import CheckpointResult
@@ -46,6 +54,23 @@ class RunSchema(Schema):
     defeated_by: dict | None
     started_at: datetime
 
+    @staticmethod
+    def resolve_challenge(obj) -> str:
+        return obj.challenge.name
+
+    @staticmethod
+    def resolve_highest_checkpoint(obj) -> str | None:
+        return obj.highest_checkpoint.name if obj.highest_checkpoint else None
+
+    @staticmethod
+    def resolve_highest_checkpoint_order(obj) -> int | None:
+        return obj.highest_checkpoint.order if obj.highest_checkpoint else None
+
+
+class RunPageSchema(Schema):
+    items: list[RunSchema]
+    next_before: int | None
+
 
 # Helpers
 def _resolve_challenge(slug: str | None) -> Challenge | None:
@@ -58,42 +83,39 @@ def _resolve_challenge(slug: str | None) -> Challenge | None:
     return Challenge.objects.first()
 
 
-def _compute_checkpoint_stats(
-    challenge: Challenge, total_runs: int
-) -> list[CheckpointStatSchema]:
-    """Compute entered/survived/survival_rate for all checkpoints in one query.
+def _checkpoint_stats(challenge: Challenge) -> list[CheckpointStatSchema]:
+    """entered/survived/survival_rate per checkpoint, read from CheckpointFunnel.
 
-    "entered" = runs that entered this stage (survived the previous checkpoint,
-    or all runs for the first checkpoint).
-    "survived" = runs that have a result for this checkpoint (existence = cleared).
+    One query: checkpoints LEFT JOIN their funnel counters (a checkpoint with
+    no counters yet reads as zero).
     """
-    checkpoints = (
-        Checkpoint.objects.filter(challenge=challenge)
-        .annotate(survived=Count("results"))
-        .order_by("order")
-    )
     stats = []
-    prev_survived = total_runs
-    for cp in checkpoints:
-        entered = prev_survived
+    for cp in Checkpoint.objects.filter(challenge=challenge).select_related("funnel").order_by("order"):
+        counters = getattr(cp, "funnel", None)
+        entered = counters.entered if counters else 0
+        survived = counters.survived if counters else 0
         stats.append(
             CheckpointStatSchema(
                 order=cp.order,
                 name=cp.name,
                 trainer=cp.trainer,
                 entered=entered,
-                survived=cp.survived,
-                survival_rate=cp.survived / entered if entered > 0 else 0,
+                survived=survived,
+                survival_rate=survived / entered if entered > 0 else 0,
             )
         )
-        prev_survived = cp.survived
     return stats
 
 
 # Endpoints
 @router.get("/ironmon/stats", response={200: IronMONStatsSchema, 404: dict})
 def get_stats(request, challenge: str | None = None):
-    """Aggregate stats: total seeds, victories, clear rates per checkpoint."""
+    """Aggregate stats: total seeds, victories, clear rates per checkpoint.
+
+    Run totals come from the same funnel counters as the checkpoints: every
+    run enters the first checkpoint, a run has results once it clears it, and
+    a victory is clearing the last one (the Champion).
+    """
     ch = _resolve_challenge(challenge)
 
     if not ch:
@@ -108,42 +130,60 @@ def get_stats(request, challenge: str | None = None):
             checkpoints=[],
         )
 
-    runs = Run.objects.filter(challenge=ch)
-    total_runs = runs.count()
-    victories = runs.filter(is_victory=True).count()
-    runs_with_results = runs.filter(highest_checkpoint__isnull=False).count()
+    checkpoints = _checkpoint_stats(ch)
+    total_runs = checkpoints[0].entered if checkpoints else 0
+    victories = checkpoints[-1].survived if checkpoints else 0
 
     return IronMONStatsSchema(
         challenge=ch.name,
         total_runs=total_runs,
         victories=victories,
         victory_rate=victories / total_runs if total_runs > 0 else 0,
-        runs_with_results=runs_with_results,
-        checkpoints=_compute_checkpoint_stats(ch, total_runs),
+        runs_with_results=checkpoints[0].survived if checkpoints else 0,
+        checkpoints=checkpoints,
     )
 
 
+def _runs_qs(challenge: str | None):
+    runs = Run.objects.select_related("challenge", "highest_checkpoint")
+    if challenge:
+        runs = runs.filter(challenge__slug=challenge)
+    return runs
+
+
 @router.get("/ironmon/runs", response=list[RunSchema])
 @paginate
 def list_runs(request, challenge: str | None = None):
-    """Recent runs with highest checkpoint reached."""
-    runs = Run.objects.select_related("challenge", "highest_checkpoint")
+    """Recent runs with highest checkpoint reached.
 
-    if challenge:
-        runs = runs.filter(challenge__slug=challenge)
+    Returns the queryset so the paginator slices it in SQL.
+    """
+    return _runs_qs(challenge).order_by("-seed_number")
 
-    return [
-        RunSchema(
-            seed_number=run.seed_number,
-            challenge=run.challenge.name,
-            highest_checkpoint=run.highest_checkpoint.name if run.highest_checkpoint else None,
-            highest_checkpoint_order=run.highest_checkpoint.order if run.highest_checkpoint else None,
-            is_victory=run.is_victory,
-            defeated_by=run.defeated_by,
-            started_at=run.started_at,
-        )
-        for run in runs
-    ]
+
+@router.get("/ironmon/runs/latest", response=RunPageSchema)
+def latest_runs(
+    request,
+    challenge: str | None = None,
+    before: int | None = None,
+    limit: int = 20,
+):
+    """Newest runs first, keyset-paginated on seed_number.
+
+    Pass the previous page's `next_before` as `before` to continue; cost stays
+    flat however many seeds exist (no OFFSET, no COUNT).
+    """
+    limit = max(1, min(limit, 100))
+    runs = _runs_qs(challenge)
+    if before is not None:
+        runs = runs.filter(seed_number__lt=before)
+    items = list(runs.order_by("-seed_number")[: limit + 1])
+    has_more = len(items) > limit
+    items = items[:limit]
+    return RunPageSchema(
+        items=items,
+        next_before=items[-1].seed_number if has_more else None,
+    )
 
 
 @router.get("/ironmon/checkpoints/stats", response={200: list[CheckpointStatSchema], 404: dict})
@@ -156,8 +196,7 @@ def checkpoint_stats(request, challenge: str | None = None):
             return Status(404, {"detail": f"Challenge '{challenge}' not found"})
         return []
 
-    total_runs = Run.objects.filter(challenge=ch).count()
-    return _compute_checkpoint_stats(ch, total_runs)
+    return _checkpoint_stats(ch)
 
 
 # --- Read endpoint for challenge details ---
@@ -221,10 +260,13 @@ def create_run(request, payload: CreateRunSchema):
         ch = Challenge.objects.get(slug=payload.challenge_slug)
     except Challenge.DoesNotExist:
         return Status(404, {"detail": f"Challenge '{payload.challenge_slug}' not found"})
-    run, created = Run.objects.get_or_create(
-        seed_number=payload.seed_number,
-        defaults={"challenge": ch},
-    )
+    with transaction.atomic():
+        run, created = Run.objects.get_or_create(
+            seed_number=payload.seed_number,
+            defaults={"challenge": ch},
+        )
+        if created:
+            funnel.run_started(ch)
     return RunResponseSchema(
         seed_number=run.seed_number,
         challenge=ch.name,
@@ -263,15 +305,18 @@ def record_checkpoint(request, seed_number: int, payload: RecordCheckpointSchema
         )
     except Checkpoint.DoesNotExist:
         return Status(404, {"detail": f"Checkpoint '{payload.checkpoint_name}' not found"})
-    _, created = CheckpointResult.objects.get_or_create(
-        run=run,
-        checkpoint=checkpoint,
-    )
+    with transaction.atomic():
+        _, created = CheckpointResult.objects.get_or_create(
+            run=run,
+            checkpoint=checkpoint,
+        )
+        if created:
+            funnel.checkpoint_cleared(checkpoint)
 
-    # Update denormalized highest_checkpoint if this one is further
-    if run.highest_checkpoint is None or checkpoint.order > run.highest_checkpoint.order:
-        run.highest_checkpoint = checkpoint
-        run.save(update_fields=["highest_checkpoint"])
+        # Update denormalized highest_checkpoint if this one is further
+        if run.highest_checkpoint is None or checkpoint.order > run.highest_checkpoint.order:
+            run.highest_checkpoint = checkpoint
+            run.save(update_fields=["highest_checkpoint"])
 
     return CheckpointResultResponseSchema(
         seed_number=run.seed_number,
@@ -311,15 +356,7 @@ def record_defeat(request, seed_number: int, payload: RecordDefeatSchema):
             recorded=False,
         )
 
-    defeated_by = {"pokemon": payload.pokemon, "is_wild": payload.is_wild}
-    if payload.pokemon_id is not None:
-        defeated_by["pokemon_id"] = payload.pokemon_id
-    if payload.level is not None:
-        defeated_by["level"] = payload.level
-    if payload.trainer is not None:
-        defeated_by["trainer"] = payload.trainer
-
-    run.defeated_by = defeated_by
+    run.defeated_by = defeated_by(payload)
     run.save(update_fields=["defeated_by"])
 
     return DefeatResponseSchema(
@@ -327,3 +364,33 @@ def record_defeat(request, seed_number: int, payload: RecordDefeatSchema):
         defeated_by=run.defeated_by,
         recorded=True,
     )
+
+
+class EventBatchSchema(Schema):
+    events: list[IronMONEvent] = Field(..., max_length=MAX_BATCH)
+
+
+class EventBatchResponseSchema(Schema):
+    applied: int
+    duplicates: int
+    errors: int
+    results: list[EventResult]
+
+
+@router.post("/ironmon/events", response=EventBatchResponseSchema, auth=ApiKeyAuth())
+def ingest_events(request, payload: EventBatchSchema):
+    """Apply an ordered batch of seed / checkpoint / defeat events.
+
+    One transaction for the whole batch, idempotent per (seed, event), so
+    Synthform can replay a buffered backlog after a disconnect. Events that
+    can't apply (unknown challenge, run or checkpoint) come back as errors
+    without failing the rest.
+    """
+    results = apply_events(payload.events)
+    statuses = Counter(r.status for r in results)
+    return EventBatchResponseSchema(
+        applied=statuses["applied"],
+        duplicates=statuses["duplicate"],
+        errors=statuses["error"],
+        results=results,
+    )
@@ -0,0 +1,210 @@
+"""Batched IronMON event ingestion.
+
+Synthform relays a run as a stream of events — a seed starting, checkpoints
+cleared, the defeat that ended it. `apply_events` takes an ordered batch of
+them and applies it in one transaction with a fixed number of queries:
+challenges, checkpoints, runs and existing results are each read once, new
+rows are bulk-inserted, and funnel counters are bumped once per checkpoint.
+
+Every event is idempotent on (seed, event): a seed that already exists, a
+checkpoint already cleared, or a second defeat is reported as a duplicate and
+changes nothing, so a buffered backlog can be replayed safely.
+
+Two batches for the same seed can race: both read before either inserts, and
+the loser's insert hits the unique constraint. That batch is rolled back and
+retried once; the retry reads the winner's rows and reports them as duplicates.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from functools import partial
+from typing import Annotated
+from typing import Literal
+
+from django.db import IntegrityError
+from django.db import transaction
+from ninja import Field
+from ninja import Schema
+
+from . import funnel
+from .models import Challenge
+from .models import Checkpoint
+from .models import CheckpointResult
+from .models import Run
+
+MAX_BATCH = 1000
+
+
+class SeedEvent(Schema):
+    type: Literal["seed"]
+    seed_number: int
+    challenge_slug: str
+
+
+class CheckpointEvent(Schema):
+    type: Literal["checkpoint"]
+    seed_number: int
+    checkpoint_name: str
+
+
+class DefeatEvent(Schema):
+    type: Literal["defeat"]
+    seed_number: int
+    pokemon: str
+    pokemon_id: int | None = None
+    level: int | None = None
+    trainer: str | None = None
+    is_wild: bool = False
+
+
+IronMONEvent = Annotated[
+    SeedEvent | CheckpointEvent | DefeatEvent, Field(discriminator="type")
+]
+
+
+class EventResult(Schema):
+    index: int
+    type: str
+    seed_number: int
+    status: Literal["applied", "duplicate", "error"]
+    detail: str | None = None
+
+
+def defeated_by(event) -> dict:
+    """The stored `Run.defeated_by` for a defeat payload (unset fields omitted)."""
+    data = {"pokemon": event.pokemon, "is_wild": event.is_wild}
+    for field in ("pokemon_id", "level", "trainer"):
+        value = getattr(event, field)
+        if value is not None:
+            data[field] = value
+    return data
+
+
+def _result(index: int, event, status: str, detail: str | None = None) -> EventResult:
+    return EventResult(
+        index=index,
+        type=event.type,
+        seed_number=event.seed_number,
+        status=status,
+        detail=detail,
+    )
+
+
+def apply_events(events: list) -> list[EventResult]:
+    """Apply an ordered batch of events; returns one result per event."""
+    try:
+        return _apply_events(events)
+    except IntegrityError:
+        # A concurrent batch inserted one of our seeds or checkpoint results.
+        return _apply_events(events)
+
+
+@transaction.atomic
+def _apply_events(events: list) -> list[EventResult]:
+    seeds = {e.seed_number for e in events}
+    runs = {
+        run.seed_number: run
+        for run in Run.objects.select_for_update(of=("self",))
+        .select_related("highest_checkpoint")
+        .filter(seed_number__in=seeds)
+    }
+    challenges = {
+        ch.slug: ch
+        for ch in Challenge.objects.filter(
+            slug__in={e.challenge_slug for e in events if e.type == "seed"}
+        )
+    }
+    challenge_ids = {ch.pk for ch in challenges.values()} | {
+        r.challenge_id for r in runs.values()
+    }
+    by_challenge: dict[int, list[Checkpoint]] = {}
+    for cp in Checkpoint.objects.filter(challenge_id__in=challenge_ids).order_by(
+        "order"
+    ):
+        by_challenge.setdefault(cp.challenge_id, []).append(cp)
+    checkpoints = {
+        (cp.challenge_id, cp.name): cp for cps in by_challenge.values() for cp in cps
+    }
+    following = {
+        cps[i].pk: cps[i + 1]
+        for cps in by_challenge.values()
+        for i in range(len(cps) - 1)
+    }
+    cleared = set(
+        CheckpointResult.objects.filter(run__seed_number__in=seeds).values_list(
+            "run_id", "checkpoint_id"
+        )
+    )
+
+    new_runs: list[Run] = []
+    new_results: list[CheckpointResult] = []
+    dirty: set[int] = set()
+    increments: Counter = Counter()
+    results = []
+
+    for index, event in enumerate(events):
+        result = partial(_result, index, event)
+        run = runs.get(event.seed_number)
+        if event.type == "seed":
+            if run is not None:
+                results.append(result("duplicate"))
+                continue
+            ch = challenges.get(event.challenge_slug)
+            if ch is None:
+                results.append(
+                    result("error", f"Challenge '{event.challenge_slug}' not found")
+                )
+                continue
+            run = Run(seed_number=event.seed_number, challenge=ch)
+            runs[run.seed_number] = run
+            new_runs.append(run)
+            cps = by_challenge.get(ch.pk)
+            if cps:
+                increments[(cps[0].pk, ch.pk, "entered")] += 1
+            results.append(result("applied"))
+            continue
+
+        if run is None:
+            results.append(result("error", f"Run {event.seed_number} not found"))
+            continue
+
+        if event.type == "checkpoint":
+            cp = checkpoints.get((run.challenge_id, event.checkpoint_name))
+            if cp is None:
+                results.append(
+                    result("error", f"Checkpoint '{event.checkpoint_name}' not found")
+                )
+                continue
+            if (run.pk, cp.pk) in cleared:
+                results.append(result("duplicate"))
+                continue
+            cleared.add((run.pk, cp.pk))
+            new_results.append(CheckpointResult(run=run, checkpoint=cp))
+            increments[(cp.pk, run.challenge_id, "survived")] += 1
+            if cp.pk in following:
+                increments[(following[cp.pk].pk, run.challenge_id, "entered")] += 1
+            if (
+                run.highest_checkpoint is None
+                or cp.order > run.highest_checkpoint.order
+            ):
+                run.highest_checkpoint = cp
+                dirty.add(run.pk)
+            results.append(result("applied"))
+        else:
+            if run.defeated_by is not None:
+                results.append(result("duplicate"))
+                continue
+            run.defeated_by = defeated_by(event)
+            dirty.add(run.pk)
+            results.append(result("applied"))
+
+    Run.objects.bulk_create(new_runs)
+    CheckpointResult.objects.bulk_create(new_results)
+    # Runs created in this batch were inserted with their final values.
+    dirty -= {run.pk for run in new_runs}
+    Run.objects.bulk_update(
+        [runs[pk] for pk in sorted(dirty)], ["highest_checkpoint", "defeated_by"]
+    )
+    funnel.apply_increments(increments)
+    return results
@@ -0,0 +1,90 @@
+"""Incremental maintenance of CheckpointFunnel counters.
+
+Writes bump counters with F() expressions so concurrent requests never lose
+an increment; reads of the checkpoint stats become one small query instead of
+counting every CheckpointResult. `rebuild_funnel` recomputes the table from
+raw results (after imports, or if counters ever drift).
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+
+from .models import Challenge
+from .models import Checkpoint
+from .models import CheckpointFunnel
+
+
+def _bump(checkpoint_id: int, challenge_id: int, field: str, by: int = 1) -> None:
+    increment = {field: F(field) + by}
+    if CheckpointFunnel.objects.filter(checkpoint_id=checkpoint_id).update(**increment):
+        return
+    _, created = CheckpointFunnel.objects.get_or_create(
+        checkpoint_id=checkpoint_id,
+        defaults={"challenge_id": challenge_id, field: by},
+    )
+    if not created:
+        CheckpointFunnel.objects.filter(checkpoint_id=checkpoint_id).update(**increment)
+
+
+def run_started(challenge: Challenge) -> None:
+    """A new run enters the challenge's first checkpoint."""
+    first = (
+        Checkpoint.objects.filter(challenge=challenge)
+        .order_by("order")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if first is not None:
+        _bump(first, challenge.pk, "entered")
+
+
+def checkpoint_cleared(checkpoint: Checkpoint) -> None:
+    """A run survived `checkpoint`, and so entered the one after it."""
+    _bump(checkpoint.pk, checkpoint.challenge_id, "survived")
+    following = (
+        Checkpoint.objects.filter(
+            challenge_id=checkpoint.challenge_id, order__gt=checkpoint.order
+        )
+        .order_by("order")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if following is not None:
+        _bump(following, checkpoint.challenge_id, "entered")
+
+
+def apply_increments(increments: dict[tuple[int, int, str], int]) -> None:
+    """Apply batched bumps keyed by (checkpoint_id, challenge_id, field)."""
+    for (checkpoint_id, challenge_id, field), by in sorted(increments.items()):
+        if by:
+            _bump(checkpoint_id, challenge_id, field, by)
+
+
+@transaction.atomic
+def rebuild_funnel(challenges=None) -> int:
+    """Recompute funnel rows from runs and results; returns rows written."""
+    rows = []
+    for challenge in challenges if challenges is not None else Challenge.objects.all():
+        entered = challenge.runs.count()
+        for checkpoint in challenge.checkpoints.annotate(
+            cleared=Count("results")
+        ).order_by("order"):
+            rows.append(
+                CheckpointFunnel(
+                    challenge=challenge,
+                    checkpoint=checkpoint,
+                    entered=entered,
+                    survived=checkpoint.cleared,
+                )
+            )
+            entered = checkpoint.cleared
+    CheckpointFunnel.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["checkpoint"],
+        update_fields=["challenge", "entered", "survived"],
+    )
+    return len(rows)
@@ -0,0 +1,67 @@
+"""consume_ironmon_events — apply Synthform's live IronMON stream.
+
+Long-running: reads the IRONMON_STREAM consumer group, applies each batch in
+one transaction and acks it (see `apps.profiles.ironmon.stream`). Stops
+cleanly on SIGTERM/SIGINT after the batch in hand; restarting resumes from the
+group's last delivered ID, replaying anything left unacked.
+
+    uv run python manage.py consume_ironmon_events
+"""
+
+from __future__ import annotations
+
+import signal
+import socket
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.profiles.ironmon.stream import StreamConsumer
+
+
+class Command(BaseCommand):
+    help = "Consume live IronMON events from the Synthform Redis stream"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumer", default=socket.gethostname())
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--block-ms", type=int, default=1000)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="apply pending and currently available events, then exit",
+        )
+
+    def handle(self, *args, **options):
+        consumer = StreamConsumer(
+            redis.from_url(settings.IRONMON_REDIS_URL, decode_responses=True),
+            stream=settings.IRONMON_STREAM,
+            group=settings.IRONMON_STREAM_GROUP,
+            consumer=options["consumer"],
+            batch_size=options["batch_size"],
+            block_ms=options["block_ms"],
+        )
+
+        stopping = False
+        reads = 0
+
+        def stop() -> bool:
+            nonlocal reads
+            reads += 1
+            return stopping or (options["once"] and reads > 1)
+
+        def request_stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(
+            f"Consuming {settings.IRONMON_STREAM} as {settings.IRONMON_STREAM_GROUP}/{options['consumer']}"
+        )
+        applied = consumer.run(stop)
+        self.stdout.write(
+            self.style.SUCCESS(f"Stopped; {applied} IronMON events applied")
+        )
@@ -0,0 +1,34 @@
+"""rebuild_checkpoint_funnel — recompute CheckpointFunnel from raw results.
+
+The write endpoints keep the funnel current incrementally; run this after a
+bulk import (data/import_ironmon.py) or if the counters ever drift. Idempotent.
+"""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.profiles.ironmon.funnel import rebuild_funnel
+from apps.profiles.ironmon.models import Challenge
+
+
+class Command(BaseCommand):
+    help = "Rebuild IronMON checkpoint funnel counters from runs and results"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--challenge", type=str, default=None, help="challenge slug"
+        )
+
+    def handle(self, *args, **options):
+        challenges = Challenge.objects.all()
+        if options["challenge"]:
+            challenges = challenges.filter(slug=options["challenge"])
+            if not challenges.exists():
+                raise CommandError(f"Challenge '{options['challenge']}' not found")
+
+        written = rebuild_funnel(challenges)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} checkpoint funnel rows")
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_funnel(apps, schema_editor):
+    """Seed the funnel from existing runs and results."""
+    Challenge = apps.get_model("ironmon", "Challenge")
+    CheckpointFunnel = apps.get_model("ironmon", "CheckpointFunnel")
+    db = schema_editor.connection.alias
+
+    rows = []
+    for challenge in Challenge.objects.using(db).annotate(run_count=Count("runs")):
+        entered = challenge.run_count
+        for checkpoint in challenge.checkpoints.annotate(cleared=Count("results")).order_by("order"):
+            rows.append(
+                CheckpointFunnel(
+                    challenge_id=challenge.pk,
+                    checkpoint_id=checkpoint.pk,
+                    entered=entered,
+                    survived=checkpoint.cleared,
+                )
+            )
+            entered = checkpoint.cleared
+    CheckpointFunnel.objects.using(db).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ironmon', '0003_run_defeated_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointFunnel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entered', models.IntegerField(default=0)),
+                ('survived', models.IntegerField(default=0)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funnel', to='ironmon.challenge')),
+                ('checkpoint', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='funnel', to='ironmon.checkpoint')),
+            ],
+        ),
+        migrations.RunPython(backfill_funnel, migrations.RunPython.noop),
+    ]
@@ -90,3 +90,31 @@ class CheckpointResult(models.Model):
 
     def __str__(self):
         return self.checkpoint.name
+
+
+class CheckpointFunnel(models.Model):
+    """Running entered/survived counters per checkpoint — the 'wall' chart.
+
+    One row per checkpoint; `challenge` is denormalized so a challenge's whole
+    funnel reads without a join.
+
+    "entered" = runs that reached this checkpoint (every run, for the first
+    one); "survived" = runs that cleared it. Kept current by the write
+    endpoints; `rebuild_checkpoint_funnel` recomputes it from raw results.
+    """
+
+    challenge = models.ForeignKey(
+        Challenge,
+        on_delete=models.CASCADE,
+        related_name="funnel",
+    )
+    checkpoint = models.OneToOneField(
+        Checkpoint,
+        on_delete=models.CASCADE,
+        related_name="funnel",
+    )
+    entered = models.IntegerField(default=0)
+    survived = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.checkpoint}: {self.survived}/{self.entered}"
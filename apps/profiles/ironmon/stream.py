@@ -0,0 +1,150 @@
+"""Redis Streams consumer for live IronMON events.
+
+Synthform appends each event to a stream on synthcore Redis (`XADD`), one
+entry per event with the event JSON in its `data` field:
+
+    XADD events:synthform:ironmon * data '{"type": "checkpoint", "seed_number": 4021, "checkpoint_name": "Brock"}'
+
+`StreamConsumer` reads them through a consumer group (`XREADGROUP`), applies
+each batch with `apply_events` (one transaction), and only then `XACK`s the
+batch. The group remembers the last delivered ID, and entries read but not
+acknowledged stay pending, so on start the consumer first re-reads its own
+pending entries — a crash between commit and ack just replays a batch, which
+`apply_events` treats as duplicates. Malformed entries are logged and acked
+so they can't wedge the stream.
+
+If a batch hits a database error (an integrity conflict, a value out of
+column range), its events are retried one at a time; any that still fail are
+copied to a dead-letter stream (`<stream>:dead`) with the error and acked, so
+one bad event neither stops the consumer nor blocks the rest of its batch.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+import redis
+from django.db import DatabaseError
+from django.db import close_old_connections
+from pydantic import TypeAdapter
+from pydantic import ValidationError
+
+from config.redis import publish_event_sync
+
+from .events import IronMONEvent
+from .events import apply_events
+
+logger = logging.getLogger(__name__)
+
+event_adapter: TypeAdapter = TypeAdapter(IronMONEvent)
+
+
+class StreamConsumer:
+    """One consumer in a group; expects a client with `decode_responses=True`."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str,
+        group: str,
+        consumer: str,
+        batch_size: int = 100,
+        block_ms: int = 1000,
+    ):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+
+    def ensure_group(self) -> None:
+        """Create the consumer group (and stream) if missing; new groups start at the beginning."""
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def read(self, pending: bool) -> list[tuple[str, dict]]:
+        """Next batch: this consumer's unacked entries, or new ones (blocking)."""
+        response = self.client.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: "0" if pending else ">"},
+            count=self.batch_size,
+            block=None if pending else self.block_ms,
+        )
+        return [entry for _, entries in response or [] for entry in entries]
+
+    def process(self, entries: list[tuple[str, dict]]) -> int:
+        """Apply a batch of entries and ack them; returns events applied."""
+        if not entries:
+            return 0
+        # Long-lived process: drop connections that timed out between batches.
+        close_old_connections()
+        batch = []
+        for entry_id, fields in entries:
+            try:
+                event = event_adapter.validate_json((fields or {})["data"])
+            except (KeyError, ValidationError) as exc:
+                logger.warning("Skipping malformed IronMON event %s: %s", entry_id, exc)
+                continue
+            batch.append((entry_id, fields, event))
+        events = [event for _, _, event in batch]
+
+        applied = 0
+        if batch:
+            results = self.apply(batch)
+            applied = sum(r.status == "applied" for r in results)
+            for r in results:
+                if r.status == "error":
+                    logger.warning(
+                        "IronMON event for seed %s failed: %s", r.seed_number, r.detail
+                    )
+        self.client.xack(
+            self.stream, self.group, *(entry_id for entry_id, _ in entries)
+        )
+
+        if applied:
+            publish_event_sync(
+                "ironmon",
+                "ironmon:events_applied",
+                {"applied": applied, "seeds": sorted({e.seed_number for e in events})},
+            )
+        return applied
+
+    def apply(self, batch: list[tuple[str, dict, object]]) -> list:
+        """`apply_events` for a batch, falling back to one event at a time on a DB error."""
+        try:
+            return apply_events([event for _, _, event in batch])
+        except DatabaseError:
+            logger.exception(
+                "IronMON batch of %d failed; applying events singly", len(batch)
+            )
+        results = []
+        for entry_id, fields, event in batch:
+            try:
+                results.extend(apply_events([event]))
+            except DatabaseError as exc:
+                logger.exception("IronMON event %s failed; dead-lettering it", entry_id)
+                self.dead_letter(entry_id, fields, exc)
+        return results
+
+    def dead_letter(self, entry_id: str, fields: dict, exc: Exception) -> None:
+        """Park an entry that can't be applied on `<stream>:dead` for inspection."""
+        self.client.xadd(
+            f"{self.stream}:dead",
+            {"data": fields["data"], "entry_id": entry_id, "error": str(exc)},
+        )
+
+    def run(self, stop: Callable[[], bool] = lambda: False) -> int:
+        """Drain pending entries, then consume new ones until `stop()`."""
+        self.ensure_group()
+        applied = 0
+        while entries := self.read(pending=True):
+            applied += self.process(entries)
+        while not stop():
+            applied += self.process(self.read(pending=False))
+        return applied
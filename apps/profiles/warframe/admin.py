@@ -4,10 +4,14 @@ from django.contrib import admin
 
 from .models import Affiliation
 from .models import CatalogItem
+from .models import CatalogSource
+from .models import ItemMastery
 from .models import MissionStat
 from .models import Profile
+from .models import Session
 from .models import Snapshot
 from .models import WeaponStat
+from .models import WeaponStatDelta
 
 
 @admin.register(Profile)
@@ -51,6 +55,16 @@ class WeaponStatAdmin(admin.ModelAdmin):
     list_per_page = 50
 
 
+@admin.register(WeaponStatDelta)
+class WeaponStatDeltaAdmin(admin.ModelAdmin):
+    list_display = ["weapon_path", "captured_at", "kills", "fired", "equip_time_seconds", "xp"]
+    search_fields = ["weapon_path"]
+    readonly_fields = ["id"]
+    date_hierarchy = "captured_at"
+    list_select_related = ["profile"]
+    list_per_page = 50
+
+
 @admin.register(MissionStat)
 class MissionStatAdmin(admin.ModelAdmin):
     list_display = ["node_tag", "completes", "profile"]
@@ -89,11 +103,29 @@ class SnapshotAdmin(admin.ModelAdmin):
         "pickup_count",
         "total_weapon_kills",
         "weapons_tracked",
+        "keyframe",
+        "content_hash",
     ]
     date_hierarchy = "captured_at"
     list_select_related = ["profile"]
 
 
+@admin.register(Session)
+class SessionAdmin(admin.ModelAdmin):
+    list_display = [
+        "ended_at",
+        "time_played_seconds",
+        "kills",
+        "missions_completed",
+        "mastery_rank_gained",
+        "standing_gained",
+        "profile",
+    ]
+    readonly_fields = ["id", "snapshot", "created_at"]
+    date_hierarchy = "ended_at"
+    list_select_related = ["profile"]
+
+
 @admin.register(CatalogItem)
 class CatalogItemAdmin(admin.ModelAdmin):
     list_display = ["name", "category", "mastery_req", "is_prime", "masterable"]
@@ -101,3 +133,20 @@ class CatalogItemAdmin(admin.ModelAdmin):
     search_fields = ["name", "unique_name"]
     readonly_fields = ["id", "unique_name", "created_at", "updated_at"]
     list_per_page = 50
+
+
+@admin.register(CatalogSource)
+class CatalogSourceAdmin(admin.ModelAdmin):
+    list_display = ["category", "item_count", "last_fetched", "last_changed", "etag"]
+    readonly_fields = ["id", "created_at", "updated_at"]
+
+
+@admin.register(ItemMastery)
+class ItemMasteryAdmin(admin.ModelAdmin):
+    list_display = ["item_id", "xp", "mastered", "progress", "profile"]
+    list_filter = ["mastered"]
+    search_fields = ["item__unique_name"]
+    readonly_fields = ["id", "created_at", "updated_at"]
+    raw_id_fields = ["item"]
+    list_select_related = ["profile"]
+    list_per_page = 50
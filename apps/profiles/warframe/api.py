@@ -1,21 +1,43 @@
 from __future__ import annotations
 
-from collections import defaultdict
+from datetime import date
 from datetime import datetime
+from datetime import timedelta
+from typing import Literal
 
+from django.core.cache import cache
 from django.db.models import Avg
+from django.db.models import Case
 from django.db.models import Count
+from django.db.models import ExpressionWrapper
+from django.db.models import FilteredRelation
+from django.db.models import IntegerField
+from django.db.models import Max
+from django.db.models import Q
 from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Coalesce
+from django.db.models.functions import NullIf
+from django.db.models.functions import Trunc
+from django.db.models.functions import TruncDate
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
 from ninja import Router
 from ninja import Schema
 from ninja import Status
 
+from .catalog_index import get_catalog_index
+from .mastery import DEFAULT_PER_RANK
+from .mastery import MASTERY_PER_RANK
 from .models import Affiliation
 from .models import CatalogItem
 from .models import MissionStat
 from .models import Profile
+from .models import Session
 from .models import Snapshot
 from .models import WeaponStat
+from .models import WeaponStatDelta
 
 router = Router(tags=["Warframe"])
 
@@ -65,6 +87,35 @@ class WeaponListSchema(Schema):
     weapons: list[WeaponSchema]
 
 
+class WeaponHistoryPointSchema(Schema):
+    date: date
+    fired: int
+    hits: int
+    kills: int
+    headshots: int
+    assists: int
+    equip_time_seconds: float
+    xp: int
+
+
+class WeaponHistorySchema(Schema):
+    weapon_path: str
+    weapon_name: str
+    days: int
+    points: list[WeaponHistoryPointSchema]
+
+
+class ImprovedWeaponSchema(Schema):
+    weapon_path: str
+    weapon_name: str
+    kills: int
+    fired: int
+    headshots: int
+    equip_time_seconds: float
+    xp: int
+    total_kills: int
+
+
 class MissionSchema(Schema):
     node_tag: str
     completes: int
@@ -137,6 +188,16 @@ SORT_FIELDS = {
 }
 
 
+DELTA_COUNTERS = ["fired", "hits", "kills", "headshots", "assists", "equip_time_seconds", "xp"]
+IMPROVED_FIELDS = {
+    "kills": "-kills",
+    "fired": "-fired",
+    "headshots": "-headshots",
+    "equip_time": "-equip_time_seconds",
+    "xp": "-xp",
+}
+
+
 # ---- Endpoints ----
 
 
@@ -207,6 +268,78 @@ def top_weapons(request, by: str = "kills", limit: int = 10):
     return [_weapon_schema(w) for w in WeaponStat.objects.order_by(order)[:limit]]
 
 
+@router.get("/warframe/weapons/improved", response=list[ImprovedWeaponSchema])
+def improved_weapons(request, by: str = "kills", days: int = 7, limit: int = 10):
+    """Weapons whose counters grew the most over the last `days` (default a week)."""
+    order = IMPROVED_FIELDS.get(by, "-kills")
+    days = max(1, min(days, 365))
+    limit = max(1, min(limit, 100))
+    since = timezone.now() - timedelta(days=days)
+
+    rows = list(
+        WeaponStatDelta.objects.filter(captured_at__gte=since)
+        .values("weapon_path")
+        .annotate(**{f: Sum(f) for f in DELTA_COUNTERS})
+        .order_by(order, "weapon_path")[:limit]
+    )
+    current = {
+        w.weapon_path: w
+        for w in WeaponStat.objects.filter(weapon_path__in=[r["weapon_path"] for r in rows])
+    }
+    return [
+        ImprovedWeaponSchema(
+            weapon_path=r["weapon_path"],
+            weapon_name=current[r["weapon_path"]].weapon_name if r["weapon_path"] in current else "",
+            kills=r["kills"],
+            fired=r["fired"],
+            headshots=r["headshots"],
+            equip_time_seconds=r["equip_time_seconds"],
+            xp=r["xp"],
+            total_kills=current[r["weapon_path"]].kills if r["weapon_path"] in current else 0,
+        )
+        for r in rows
+    ]
+
+
+@router.get(
+    "/warframe/weapons/{path:weapon_path}/history",
+    response={200: WeaponHistorySchema, 404: dict},
+)
+def weapon_history(request, weapon_path: str, days: int = 90):
+    """Daily counter gains for one weapon, oldest first.
+
+    `weapon_path` is the `/Lotus/...` asset path; the leading slash is optional.
+    Days without play are omitted.
+    """
+    weapon_path = "/" + weapon_path.lstrip("/")
+    weapon = WeaponStat.objects.filter(weapon_path=weapon_path).first()
+    if not weapon:
+        return Status(404, {"error": f"No weapon archived at {weapon_path}"})
+
+    days = max(1, min(days, 3650))
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        WeaponStatDelta.objects.filter(
+            profile_id=weapon.profile_id,
+            weapon_path=weapon_path,
+            captured_at__gte=since,
+        )
+        .annotate(day=TruncDate("captured_at"))
+        .values("day")
+        .annotate(**{f: Sum(f) for f in DELTA_COUNTERS})
+        .order_by("day")
+    )
+    return Status(200, WeaponHistorySchema(
+        weapon_path=weapon_path,
+        weapon_name=weapon.weapon_name,
+        days=days,
+        points=[
+            WeaponHistoryPointSchema(date=r.pop("day"), **r)
+            for r in rows
+        ],
+    ))
+
+
 @router.get("/warframe/missions", response=list[MissionSchema])
 def list_missions(request, limit: int = 200):
     """Per-node completion counts, most played first."""
@@ -344,21 +477,6 @@ def get_mastery(request, granularity: str = "changes"):
 
 # ---- Mastery completion ----
 
-# Affinity to reach a rank R = MULT * R^2. Weapons use 500, frames/companions 1000.
-MASTERY_MULT = {
-    "Warframes": 1000,
-    "Archwing": 1000,
-    "Sentinels": 1000,
-    "Pets": 1000,
-    "Primary": 500,
-    "Secondary": 500,
-    "Melee": 500,
-    "Arch-Gun": 500,
-    "Arch-Melee": 500,
-    "SentinelWeapons": 500,
-}
-DEFAULT_MULT = 500
-
 
 class CategoryCompletionSchema(Schema):
     category: str
@@ -374,93 +492,68 @@ class CompletionSchema(Schema):
     categories: list[CategoryCompletionSchema]
 
 
-def mastery_threshold(category: str, max_level_cap: int) -> int:
-    """Affinity needed to max an item (= reach mastery) for its category."""
-    mult = MASTERY_MULT.get(category, DEFAULT_MULT)
-    cap = max_level_cap or 30
-    return mult * cap * cap
-
+def _masterable_items(profile: Profile):
+    """Masterable catalog items LEFT JOINed to the profile's ItemMastery.
 
-def compute_completion(xp_by_path: dict, items) -> dict:
-    """Compute mastered-vs-total completion from per-item affinity.
-
-    `items` is an iterable of (unique_name, category, max_level_cap). An item
-    counts as mastered if its lifetime affinity meets the max-rank threshold.
-    Approximate: modular gear (Zaws/Kitguns/Amps) and a few sources aren't
-    represented as single catalog items, so true MR completion may run higher.
+    Annotates `is_mastered`, `xp` and `progress`, defaulting items the
+    profile has never touched to unmastered / 0.
     """
-    from collections import defaultdict
-
-    cat_total: dict[str, int] = defaultdict(int)
-    cat_mastered: dict[str, int] = defaultdict(int)
-
-    for unique_name, category, cap in items:
-        cat_total[category] += 1
-        if xp_by_path.get(unique_name, 0) >= mastery_threshold(category, cap):
-            cat_mastered[category] += 1
-
-    categories = []
-    total = mastered = 0
-    for cat in sorted(cat_total):
-        t, m = cat_total[cat], cat_mastered[cat]
-        total += t
-        mastered += m
-        categories.append(
-            {"category": cat, "mastered": m, "total": t, "pct": round(m / t * 100, 1) if t else 0.0}
+    return (
+        CatalogItem.objects.filter(masterable=True)
+        .annotate(
+            own=FilteredRelation("masteries", condition=Q(masteries__profile=profile)),
         )
-
-    return {
-        "total_masterable": total,
-        "total_mastered": mastered,
-        "completion_pct": round(mastered / total * 100, 1) if total else 0.0,
-        "categories": categories,
-    }
+        .annotate(
+            is_mastered=Coalesce("own__mastered", Value(False)),
+            xp=Coalesce("own__xp", Value(0)),
+            progress=Coalesce("own__progress", Value(0)),
+        )
+    )
 
 
 @router.get("/warframe/mastery/completion", response={200: CompletionSchema, 404: dict})
 def get_mastery_completion(request):
     """Mastery completion — items mastered vs total masterable, by category.
 
-    Reads per-item affinity from the profile's XPInfo and compares against the
-    WFCD catalog. Approximate (see compute_completion docstring).
+    One grouped query over the WFCD catalog joined to ItemMastery (refreshed
+    from XPInfo on each archive). Approximate: modular gear (Zaws/Kitguns/Amps)
+    and a few sources aren't single catalog items, so true MR completion may
+    run higher.
     """
     profile = Profile.objects.first()
     if not profile:
         return Status(404, {"error": "No Warframe profile archived"})
 
-    xp_list = (profile.profile_data or {}).get("LoadOutInventory", {}).get("XPInfo", []) or []
-    xp_by_path = {
-        e.get("ItemType"): int(e.get("XP", 0) or 0)
-        for e in xp_list
-        if e.get("ItemType")
-    }
-
-    items = CatalogItem.objects.filter(masterable=True).values_list(
-        "unique_name", "category", "max_level_cap"
+    rows = (
+        _masterable_items(profile)
+        .values("category")
+        .annotate(total=Count("id"), mastered=Count("id", filter=Q(is_mastered=True)))
+        .order_by("category")
     )
-    result = compute_completion(xp_by_path, items)
+    categories = [
+        CategoryCompletionSchema(
+            category=r["category"],
+            mastered=r["mastered"],
+            total=r["total"],
+            pct=round(r["mastered"] / r["total"] * 100, 1) if r["total"] else 0.0,
+        )
+        for r in rows
+    ]
+    total = sum(c.total for c in categories)
+    mastered = sum(c.mastered for c in categories)
     return Status(
         200,
         CompletionSchema(
-            total_masterable=result["total_masterable"],
-            total_mastered=result["total_mastered"],
-            completion_pct=result["completion_pct"],
-            categories=[CategoryCompletionSchema(**c) for c in result["categories"]],
+            total_masterable=total,
+            total_mastered=mastered,
+            completion_pct=round(mastered / total * 100, 1) if total else 0.0,
+            categories=categories,
         ),
     )
 
 
 # ---- Mastery remaining (the grind checklist) ----
 
-# Mastery points granted per rank: weapons 100, frames/companions 200.
-MASTERY_PER_RANK = {
-    "Warframes": 200,
-    "Archwing": 200,
-    "Sentinels": 200,
-    "Pets": 200,
-}
-DEFAULT_PER_RANK = 100
-
 
 class RemainingItemSchema(Schema):
     name: str
@@ -492,67 +585,14 @@ class RemainingSchema(Schema):
     items: list[RemainingItemSchema]
 
 
-def mastery_value(category: str, max_level_cap: int) -> int:
-    """MR points an item grants when maxed (per-rank * cap)."""
-    return MASTERY_PER_RANK.get(category, DEFAULT_PER_RANK) * (max_level_cap or 30)
-
-
-def compute_remaining(xp_by_path: dict, items, current_mr: int) -> list[dict]:
-    """Unmastered masterable items, ranked by mastery payoff (desc).
-
-    `items` is an iterable of
-    (unique_name, name, category, mastery_req, max_level_cap, is_prime,
-     vaulted, acquisition, tags, vault_date). An item is "remaining" if its
-     affinity is below the max-rank threshold. Each carries `owned` (any
-     affinity earned) and `mastery_progress` (percent toward max rank), so the
-     grind list can split not-owned from owned-but-still-leveling.
-    """
-    remaining = []
-    for (
-        unique_name, name, category, mastery_req, cap,
-        is_prime, vaulted, acquisition, tags, vault_date,
-    ) in items:
-        affinity = xp_by_path.get(unique_name, 0)
-        threshold = mastery_threshold(category, cap)
-        if affinity >= threshold:
-            continue
-        remaining.append(
-            {
-                "name": name,
-                "category": category,
-                "mastery_req": mastery_req,
-                "mastery_value": mastery_value(category, cap),
-                "is_prime": is_prime,
-                "vaulted": vaulted,
-                "equippable": mastery_req <= current_mr,
-                "acquisition": acquisition,
-                "tags": tags or [],
-                "vault_date": vault_date or "",
-                "owned": affinity > 0,
-                "mastery_progress": round(affinity / threshold * 100) if threshold else 0,
-            }
-        )
-    remaining.sort(key=lambda r: r["mastery_value"], reverse=True)
-    return remaining
-
-
-def summarize_by_acquisition(items) -> list[dict]:
-    """Group items by acquisition method, with counts and total MR payoff.
-
-    Ordered by mastery_points desc — the breakdown of where remaining mastery
-    is gated (Kuva Lich, Sister of Parvos, Baro, ...).
-    """
-    groups: dict[str, list[int]] = defaultdict(lambda: [0, 0])
-    for item in items:
-        bucket = groups[item["acquisition"] or "Unknown"]
-        bucket[0] += 1
-        bucket[1] += item["mastery_value"]
-    summary = [
-        {"acquisition": name, "count": count, "mastery_points": points}
-        for name, (count, points) in groups.items()
-    ]
-    summary.sort(key=lambda g: g["mastery_points"], reverse=True)
-    return summary
+def _mastery_value_expression():
+    """SQL mirror of `mastery_value`: per-rank points * level cap (0 reads as 30)."""
+    per_rank = Case(
+        *(When(category=category, then=Value(points)) for category, points in MASTERY_PER_RANK.items()),
+        default=Value(DEFAULT_PER_RANK),
+    )
+    cap = Coalesce(NullIf("max_level_cap", Value(0)), Value(30))
+    return ExpressionWrapper(per_rank * cap, output_field=IntegerField())
 
 
 @router.get("/warframe/mastery/remaining", response={200: RemainingSchema, 404: dict})
@@ -568,56 +608,77 @@ def get_mastery_remaining(
     """What's left to master, ranked by MR payoff — the grind checklist.
 
     Defaults to obtainable items (excludes vaulted, which can't be farmed now).
+    Totals and the by-acquisition breakdown cover every unmastered item in the
+    category/acquisition filter; the other flags only narrow `items`.
     """
     profile = Profile.objects.first()
     if not profile:
         return Status(404, {"error": "No Warframe profile archived"})
 
-    xp_list = (profile.profile_data or {}).get("LoadOutInventory", {}).get("XPInfo", []) or []
-    xp_by_path = {
-        e.get("ItemType"): int(e.get("XP", 0) or 0)
-        for e in xp_list
-        if e.get("ItemType")
-    }
-
-    qs = CatalogItem.objects.filter(masterable=True)
+    remaining = (
+        _masterable_items(profile)
+        .filter(is_mastered=False)
+        .annotate(mastery_value=_mastery_value_expression())
+    )
     if category:
-        qs = qs.filter(category=category)
+        remaining = remaining.filter(category=category)
     if acquisition:
-        qs = qs.filter(acquisition=acquisition)
-    items = qs.values_list(
-        "unique_name", "name", "category", "mastery_req",
-        "max_level_cap", "is_prime", "vaulted", "acquisition",
-        "tags", "vault_date",
+        remaining = remaining.filter(acquisition=acquisition)
+
+    obtainable = remaining.filter(vaulted=False)
+    obtainable_totals = obtainable.aggregate(count=Count("id"), points=Sum("mastery_value"))
+    by_acquisition = (
+        obtainable.values("acquisition")
+        .annotate(count=Count("id"), mastery_points=Sum("mastery_value"))
+        .order_by("-mastery_points", "acquisition")
     )
 
-    remaining = compute_remaining(xp_by_path, items, profile.mastery_rank)
-    total_remaining = len(remaining)
-    obtainable = [r for r in remaining if not r["vaulted"]]
-    total_obtainable = len(obtainable)
-    obtainable_points = sum(r["mastery_value"] for r in obtainable)
-    by_acquisition = summarize_by_acquisition(obtainable)
-
     shown = remaining
     if not include_vaulted:
-        shown = [r for r in shown if not r["vaulted"]]
+        shown = shown.filter(vaulted=False)
     if not include_primes:
-        shown = [r for r in shown if not r["is_prime"]]
+        shown = shown.filter(is_prime=False)
     if equippable_only:
-        shown = [r for r in shown if r["equippable"]]
+        shown = shown.filter(mastery_req__lte=profile.mastery_rank)
 
     limit = max(1, min(limit, 1000))
-    shown = shown[:limit]
+    items = shown.order_by("-mastery_value", "category", "name").values(
+        "name", "category", "mastery_req", "mastery_value", "is_prime",
+        "vaulted", "acquisition", "tags", "vault_date", "xp", "progress",
+    )[:limit]
 
     return Status(
         200,
         RemainingSchema(
             current_mastery_rank=profile.mastery_rank,
-            total_remaining=total_remaining,
-            total_obtainable=total_obtainable,
-            obtainable_mastery_points=obtainable_points,
-            by_acquisition=[AcquisitionGroupSchema(**g) for g in by_acquisition],
-            items=[RemainingItemSchema(**r) for r in shown],
+            total_remaining=remaining.count(),
+            total_obtainable=obtainable_totals["count"],
+            obtainable_mastery_points=obtainable_totals["points"] or 0,
+            by_acquisition=[
+                AcquisitionGroupSchema(
+                    acquisition=g["acquisition"] or "Unknown",
+                    count=g["count"],
+                    mastery_points=g["mastery_points"],
+                )
+                for g in by_acquisition
+            ],
+            items=[
+                RemainingItemSchema(
+                    name=r["name"],
+                    category=r["category"],
+                    mastery_req=r["mastery_req"],
+                    mastery_value=r["mastery_value"],
+                    is_prime=r["is_prime"],
+                    vaulted=r["vaulted"],
+                    equippable=r["mastery_req"] <= profile.mastery_rank,
+                    acquisition=r["acquisition"],
+                    tags=r["tags"] or [],
+                    vault_date=r["vault_date"] or "",
+                    owned=r["xp"] > 0,
+                    mastery_progress=r["progress"],
+                )
+                for r in items
+            ],
         ),
     )
 
@@ -640,35 +701,34 @@ class FrameSchema(Schema):
 def list_frames(request, limit: int = 20, prime_only: bool = False):
     """Most-used Warframes by equip time.
 
-    Joins WeaponStat to the WFCD catalog (category=Warframes) so only true
-    frames are returned — sentinels, pets, archwings, and exalted weapons are
+    Filters WeaponStat to the WFCD catalog's Warframes (via the in-process
+    catalog index) so only true frames are returned — sentinels, pets, archwings, and exalted weapons are
     excluded.
     """
     limit = max(1, min(limit, 200))
 
-    catalog_qs = CatalogItem.objects.filter(category="Warframes")
-    if prime_only:
-        catalog_qs = catalog_qs.filter(is_prime=True)
-    catalog = {c.unique_name: c for c in catalog_qs}
-
+    catalog = get_catalog_index()
     weapons = (
-        WeaponStat.objects.filter(weapon_path__in=catalog.keys())
+        WeaponStat.objects.filter(weapon_path__in=catalog.paths("Warframes", prime_only=prime_only))
         .order_by("-equip_time_seconds")[:limit]
     )
 
-    return [
-        FrameSchema(
-            name=catalog[w.weapon_path].name,
-            weapon_path=w.weapon_path,
-            image_name=catalog[w.weapon_path].image_name,
-            equip_time_seconds=w.equip_time_seconds,
-            equip_time_hours=round(w.equip_time_seconds / 3600, 1),
-            kills=w.kills,
-            is_prime=catalog[w.weapon_path].is_prime,
-            mastery_req=catalog[w.weapon_path].mastery_req,
+    frames = []
+    for w in weapons:
+        entry = catalog.get(w.weapon_path)
+        frames.append(
+            FrameSchema(
+                name=entry.name,
+                weapon_path=w.weapon_path,
+                image_name=entry.image_name,
+                equip_time_seconds=w.equip_time_seconds,
+                equip_time_hours=round(w.equip_time_seconds / 3600, 1),
+                kills=w.kills,
+                is_prime=entry.is_prime,
+                mastery_req=entry.mastery_req,
+            )
         )
-        for w in weapons
-    ]
+    return frames
 
 
 # ---- Progression (time series + velocity/projection) ----
@@ -702,68 +762,256 @@ class ProgressionSchema(Schema):
     series: list[ProgressionPointSchema]
 
 
-@router.get("/warframe/progression", response={200: ProgressionSchema, 404: dict})
-def get_progression(request):
-    """Full snapshot time series plus velocity/projection summary.
+PROGRESSION_FIELDS = (
+    "captured_at",
+    "mastery_rank",
+    "time_played_seconds",
+    "missions_completed",
+    "total_weapon_kills",
+    "weapons_tracked",
+)
+PROGRESSION_SUMMARY_CACHE_KEY = "warframe:progression:summary:{profile_id}"
 
-    The series is every snapshot oldest-first (cumulative lifetime values at
-    each point). The summary derives rates over the tracked window. Velocity
-    and projections are estimates — windowed from the first archived snapshot,
-    so they exclude play before tracking began.
+
+def lttb(rows: list[tuple], threshold: int, y: int) -> list[tuple]:
+    """Largest-Triangle-Three-Buckets downsampling of time-ordered rows.
+
+    Keeps the first and last rows and, from each of `threshold - 2` buckets in
+    between, the row forming the largest triangle with its neighbours on the
+    `y` column (x is the row's leading datetime). Preserves the series' shape
+    far better than picking every nth point.
     """
-    profile = Profile.objects.first()
-    if not profile:
-        return Status(404, {"error": "No Warframe profile archived"})
+    if threshold >= len(rows) or threshold < 3:
+        return rows
+
+    def point(row):
+        return row[0].timestamp(), float(row[y])
+
+    sampled = [rows[0]]
+    size = (len(rows) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * size) + 1
+        end = int((i + 1) * size) + 1
+        next_end = min(int((i + 2) * size) + 1, len(rows))
+        following = [point(r) for r in rows[end:next_end]] or [point(rows[-1])]
+        avg_x = sum(p[0] for p in following) / len(following)
+        avg_y = sum(p[1] for p in following) / len(following)
+
+        ax, ay = point(rows[a])
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            bx, by = point(rows[j])
+            area = abs((ax - avg_x) * (by - ay) - (ax - bx) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(rows[best])
+        a = best
+    sampled.append(rows[-1])
+    return sampled
+
+
+def _progression_rows(profile: Profile, bucket: str | None) -> list[tuple]:
+    """Series rows as PROGRESSION_FIELDS tuples, oldest first.
+
+    With a bucket, each day/week collapses in SQL to its latest values (every
+    column is cumulative, so that's the per-bucket max).
+    """
+    qs = profile.snapshots.all()
+    if not bucket:
+        return list(qs.order_by("captured_at").values_list(*PROGRESSION_FIELDS))
+    return list(
+        qs.annotate(period=Trunc("captured_at", bucket))
+        .values("period")
+        .annotate(**{f"max_{f}": Max(f) for f in PROGRESSION_FIELDS})
+        .order_by("period")
+        .values_list(*(f"max_{f}" for f in PROGRESSION_FIELDS))
+    )
 
-    snaps = list(profile.snapshots.order_by("captured_at"))
-    if not snaps:
-        return Status(404, {"error": "No snapshots recorded yet"})
 
-    series = [
-        ProgressionPointSchema(
-            date=s.captured_at,
-            mastery_rank=s.mastery_rank,
-            time_played_hours=round(s.time_played_seconds / 3600, 1),
-            missions_completed=s.missions_completed,
-            total_weapon_kills=s.total_weapon_kills,
-            weapons_tracked=s.weapons_tracked,
-        )
-        for s in snaps
-    ]
+def _progression_summary(profile: Profile) -> ProgressionSummarySchema | None:
+    """Velocity/projection summary, cached until a snapshot is added or removed."""
+    snaps = profile.snapshots.all()
+    version = snaps.aggregate(count=Count("id"), latest=Max("captured_at"))
+    if not version["count"]:
+        return None
+
+    key = PROGRESSION_SUMMARY_CACHE_KEY.format(profile_id=profile.id)
+    cached = cache.get(key)
+    if cached and cached["version"] == version:
+        return ProgressionSummarySchema(**cached["summary"])
 
-    first, last = snaps[0], snaps[-1]
-    window_seconds = (last.captured_at - first.captured_at).total_seconds()
+    fields = ("captured_at", "mastery_rank", "time_played_seconds")
+    first = snaps.order_by("captured_at").values(*fields).first()
+    last = snaps.order_by("-captured_at").values(*fields).first()
+    sessions = snaps.filter(trigger="session_end").count()
+
+    window_seconds = (last["captured_at"] - first["captured_at"]).total_seconds()
     days_tracked = int(window_seconds // 86400)
     months = window_seconds / (30 * 86400)
     weeks = window_seconds / (7 * 86400)
 
-    mr_gained = last.mastery_rank - first.mastery_rank
-    hours_in_window = (last.time_played_seconds - first.time_played_seconds) / 3600
-    sessions = sum(1 for s in snaps if s.trigger == "session_end")
+    mr_gained = last["mastery_rank"] - first["mastery_rank"]
+    hours_in_window = (last["time_played_seconds"] - first["time_played_seconds"]) / 3600
 
     mr_per_month = (mr_gained / months) if months > 0 else 0.0
     hours_per_week = (hours_in_window / weeks) if weeks > 0 else 0.0
-    avg_session_hours = (hours_in_window / sessions) if sessions > 0 else 0.0
+    avg_session_seconds = profile.sessions.aggregate(avg=Avg("time_played_seconds"))["avg"]
+    if avg_session_seconds is not None:
+        avg_session_hours = avg_session_seconds / 3600
+    else:
+        avg_session_hours = (hours_in_window / sessions) if sessions > 0 else 0.0
 
     projected_mr30 = None
-    if last.mastery_rank < 30 and mr_per_month > 0:
-        from datetime import timedelta
-
-        months_to_30 = (30 - last.mastery_rank) / mr_per_month
-        projected_mr30 = last.captured_at + timedelta(days=months_to_30 * 30)
+    if last["mastery_rank"] < 30 and mr_per_month > 0:
+        months_to_30 = (30 - last["mastery_rank"]) / mr_per_month
+        projected_mr30 = last["captured_at"] + timedelta(days=months_to_30 * 30)
 
     summary = ProgressionSummarySchema(
-        tracked_since=first.captured_at,
+        tracked_since=first["captured_at"],
         days_tracked=days_tracked,
         sessions=sessions,
-        current_mastery_rank=last.mastery_rank,
+        current_mastery_rank=last["mastery_rank"],
         mr_gained=mr_gained,
         mr_per_month=round(mr_per_month, 2),
-        current_hours_played=round(last.time_played_seconds / 3600, 1),
+        current_hours_played=round(last["time_played_seconds"] / 3600, 1),
         hours_in_window=round(hours_in_window, 1),
         hours_per_week=round(hours_per_week, 1),
         avg_session_hours=round(avg_session_hours, 2),
         projected_mr30_date=projected_mr30,
     )
+    cache.set(key, {"version": version, "summary": summary.model_dump()}, timeout=None)
+    return summary
+
+
+@router.get("/warframe/progression", response={200: ProgressionSchema, 404: dict})
+def get_progression(
+    request,
+    bucket: Literal["day", "week"] | None = None,
+    points: int | None = None,
+):
+    """Snapshot time series plus velocity/projection summary.
+
+    The series is oldest-first (cumulative lifetime values at each point);
+    by default every snapshot. `bucket=day|week` keeps each period's latest
+    values, and `points=N` downsamples (LTTB on hours played) to at most N
+    points, always keeping the first and last. Both can be combined.
+
+    The summary derives rates over the tracked window. Velocity and
+    projections are estimates — windowed from the first archived snapshot,
+    so they exclude play before tracking began.
+    """
+    profile = Profile.objects.first()
+    if not profile:
+        return Status(404, {"error": "No Warframe profile archived"})
+
+    summary = _progression_summary(profile)
+    if summary is None:
+        return Status(404, {"error": "No snapshots recorded yet"})
+
+    rows = _progression_rows(profile, bucket)
+    if points is not None:
+        rows = lttb(rows, max(3, min(points, 5000)), y=PROGRESSION_FIELDS.index("time_played_seconds"))
+
+    series = [
+        ProgressionPointSchema(
+            date=captured_at,
+            mastery_rank=mastery_rank,
+            time_played_hours=round(time_played_seconds / 3600, 1),
+            missions_completed=missions_completed,
+            total_weapon_kills=total_weapon_kills,
+            weapons_tracked=weapons_tracked,
+        )
+        for (
+            captured_at, mastery_rank, time_played_seconds,
+            missions_completed, total_weapon_kills, weapons_tracked,
+        ) in rows
+    ]
 
     return Status(200, ProgressionSchema(summary=summary, series=series))
+
+
+# ---- Sessions ----
+
+
+class SessionSchema(Schema):
+    id: str
+    started_at: datetime
+    ended_at: datetime
+    time_played_hours: float
+    kills: int
+    missions_completed: int
+    mastery_rank: int
+    mastery_rank_gained: int
+    standing_gained: int
+    standing: dict[str, int]
+
+
+class SessionWeekSchema(Schema):
+    week: date
+    sessions: int
+    time_played_hours: float
+    kills: int
+    missions_completed: int
+    mastery_rank_gained: int
+    standing_gained: int
+
+
+@router.get("/warframe/sessions", response=list[SessionSchema])
+def list_sessions(request, days: int | None = None, limit: int = 50):
+    """Recorded play sessions, newest first.
+
+    Each row is how far the profile moved between consecutive session-end
+    archives; `standing` maps syndicate tag -> standing change.
+    """
+    limit = max(1, min(limit, 500))
+    qs = Session.objects.order_by("-ended_at")
+    if days is not None:
+        qs = qs.filter(ended_at__gte=timezone.now() - timedelta(days=max(1, days)))
+    return [
+        SessionSchema(
+            id=str(s.id),
+            started_at=s.started_at,
+            ended_at=s.ended_at,
+            time_played_hours=round(s.time_played_seconds / 3600, 2),
+            kills=s.kills,
+            missions_completed=s.missions_completed,
+            mastery_rank=s.mastery_rank,
+            mastery_rank_gained=s.mastery_rank_gained,
+            standing_gained=s.standing_gained,
+            standing=s.standing,
+        )
+        for s in qs[:limit]
+    ]
+
+
+@router.get("/warframe/sessions/weekly", response=list[SessionWeekSchema])
+def weekly_sessions(request, weeks: int = 12):
+    """Per-week session totals, newest week first."""
+    weeks = max(1, min(weeks, 520))
+    rows = (
+        Session.objects.filter(ended_at__gte=timezone.now() - timedelta(weeks=weeks))
+        .annotate(week=TruncWeek("ended_at"))
+        .values("week")
+        .annotate(
+            sessions=Count("id"),
+            played=Sum("time_played_seconds"),
+            total_kills=Sum("kills"),
+            total_missions=Sum("missions_completed"),
+            mr_gained=Sum("mastery_rank_gained"),
+            total_standing=Sum("standing_gained"),
+        )
+        .order_by("-week")
+    )
+    return [
+        SessionWeekSchema(
+            week=r["week"].date(),
+            sessions=r["sessions"],
+            time_played_hours=round(r["played"] / 3600, 1),
+            kills=r["total_kills"],
+            missions_completed=r["total_missions"],
+            mastery_rank_gained=r["mr_gained"],
+            standing_gained=r["total_standing"],
+        )
+        for r in rows
+    ]
@@ -0,0 +1,194 @@
+"""Process-local, read-only index of the WFCD catalog.
+
+The catalog only changes when `sync_warframe_catalog` writes to it (weekly),
+so endpoints that just need item metadata read this index instead of
+querying CatalogItem per request. Columns are stored as arrays keyed by
+position, with a `unique_name` -> position map, so the whole catalog stays a
+few hundred KB per process.
+
+Freshness: the sync command bumps a generation counter in Redis whenever it
+writes; `get_catalog_index` compares it with the generation its cached index
+was built at and rebuilds lazily on mismatch. The generation is read at most
+once per GENERATION_CHECK_SECONDS, so most calls touch neither Redis nor the
+database. If Redis is unreachable the last built index keeps being served
+(a process with no index yet builds one), and the next successful check
+catches up.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from array import array
+from typing import NamedTuple
+
+import redis
+
+from config.redis import get_sync_client
+
+from .models import CatalogItem
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "questlog:warframe:catalog:generation"
+GENERATION_CHECK_SECONDS = 5
+
+_PRIME = 1
+_MASTERABLE = 2
+
+
+class CatalogEntry(NamedTuple):
+    unique_name: str
+    name: str
+    category: str
+    image_name: str
+    is_prime: bool
+    masterable: bool
+    mastery_req: int
+    max_level_cap: int
+
+
+class CatalogIndex:
+    """Immutable column store over CatalogItem."""
+
+    __slots__ = (
+        "_by_category",
+        "_categories",
+        "_category_ids",
+        "_flags",
+        "_images",
+        "_mastery_req",
+        "_max_level_cap",
+        "_names",
+        "_position",
+        "_unique_names",
+    )
+
+    def __init__(self, rows):
+        """`rows` are (unique_name, name, category, image_name, is_prime,
+        masterable, mastery_req, max_level_cap) tuples."""
+        unique_names, names, images = [], [], []
+        categories: dict[str, int] = {}
+        category_ids = array("B")
+        flags = array("B")
+        mastery_req = array("h")
+        max_level_cap = array("h")
+        by_category: dict[str, list[int]] = {}
+
+        for i, (
+            unique_name,
+            name,
+            category,
+            image,
+            prime,
+            masterable,
+            req,
+            cap,
+        ) in enumerate(rows):
+            unique_names.append(unique_name)
+            names.append(name)
+            images.append(image)
+            category_ids.append(categories.setdefault(category, len(categories)))
+            flags.append((_PRIME if prime else 0) | (_MASTERABLE if masterable else 0))
+            mastery_req.append(req)
+            max_level_cap.append(cap)
+            by_category.setdefault(category, []).append(i)
+
+        self._unique_names = tuple(unique_names)
+        self._names = tuple(names)
+        self._images = tuple(images)
+        self._categories = tuple(categories)
+        self._category_ids = category_ids
+        self._flags = flags
+        self._mastery_req = mastery_req
+        self._max_level_cap = max_level_cap
+        self._position = {name: i for i, name in enumerate(self._unique_names)}
+        self._by_category = {k: tuple(v) for k, v in by_category.items()}
+
+    @classmethod
+    def build(cls) -> CatalogIndex:
+        return cls(
+            CatalogItem.objects.order_by("category", "name").values_list(
+                "unique_name",
+                "name",
+                "category",
+                "image_name",
+                "is_prime",
+                "masterable",
+                "mastery_req",
+                "max_level_cap",
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._unique_names)
+
+    def __contains__(self, unique_name: str) -> bool:
+        return unique_name in self._position
+
+    def _entry(self, i: int) -> CatalogEntry:
+        flags = self._flags[i]
+        return CatalogEntry(
+            unique_name=self._unique_names[i],
+            name=self._names[i],
+            category=self._categories[self._category_ids[i]],
+            image_name=self._images[i],
+            is_prime=bool(flags & _PRIME),
+            masterable=bool(flags & _MASTERABLE),
+            mastery_req=self._mastery_req[i],
+            max_level_cap=self._max_level_cap[i],
+        )
+
+    def get(self, unique_name: str) -> CatalogEntry | None:
+        i = self._position.get(unique_name)
+        return None if i is None else self._entry(i)
+
+    def paths(self, category: str, prime_only: bool = False) -> list[str]:
+        """unique_names in a category, optionally primes only."""
+        return [
+            self._unique_names[i]
+            for i in self._by_category.get(category, ())
+            if not prime_only or self._flags[i] & _PRIME
+        ]
+
+
+# (generation it was built at, index, monotonic time of the last check)
+_cached: tuple[int | None, CatalogIndex, float] | None = None
+
+
+def catalog_generation(redis_client=None) -> int | None:
+    """Current catalog generation, or None if Redis can't be reached."""
+    try:
+        raw = (redis_client or get_sync_client()).get(GENERATION_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Catalog generation unavailable: %s", exc)
+        return None
+    return int(raw or 0)
+
+
+def bump_catalog_generation(redis_client=None) -> None:
+    """Invalidate every process's index; call after writing CatalogItem."""
+    global _cached
+    _cached = None
+    try:
+        (redis_client or get_sync_client()).incr(GENERATION_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Could not bump catalog generation: %s", exc)
+
+
+def get_catalog_index(redis_client=None) -> CatalogIndex:
+    """The process's catalog index, rebuilt if the generation moved on."""
+    global _cached
+    cached = _cached
+    now = time.monotonic()
+    if cached is not None and now - cached[2] < GENERATION_CHECK_SECONDS:
+        return cached[1]
+
+    generation = catalog_generation(redis_client)
+    if cached is not None and generation in (None, cached[0]):
+        _cached = (cached[0], cached[1], now)
+        return cached[1]
+
+    index = CatalogIndex.build()
+    _cached = (generation, index, now)
+    return index
@@ -2,16 +2,26 @@
 
 Single-phase, fully idempotent. Uses a short-lived Redis lock to prevent
 concurrent runs (the session-end poller invokes this command inline).
+
+Weapons, missions and syndicates are diffed against one read of the stored
+rows; only rows whose values changed are upserted, in a single transaction.
+Scheduled (mid-session) runs go further: if the fetched blob hashes the same
+as the last snapshot's, nothing is written at all. Session-end runs also
+record a Session row (see `apps.profiles.warframe.sessions`).
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 
 import redis
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.db import models
+from django.db import transaction
 from django.utils import timezone as django_tz
 
 from apps.integrations.warframe import WarframeAPIError
@@ -20,16 +30,270 @@ from apps.integrations.warframe import parse_bson_date
 from apps.integrations.warframe import parse_oid
 from apps.integrations.warframe import weapon_name_from_path
 from apps.library.models import Work
+from apps.profiles.warframe.catalog_index import get_catalog_index
 from apps.profiles.warframe.events import publish_warframe_event
+from apps.profiles.warframe.mastery import upsert_item_mastery
 from apps.profiles.warframe.models import Affiliation
+from apps.profiles.warframe.models import ItemMastery
 from apps.profiles.warframe.models import MissionStat
 from apps.profiles.warframe.models import Profile
 from apps.profiles.warframe.models import Snapshot
 from apps.profiles.warframe.models import WeaponStat
+from apps.profiles.warframe.models import WeaponStatDelta
+from apps.profiles.warframe.sessions import record_session
+from apps.profiles.warframe.snapshot_delta import delta_against
 
 LOCK_KEY = "questlog:locks:warframe_archive"
 LOCK_TTL = 300  # 5 minutes
 
+WEAPON_FIELDS = [
+    "weapon_name",
+    "fired",
+    "hits",
+    "kills",
+    "headshots",
+    "assists",
+    "equip_time_seconds",
+    "xp",
+    "accuracy",
+    "headshot_rate",
+]
+# Cumulative counters recorded per archive in WeaponStatDelta.
+WEAPON_COUNTERS = ["fired", "hits", "kills", "headshots", "assists", "equip_time_seconds", "xp"]
+# Most entries per list in the archive_complete `changes` payload.
+CHANGES_LIMIT = 20
+
+
+def profile_hash(data: dict) -> str:
+    """Stable sha256 of a fetched profile blob (key order doesn't matter)."""
+    blob = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def last_snapshot_hash(profile: Profile) -> str | None:
+    return (
+        Snapshot.objects.filter(profile=profile)
+        .order_by("-captured_at")
+        .values_list("content_hash", flat=True)
+        .first()
+    )
+
+
+def snapshot_storage(profile: Profile, data: dict) -> dict:
+    """Snapshot fields storing `data` as a patch on the latest keyframe, or as a new keyframe."""
+    keyframe = (
+        Snapshot.objects.filter(profile=profile, keyframe__isnull=True)
+        .order_by("-captured_at")
+        .first()
+    )
+    if keyframe is not None:
+        delta = delta_against(keyframe.raw_profile, keyframe.deltas.count(), data)
+        if delta is not None:
+            return {"keyframe": keyframe, "raw_delta": delta}
+    return {"raw_profile": data}
+
+
+def weapon_rows(profile: Profile, stats: dict) -> list[WeaponStat]:
+    rows = []
+    for w in stats.get("Weapons") or []:
+        path = w.get("type", "")
+        if not path:
+            continue
+        fired = int(w.get("fired", 0) or 0)
+        hits = int(w.get("hits", 0) or 0)
+        kills = int(w.get("kills", 0) or 0)
+        headshots = int(w.get("headshots", 0) or 0)
+        accuracy = (hits / fired) if fired else 0.0
+        headshot_rate = (headshots / kills) if kills else 0.0
+        rows.append(
+            WeaponStat(
+                profile=profile,
+                weapon_path=path,
+                weapon_name=weapon_name_from_path(path),
+                fired=fired,
+                hits=hits,
+                kills=kills,
+                headshots=headshots,
+                assists=int(w.get("assists", 0) or 0),
+                equip_time_seconds=float(w.get("equipTime", 0) or 0),
+                xp=int(w.get("xp", 0) or 0),
+                accuracy=round(accuracy, 4),
+                headshot_rate=round(headshot_rate, 4),
+            )
+        )
+    return rows
+
+
+def mission_rows(profile: Profile, result: dict) -> list[MissionStat]:
+    return [
+        MissionStat(
+            profile=profile,
+            node_tag=m["Tag"],
+            completes=int(m.get("Completes", 0) or 0),
+        )
+        for m in result.get("Missions") or []
+        if m.get("Tag")
+    ]
+
+
+def affiliation_rows(profile: Profile, result: dict) -> list[Affiliation]:
+    return [
+        Affiliation(
+            profile=profile,
+            syndicate_tag=a["Tag"],
+            standing=int(a.get("Standing", 0) or 0),
+            title_rank=int(a.get("Title", 0) or 0),
+        )
+        for a in result.get("Affiliations") or []
+        if a.get("Tag")
+    ]
+
+
+def upsert_changed(
+    model: type[models.Model],
+    profile: Profile,
+    rows: list[models.Model],
+    key: str,
+    fields: list[str],
+) -> list[tuple[models.Model, dict | None]]:
+    """Upsert the rows that differ from what's stored.
+
+    One read of the profile's existing rows, then a single INSERT ... ON
+    CONFLICT for new and changed rows. Unchanged rows aren't touched, so their
+    `updated_at` keeps meaning "last changed". Returns each written row with
+    its previously stored values (None if it's new).
+    """
+    existing = {
+        r[key]: r
+        for r in model.objects.filter(profile=profile).values(key, *fields)
+    }
+    changed = []
+    for row in rows:
+        stored = existing.get(getattr(row, key))
+        if stored is None or any(getattr(row, f) != stored[f] for f in fields):
+            changed.append((row, stored))
+    if changed:
+        model.objects.bulk_create(
+            [row for row, _ in changed],
+            update_conflicts=True,
+            unique_fields=["profile", key],
+            update_fields=[*fields, "updated_at"],
+        )
+    return changed
+
+
+def weapon_deltas(
+    profile: Profile,
+    changed: list[tuple[WeaponStat, dict | None]],
+    captured_at,
+) -> list[WeaponStatDelta]:
+    """Counter increments for weapons that moved; new weapons count from zero."""
+    deltas = []
+    for row, stored in changed:
+        moved = {
+            f: getattr(row, f) - (stored[f] if stored else 0) for f in WEAPON_COUNTERS
+        }
+        if any(moved.values()):
+            deltas.append(
+                WeaponStatDelta(
+                    profile=profile,
+                    weapon_path=row.weapon_path,
+                    captured_at=captured_at,
+                    **moved,
+                )
+            )
+    return deltas
+
+
+def _bounded(items: list) -> dict:
+    return {"items": items[:CHANGES_LIMIT], "total": len(items)}
+
+
+def archive_changes(
+    first_archive: bool,
+    weapons: list[tuple[WeaponStat, dict | None]],
+    affiliations: list[tuple[Affiliation, dict | None]],
+    mastery: list[tuple[ItemMastery, tuple | None]],
+) -> dict:
+    """What this archive changed, from the rows `sync_profile_rows` just wrote.
+
+    Each list holds at most CHANGES_LIMIT entries alongside its full count, so
+    the event stays small however much moved. On a profile's first archive
+    everything is new, so weapons and mastery are left empty.
+    """
+    new_weapons, mastered = [], []
+    if not first_archive:
+        new_weapons = [
+            {"path": row.weapon_path, "name": row.weapon_name}
+            for row, stored in weapons
+            if stored is None
+        ]
+        index = get_catalog_index()
+        for row, stored in mastery:
+            if row.mastered and not (stored and stored[1]):
+                entry = index.get(row.item_id)
+                name = entry.name if entry else weapon_name_from_path(row.item_id)
+                mastered.append({"path": row.item_id, "name": name})
+
+    standing = sorted(
+        (
+            {
+                "syndicate": row.syndicate_tag,
+                "standing": row.standing,
+                "change": row.standing - (stored["standing"] if stored else 0),
+            }
+            for row, stored in affiliations
+            if stored is None or row.standing != stored["standing"]
+        ),
+        key=lambda s: -abs(s["change"]),
+    )
+    return {
+        "new_weapons": _bounded(new_weapons),
+        "mastered": _bounded(mastered),
+        "standing": _bounded(standing),
+    }
+
+
+@transaction.atomic
+def sync_profile_rows(
+    profile: Profile, weapons: list[WeaponStat], result: dict
+) -> tuple[dict[str, int], dict]:
+    """Write changed weapons, missions, syndicates and item mastery in one transaction.
+
+    Changed weapons also get a WeaponStatDelta row — except on a profile's
+    first archive, where there's nothing to measure against. Returns rows
+    written per table, and the `archive_changes` summary of what moved.
+    """
+    first_archive = not WeaponStat.objects.filter(profile=profile).exists()
+    changed_weapons = upsert_changed(
+        WeaponStat, profile, weapons, "weapon_path", WEAPON_FIELDS
+    )
+    deltas = [] if first_archive else weapon_deltas(profile, changed_weapons, django_tz.now())
+    WeaponStatDelta.objects.bulk_create(deltas)
+    changed_missions = upsert_changed(
+        MissionStat, profile, mission_rows(profile, result), "node_tag", ["completes"]
+    )
+    changed_affiliations = upsert_changed(
+        Affiliation,
+        profile,
+        affiliation_rows(profile, result),
+        "syndicate_tag",
+        ["standing", "title_rank"],
+    )
+    changed_mastery = upsert_item_mastery(profile, result)
+
+    rows_written = {
+        "weapons": len(changed_weapons),
+        "weapon_deltas": len(deltas),
+        "missions": len(changed_missions),
+        "affiliations": len(changed_affiliations),
+        "item_mastery": len(changed_mastery),
+    }
+    changes = archive_changes(
+        first_archive, changed_weapons, changed_affiliations, changed_mastery
+    )
+    return rows_written, changes
+
 
 class Command(BaseCommand):
     help = "Archive the Warframe profile from the public content endpoint"
@@ -119,19 +383,45 @@ class Command(BaseCommand):
         result = results[0]
         stats = data.get("Stats", {}) or {}
 
+        content_hash = profile_hash(data)
+        if options["trigger"] == "scheduled":
+            last_hash = await sync_to_async(last_snapshot_hash, thread_sensitive=True)(profile)
+            if last_hash == content_hash:
+                await sync_to_async(publish_warframe_event)(
+                    "warframe:archive_unchanged",
+                    {"account_id": profile.account_id, "trigger": options["trigger"]},
+                )
+                self.stdout.write("Profile unchanged since the last snapshot; nothing written")
+                return
+
+        previous_rank = profile.mastery_rank
         await self._update_profile(profile, result, stats)
-        weapons_tracked, total_weapon_kills = await self._sync_weapons(profile, stats)
-        await self._sync_missions(profile, result)
-        await self._sync_affiliations(profile, result)
+        weapons = weapon_rows(profile, stats)
+        weapons_tracked = len(weapons)
+        total_weapon_kills = sum(w.kills for w in weapons)
+        rows_written, changes = await sync_to_async(sync_profile_rows, thread_sensitive=True)(
+            profile, weapons, result
+        )
+        changes["mastery_rank"] = (
+            {"from": previous_rank, "to": profile.mastery_rank}
+            if profile.mastery_rank != previous_rank
+            else None
+        )
 
+        session = None
         if not options["no_snapshot"]:
-            await self._create_snapshot(
+            snapshot = await self._create_snapshot(
                 profile,
                 options["trigger"],
                 data,
+                content_hash,
                 weapons_tracked,
                 total_weapon_kills,
             )
+            if options["trigger"] == "session_end":
+                session = await sync_to_async(record_session, thread_sensitive=True)(
+                    profile, snapshot, data
+                )
 
         profile.last_synced = django_tz.now()
         await sync_to_async(profile.save, thread_sensitive=True)(
@@ -146,6 +436,8 @@ class Command(BaseCommand):
             "missions_completed": profile.missions_completed,
             "weapons_tracked": weapons_tracked,
             "total_weapon_kills": total_weapon_kills,
+            "rows_written": rows_written,
+            "changes": changes,
             "trigger": options["trigger"],
         }
         await sync_to_async(publish_warframe_event)("warframe:archive_complete", summary)
@@ -158,6 +450,18 @@ class Command(BaseCommand):
                 f"{weapons_tracked} weapons, {total_weapon_kills} total kills"
             )
         )
+        self.stdout.write(
+            f"Rows written: {rows_written['weapons']} weapons "
+            f"({rows_written['weapon_deltas']} deltas), "
+            f"{rows_written['missions']} missions, "
+            f"{rows_written['affiliations']} syndicates, "
+            f"{rows_written['item_mastery']} item mastery"
+        )
+        if session is not None:
+            self.stdout.write(
+                f"Session: {session.time_played_seconds // 60}m played, "
+                f"{session.kills} kills, {session.missions_completed} missions"
+            )
 
     # ---- sub-phases ----
 
@@ -195,87 +499,19 @@ class Command(BaseCommand):
 
         await sync_to_async(profile.save, thread_sensitive=True)()
 
-    async def _sync_weapons(self, profile: Profile, stats: dict) -> tuple[int, int]:
-        from asgiref.sync import sync_to_async
-
-        weapons = stats.get("Weapons") or []
-        total_kills = 0
-        tracked = 0
-
-        for w in weapons:
-            path = w.get("type", "")
-            if not path:
-                continue
-            fired = int(w.get("fired", 0) or 0)
-            hits = int(w.get("hits", 0) or 0)
-            kills = int(w.get("kills", 0) or 0)
-            headshots = int(w.get("headshots", 0) or 0)
-            accuracy = (hits / fired) if fired else 0.0
-            headshot_rate = (headshots / kills) if kills else 0.0
-
-            defaults = {
-                "weapon_name": weapon_name_from_path(path),
-                "fired": fired,
-                "hits": hits,
-                "kills": kills,
-                "headshots": headshots,
-                "assists": int(w.get("assists", 0) or 0),
-                "equip_time_seconds": float(w.get("equipTime", 0) or 0),
-                "xp": int(w.get("xp", 0) or 0),
-                "accuracy": round(accuracy, 4),
-                "headshot_rate": round(headshot_rate, 4),
-            }
-            await sync_to_async(
-                WeaponStat.objects.update_or_create, thread_sensitive=True
-            )(profile=profile, weapon_path=path, defaults=defaults)
-            total_kills += kills
-            tracked += 1
-
-        return tracked, total_kills
-
-    async def _sync_missions(self, profile: Profile, result: dict) -> None:
-        from asgiref.sync import sync_to_async
-
-        missions = result.get("Missions") or []
-        for m in missions:
-            tag = m.get("Tag", "")
-            if not tag:
-                continue
-            completes = int(m.get("Completes", 0) or 0)
-            await sync_to_async(
-                MissionStat.objects.update_or_create, thread_sensitive=True
-            )(profile=profile, node_tag=tag, defaults={"completes": completes})
-
-    async def _sync_affiliations(self, profile: Profile, result: dict) -> None:
-        from asgiref.sync import sync_to_async
-
-        affiliations = result.get("Affiliations") or []
-        for a in affiliations:
-            tag = a.get("Tag", "")
-            if not tag:
-                continue
-            await sync_to_async(
-                Affiliation.objects.update_or_create, thread_sensitive=True
-            )(
-                profile=profile,
-                syndicate_tag=tag,
-                defaults={
-                    "standing": int(a.get("Standing", 0) or 0),
-                    "title_rank": int(a.get("Title", 0) or 0),
-                },
-            )
-
     async def _create_snapshot(
         self,
         profile: Profile,
         trigger: str,
         raw_data: dict,
+        content_hash: str,
         weapons_tracked: int,
         total_weapon_kills: int,
-    ) -> None:
+    ) -> Snapshot:
         from asgiref.sync import sync_to_async
 
-        await sync_to_async(Snapshot.objects.create, thread_sensitive=True)(
+        storage = await sync_to_async(snapshot_storage, thread_sensitive=True)(profile, raw_data)
+        return await sync_to_async(Snapshot.objects.create, thread_sensitive=True)(
             profile=profile,
             trigger=trigger,
             mastery_rank=profile.mastery_rank,
@@ -284,5 +520,6 @@ class Command(BaseCommand):
             pickup_count=profile.pickup_count,
             total_weapon_kills=total_weapon_kills,
             weapons_tracked=weapons_tracked,
-            raw_profile=raw_data,
+            content_hash=content_hash,
+            **storage,
         )
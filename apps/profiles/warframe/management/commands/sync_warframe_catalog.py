@@ -4,15 +4,30 @@ Downloads per-category JSON from the WFCD warframe-items dataset and upserts
 into CatalogItem, keyed on uniqueName (the /Lotus/... asset path) so it joins
 to WeaponStat.weapon_path.
 
-Idempotent — safe to re-run; refresh whenever the game adds items.
+Idempotent — safe to re-run; refresh whenever the game adds items. Each
+category is fetched conditionally (ETag / Last-Modified kept in
+CatalogSource), so an idle upstream costs one 304 per file. Changed files are
+diffed against a per-item content hash and only new or changed items are
+written, in one bulk upsert. When anything changed, the catalog generation
+is bumped (so process-local catalog indexes rebuild) and item mastery is
+re-judged, since thresholds come from the catalog.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
+
 import httpx
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
+from apps.profiles.warframe.catalog_index import bump_catalog_generation
+from apps.profiles.warframe.mastery import refresh_item_mastery
 from apps.profiles.warframe.models import CatalogItem
+from apps.profiles.warframe.models import CatalogSource
+from apps.profiles.warframe.models import Profile
 
 BASE_URL = "https://raw.githubusercontent.com/WFCD/warframe-items/master/data/json"
 # All categories that grant mastery, for completion tracking.
@@ -28,6 +43,22 @@ DEFAULT_CATEGORIES = [
     "SentinelWeapons",
     "Pets",
 ]
+CATALOG_FIELDS = [
+    "name",
+    "category",
+    "item_type",
+    "mastery_req",
+    "masterable",
+    "is_prime",
+    "vaulted",
+    "vault_date",
+    "max_level_cap",
+    "acquisition",
+    "tags",
+    "image_name",
+    "product_category",
+    "raw",
+]
 
 
 # Tenet weapons share a prefix but split across two acquisition paths; WFCD's
@@ -127,6 +158,64 @@ def _acquisition(item: dict) -> str:
     return ""
 
 
+def catalog_fields(item: dict) -> dict:
+    """CatalogItem column values for one WFCD item."""
+    return {
+        "name": item.get("name", "") or "",
+        "category": item.get("category", "") or "",
+        "item_type": item.get("type", "") or "",
+        "mastery_req": int(item.get("masteryReq", 0) or 0),
+        "masterable": bool(item.get("masterable", False)),
+        "is_prime": bool(item.get("isPrime", False)),
+        "vaulted": bool(item.get("vaulted", False)),
+        "vault_date": item.get("vaultDate", "") or "",
+        "max_level_cap": int(item.get("maxLevelCap", 30) or 30),
+        "acquisition": _acquisition(item),
+        "tags": item.get("tags", []) or [],
+        "image_name": item.get("imageName", "") or "",
+        "product_category": item.get("productCategory", "") or "",
+        "raw": item,
+    }
+
+
+def fields_hash(fields: dict) -> str:
+    """Hash of the derived columns, not just the raw item, so classifier
+    changes (e.g. `_acquisition`) still reach existing rows."""
+    blob = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+@transaction.atomic
+def upsert_catalog_items(items: list[dict]) -> tuple[int, int]:
+    """Write new and changed items in one bulk upsert; returns (created, updated)."""
+    incoming = {}
+    for item in items:
+        unique_name = item.get("uniqueName")
+        if not unique_name:
+            continue
+        fields = catalog_fields(item)
+        incoming[unique_name] = CatalogItem(
+            unique_name=unique_name, content_hash=fields_hash(fields), **fields
+        )
+
+    existing = dict(
+        CatalogItem.objects.filter(unique_name__in=incoming).values_list(
+            "unique_name", "content_hash"
+        )
+    )
+    changed = [
+        row for name, row in incoming.items() if existing.get(name) != row.content_hash
+    ]
+    CatalogItem.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["unique_name"],
+        update_fields=[*CATALOG_FIELDS, "content_hash", "updated_at"],
+    )
+    created = sum(1 for row in changed if row.unique_name not in existing)
+    return created, len(changed) - created
+
+
 class Command(BaseCommand):
     help = "Sync the WFCD warframe-items catalog into CatalogItem"
 
@@ -137,27 +226,56 @@ class Command(BaseCommand):
             default=DEFAULT_CATEGORIES,
             help="WFCD category files to sync (e.g. Warframes Primary Sentinels)",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Ignore stored ETag/Last-Modified and re-fetch every file",
+        )
 
     def handle(self, *args, **options):
         categories = options["categories"]
         total_created = 0
         total_updated = 0
+        unchanged_files = 0
 
         with httpx.Client(timeout=60.0, follow_redirects=True) as client:
             for category in categories:
+                source, _ = CatalogSource.objects.get_or_create(category=category)
+                headers = {}
+                if not options["force"]:
+                    if source.etag:
+                        headers["If-None-Match"] = source.etag
+                    if source.last_modified:
+                        headers["If-Modified-Since"] = source.last_modified
+
                 url = f"{BASE_URL}/{category}.json"
                 self.stdout.write(f"Fetching {category}...")
                 try:
-                    response = client.get(url)
+                    response = client.get(url, headers=headers)
+                    if response.status_code == 304:
+                        source.last_fetched = timezone.now()
+                        source.save(update_fields=["last_fetched", "updated_at"])
+                        unchanged_files += 1
+                        self.stdout.write(f"  {category}: not modified")
+                        continue
                     response.raise_for_status()
                     items = response.json()
                 except httpx.HTTPError as exc:
                     self.stderr.write(self.style.ERROR(f"  Failed to fetch {category}: {exc}"))
                     continue
 
-                created, updated = self._sync_items(items)
+                created, updated = upsert_catalog_items(items)
                 total_created += created
                 total_updated += updated
+
+                now = timezone.now()
+                source.etag = response.headers.get("ETag", "")
+                source.last_modified = response.headers.get("Last-Modified", "")
+                source.item_count = len(items)
+                source.last_fetched = now
+                if created or updated:
+                    source.last_changed = now
+                source.save()
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"  {category}: {created} created, {updated} updated ({len(items)} total)"
@@ -166,39 +284,13 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Catalog sync complete: {total_created} created, {total_updated} updated"
+                f"Catalog sync complete: {total_created} created, {total_updated} updated, "
+                f"{unchanged_files} files not modified"
             )
         )
 
-    def _sync_items(self, items: list[dict]) -> tuple[int, int]:
-        created = 0
-        updated = 0
-        for item in items:
-            unique_name = item.get("uniqueName")
-            if not unique_name:
-                continue
-            defaults = {
-                "name": item.get("name", "") or "",
-                "category": item.get("category", "") or "",
-                "item_type": item.get("type", "") or "",
-                "mastery_req": int(item.get("masteryReq", 0) or 0),
-                "masterable": bool(item.get("masterable", False)),
-                "is_prime": bool(item.get("isPrime", False)),
-                "vaulted": bool(item.get("vaulted", False)),
-                "vault_date": item.get("vaultDate", "") or "",
-                "max_level_cap": int(item.get("maxLevelCap", 30) or 30),
-                "acquisition": _acquisition(item),
-                "tags": item.get("tags", []) or [],
-                "image_name": item.get("imageName", "") or "",
-                "product_category": item.get("productCategory", "") or "",
-                "raw": item,
-            }
-            _, was_created = CatalogItem.objects.update_or_create(
-                unique_name=unique_name,
-                defaults=defaults,
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-        return created, updated
+        if total_created or total_updated:
+            bump_catalog_generation()
+            for profile in Profile.objects.all():
+                written = refresh_item_mastery(profile)
+                self.stdout.write(f"Item mastery for {profile}: {written} rows updated")
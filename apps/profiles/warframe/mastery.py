@@ -0,0 +1,137 @@
+"""Per-item mastery for the Warframe archive.
+
+`refresh_item_mastery` turns the profile's `LoadOutInventory.XPInfo` into
+ItemMastery rows, so the mastery endpoints aggregate in SQL instead of
+re-reading the profile blob and walking the catalog per request. Run by
+`archive_warframe` on every sync and by `sync_warframe_catalog` (thresholds
+depend on the catalog's category and level cap).
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+
+from .models import CatalogItem
+from .models import ItemMastery
+from .models import Profile
+
+# Affinity to reach a rank R = MULT * R^2. Weapons use 500, frames/companions 1000.
+MASTERY_MULT = {
+    "Warframes": 1000,
+    "Archwing": 1000,
+    "Sentinels": 1000,
+    "Pets": 1000,
+    "Primary": 500,
+    "Secondary": 500,
+    "Melee": 500,
+    "Arch-Gun": 500,
+    "Arch-Melee": 500,
+    "SentinelWeapons": 500,
+}
+DEFAULT_MULT = 500
+
+# Mastery points granted per rank: weapons 100, frames/companions 200.
+MASTERY_PER_RANK = {
+    "Warframes": 200,
+    "Archwing": 200,
+    "Sentinels": 200,
+    "Pets": 200,
+}
+DEFAULT_PER_RANK = 100
+
+
+def mastery_threshold(category: str, max_level_cap: int) -> int:
+    """Affinity needed to max an item (= reach mastery) for its category."""
+    mult = MASTERY_MULT.get(category, DEFAULT_MULT)
+    cap = max_level_cap or 30
+    return mult * cap * cap
+
+
+def mastery_value(category: str, max_level_cap: int) -> int:
+    """MR points an item grants when maxed (per-rank * cap)."""
+    return MASTERY_PER_RANK.get(category, DEFAULT_PER_RANK) * (max_level_cap or 30)
+
+
+def mastery_state(
+    affinity: int, catalog_entry: tuple[str, int] | None
+) -> tuple[bool, int]:
+    """(mastered, percent of the max-rank threshold) for an item's affinity.
+
+    `catalog_entry` is the item's (category, max_level_cap); unknown items
+    can't be judged, so they read as (False, 0).
+    """
+    if catalog_entry is None:
+        return False, 0
+    threshold = mastery_threshold(*catalog_entry)
+    return affinity >= threshold, min(100, round(affinity / threshold * 100))
+
+
+def xp_by_path(profile_data: dict) -> dict[str, int]:
+    xp_list = (profile_data or {}).get("LoadOutInventory", {}).get("XPInfo", []) or []
+    return {
+        e.get("ItemType"): int(e.get("XP", 0) or 0)
+        for e in xp_list
+        if e.get("ItemType")
+    }
+
+
+def upsert_item_mastery(
+    profile: Profile, profile_data: dict | None = None
+) -> list[tuple[ItemMastery, tuple | None]]:
+    """Write new or changed ItemMastery rows for the profile's XPInfo.
+
+    Returns each written row with its previously stored (xp, mastered,
+    progress), or None if it's new. Call inside a transaction.
+    """
+    xp = xp_by_path(profile.profile_data if profile_data is None else profile_data)
+    catalog = {
+        name: (category, cap)
+        for name, category, cap in CatalogItem.objects.filter(
+            unique_name__in=xp
+        ).values_list("unique_name", "category", "max_level_cap")
+    }
+    existing = {
+        item_id: (item_xp, mastered, progress)
+        for item_id, item_xp, mastered, progress in ItemMastery.objects.filter(
+            profile=profile
+        ).values_list("item_id", "xp", "mastered", "progress")
+    }
+
+    changed = []
+    for path, affinity in xp.items():
+        mastered, progress = mastery_state(affinity, catalog.get(path))
+        stored = existing.get(path)
+        if stored != (affinity, mastered, progress):
+            changed.append(
+                (
+                    ItemMastery(
+                        profile=profile,
+                        item_id=path,
+                        xp=affinity,
+                        mastered=mastered,
+                        progress=progress,
+                    ),
+                    stored,
+                )
+            )
+
+    ItemMastery.objects.filter(profile=profile).exclude(item_id__in=xp).delete()
+    ItemMastery.objects.bulk_create(
+        [row for row, _ in changed],
+        update_conflicts=True,
+        unique_fields=["profile", "item"],
+        update_fields=["xp", "mastered", "progress", "updated_at"],
+    )
+    return changed
+
+
+@transaction.atomic
+def refresh_item_mastery(profile: Profile, profile_data: dict | None = None) -> int:
+    """Bring the profile's ItemMastery rows in line with its XPInfo.
+
+    An item counts as mastered once its lifetime affinity meets the max-rank
+    threshold. Items missing from the catalog keep their XP but stay
+    unmastered until a catalog sync knows their category. Only new or changed
+    rows are written; returns how many.
+    """
+    return len(upsert_item_mastery(profile, profile_data))
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warframe', '0005_catalogitem_tags_catalogitem_vault_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshot',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
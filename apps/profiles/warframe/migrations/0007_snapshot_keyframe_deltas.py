@@ -0,0 +1,143 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+import copy
+import json
+
+BATCH_SIZE = 50
+
+# Frozen copies of apps.profiles.warframe.snapshot_delta as of this migration,
+# so later edits to that module can't change what the migration does.
+KEYFRAME_EVERY = 48
+MAX_DELTA_RATIO = 0.5
+
+
+def _escape(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old, new, path=""):
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": f"{path}/{_escape(k)}"} for k in old if k not in new]
+        for k, value in new.items():
+            child = f"{path}/{_escape(k)}"
+            if k in old:
+                ops.extend(make_patch(old[k], value, child))
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old), len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        return ops
+
+    if type(old) is not type(new) or old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(doc, ops):
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        if op["path"] == "":
+            doc = copy.deepcopy(op.get("value"))
+            continue
+        *parents, last = [_unescape(t) for t in op["path"][1:].split("/")]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+
+        key = int(last) if isinstance(target, list) else last
+        if op["op"] == "remove":
+            del target[key]
+        elif op["op"] == "add" and isinstance(target, list):
+            target.insert(key, copy.deepcopy(op["value"]))
+        else:
+            target[key] = copy.deepcopy(op["value"])
+    return doc
+
+
+def delta_against(keyframe, deltas_since, data):
+    if keyframe is None or deltas_since >= KEYFRAME_EVERY - 1:
+        return None
+    patch = make_patch(keyframe, data)
+    if len(json.dumps(patch)) > len(json.dumps(data)) * MAX_DELTA_RATIO:
+        return None
+    return patch
+
+
+def compact_snapshots(apps, schema_editor):
+    """Re-store existing full snapshots as keyframes plus patches, oldest first."""
+    Snapshot = apps.get_model("warframe", "Snapshot")
+    db = schema_editor.connection.alias
+
+    profile_ids = Snapshot.objects.using(db).values_list("profile_id", flat=True).distinct()
+    for profile_id in list(profile_ids):
+        ids = list(
+            Snapshot.objects.using(db)
+            .filter(profile_id=profile_id)
+            .order_by("captured_at")
+            .values_list("pk", flat=True)
+        )
+        keyframe_id, keyframe, deltas_since = None, None, 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            with transaction.atomic(using=db):
+                batch = Snapshot.objects.using(db).filter(pk__in=ids[start : start + BATCH_SIZE])
+                for snap in batch.order_by("captured_at"):
+                    delta = delta_against(keyframe, deltas_since, snap.raw_profile)
+                    if delta is None:
+                        keyframe_id, keyframe, deltas_since = snap.pk, snap.raw_profile, 0
+                        continue
+                    Snapshot.objects.using(db).filter(pk=snap.pk).update(
+                        keyframe_id=keyframe_id, raw_delta=delta, raw_profile={}
+                    )
+                    deltas_since += 1
+
+
+def expand_snapshots(apps, schema_editor):
+    Snapshot = apps.get_model("warframe", "Snapshot")
+    db = schema_editor.connection.alias
+    for snap in Snapshot.objects.using(db).filter(keyframe__isnull=False).select_related("keyframe").iterator():
+        Snapshot.objects.using(db).filter(pk=snap.pk).update(
+            keyframe=None,
+            raw_delta=[],
+            raw_profile=apply_patch(snap.keyframe.raw_profile, snap.raw_delta),
+        )
+
+
+class Migration(migrations.Migration):
+
+    # Compaction commits per batch rather than rewriting every snapshot in
+    # one transaction. The freed TOAST space isn't returned to the OS here;
+    # see README "Reclaiming snapshot space" for the off-hours VACUUM FULL.
+    atomic = False
+
+    dependencies = [
+        ('warframe', '0006_snapshot_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshot',
+            name='keyframe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='deltas', to='warframe.snapshot'),
+        ),
+        migrations.AddField(
+            model_name='snapshot',
+            name='raw_delta',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(compact_snapshots, expand_snapshots),
+    ]
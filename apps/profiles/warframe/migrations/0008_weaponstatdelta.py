@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warframe', '0007_snapshot_keyframe_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeaponStatDelta',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('weapon_path', models.CharField(max_length=255)),
+                ('captured_at', models.DateTimeField()),
+                ('fired', models.BigIntegerField(default=0)),
+                ('hits', models.BigIntegerField(default=0)),
+                ('kills', models.BigIntegerField(default=0)),
+                ('headshots', models.BigIntegerField(default=0)),
+                ('assists', models.BigIntegerField(default=0)),
+                ('equip_time_seconds', models.FloatField(default=0)),
+                ('xp', models.BigIntegerField(default=0)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weapon_deltas', to='warframe.profile')),
+            ],
+            options={
+                'ordering': ['-captured_at'],
+                'indexes': [models.Index(fields=['profile', 'weapon_path', 'captured_at'], name='warframe_we_profile_52ad33_idx'), models.Index(fields=['profile', 'captured_at'], name='warframe_we_profile_ad3fe0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:35
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+# Frozen copies of apps.profiles.warframe.mastery as of this migration, so
+# later edits to that module can't change what the backfill writes.
+MASTERY_MULT = {
+    "Warframes": 1000,
+    "Archwing": 1000,
+    "Sentinels": 1000,
+    "Pets": 1000,
+    "Primary": 500,
+    "Secondary": 500,
+    "Melee": 500,
+    "Arch-Gun": 500,
+    "Arch-Melee": 500,
+    "SentinelWeapons": 500,
+}
+DEFAULT_MULT = 500
+
+
+def mastery_state(affinity, catalog_entry):
+    if catalog_entry is None:
+        return False, 0
+    category, max_level_cap = catalog_entry
+    cap = max_level_cap or 30
+    threshold = MASTERY_MULT.get(category, DEFAULT_MULT) * cap * cap
+    return affinity >= threshold, min(100, round(affinity / threshold * 100))
+
+
+def xp_by_path(profile_data):
+    xp_list = (profile_data or {}).get("LoadOutInventory", {}).get("XPInfo", []) or []
+    return {
+        e.get("ItemType"): int(e.get("XP", 0) or 0)
+        for e in xp_list
+        if e.get("ItemType")
+    }
+
+
+def backfill_item_mastery(apps, schema_editor):
+    """Seed ItemMastery from each profile's stored XPInfo."""
+    Profile = apps.get_model("warframe", "Profile")
+    CatalogItem = apps.get_model("warframe", "CatalogItem")
+    ItemMastery = apps.get_model("warframe", "ItemMastery")
+    db = schema_editor.connection.alias
+
+    catalog = {
+        name: (category, cap)
+        for name, category, cap in CatalogItem.objects.using(db).values_list(
+            "unique_name", "category", "max_level_cap"
+        )
+    }
+    for profile in Profile.objects.using(db).only("id", "profile_data"):
+        rows = []
+        for path, affinity in xp_by_path(profile.profile_data).items():
+            mastered, progress = mastery_state(affinity, catalog.get(path))
+            rows.append(
+                ItemMastery(
+                    profile_id=profile.id,
+                    item_id=path,
+                    xp=affinity,
+                    mastered=mastered,
+                    progress=progress,
+                )
+            )
+        ItemMastery.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warframe', '0008_weaponstatdelta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemMastery',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('xp', models.BigIntegerField(default=0)),
+                ('mastered', models.BooleanField(default=False)),
+                ('progress', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(db_column='unique_name', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='masteries', to='warframe.catalogitem', to_field='unique_name')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_mastery', to='warframe.profile')),
+            ],
+            options={
+                'verbose_name_plural': 'item mastery',
+                'indexes': [models.Index(fields=['profile', 'mastered'], name='warframe_it_profile_221974_idx')],
+                'unique_together': {('profile', 'item')},
+            },
+        ),
+        migrations.RunPython(backfill_item_mastery, migrations.RunPython.noop),
+    ]
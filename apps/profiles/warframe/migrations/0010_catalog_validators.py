@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:39
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warframe', '0009_itemmastery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSource',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=50, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('item_count', models.IntegerField(default=0)),
+                ('last_fetched', models.DateTimeField(blank=True, null=True)),
+                ('last_changed', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['category'],
+            },
+        ),
+        migrations.AddField(
+            model_name='catalogitem',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
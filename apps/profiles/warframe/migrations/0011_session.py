@@ -0,0 +1,142 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:43
+
+import copy
+import django.db.models.deletion
+import uuid
+from datetime import timedelta
+from django.db import migrations, models
+
+# Frozen copies of the diff helpers in apps.profiles.warframe.sessions and
+# snapshot_delta as of this migration, so later edits to those modules can't
+# change what the backfill writes.
+SESSION_COUNTERS = (
+    ("time_played_seconds", "time_played_seconds"),
+    ("total_weapon_kills", "kills"),
+    ("missions_completed", "missions_completed"),
+    ("mastery_rank", "mastery_rank_gained"),
+)
+SNAPSHOT_FIELDS = ("captured_at", *(f for f, _ in SESSION_COUNTERS))
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def apply_patch(doc, ops):
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        if op["path"] == "":
+            doc = copy.deepcopy(op.get("value"))
+            continue
+        *parents, last = [_unescape(t) for t in op["path"][1:].split("/")]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+
+        key = int(last) if isinstance(target, list) else last
+        if op["op"] == "remove":
+            del target[key]
+        elif op["op"] == "add" and isinstance(target, list):
+            target.insert(key, copy.deepcopy(op["value"]))
+        else:
+            target[key] = copy.deepcopy(op["value"])
+    return doc
+
+
+def standings(blob):
+    results = (blob or {}).get("Results")
+    if not results:
+        return None
+    return {
+        a["Tag"]: int(a.get("Standing", 0) or 0)
+        for a in results[0].get("Affiliations") or []
+        if a.get("Tag")
+    }
+
+
+def session_fields(baseline, end, standing_before, standing_after):
+    fields = {
+        session_field: end[field] - baseline[field] for field, session_field in SESSION_COUNTERS
+    }
+    standing = {}
+    if standing_before is not None and standing_after is not None:
+        for tag in sorted(standing_before.keys() | standing_after.keys()):
+            moved = standing_after.get(tag, 0) - standing_before.get(tag, 0)
+            if moved:
+                standing[tag] = moved
+
+    ended_at = end["captured_at"]
+    started_at = max(
+        baseline["captured_at"], ended_at - timedelta(seconds=fields["time_played_seconds"])
+    )
+    return {
+        **fields,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "mastery_rank": end["mastery_rank"],
+        "standing": standing,
+        "standing_gained": sum(standing.values()),
+    }
+
+
+def backfill_sessions(apps, schema_editor):
+    """Record a Session for every existing session_end snapshot."""
+    Profile = apps.get_model("warframe", "Profile")
+    Snapshot = apps.get_model("warframe", "Snapshot")
+    Session = apps.get_model("warframe", "Session")
+    db = schema_editor.connection.alias
+
+    def blob(snap):
+        if snap.keyframe_id is None:
+            return snap.raw_profile
+        return apply_patch(snap.keyframe.raw_profile, snap.raw_delta)
+
+    for profile in Profile.objects.using(db).only("id"):
+        snaps = Snapshot.objects.using(db).filter(profile_id=profile.id).order_by("captured_at")
+        baseline = snaps.select_related("keyframe").first()
+        rows = []
+        for snap in snaps.filter(trigger="session_end").select_related("keyframe"):
+            if snap.pk == baseline.pk:
+                continue
+            fields = session_fields(
+                {f: getattr(baseline, f) for f in SNAPSHOT_FIELDS},
+                {f: getattr(snap, f) for f in SNAPSHOT_FIELDS},
+                standings(blob(baseline)),
+                standings(blob(snap)),
+            )
+            rows.append(Session(profile_id=profile.id, snapshot_id=snap.pk, **fields))
+            baseline = snap
+        Session.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warframe', '0010_catalog_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Session',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('time_played_seconds', models.BigIntegerField(default=0)),
+                ('kills', models.BigIntegerField(default=0)),
+                ('missions_completed', models.IntegerField(default=0)),
+                ('mastery_rank', models.IntegerField(default=0)),
+                ('mastery_rank_gained', models.IntegerField(default=0)),
+                ('standing', models.JSONField(blank=True, default=dict)),
+                ('standing_gained', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='warframe.profile')),
+                ('snapshot', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='session', to='warframe.snapshot')),
+            ],
+            options={
+                'ordering': ['-ended_at'],
+                'indexes': [models.Index(fields=['profile', '-ended_at'], name='warframe_se_profile_32b9c9_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_sessions, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ import uuid
 
 from django.db import models
 
+from .snapshot_delta import apply_patch
+
 
 class Profile(models.Model):
     """Warframe profile — root of the archive for one account."""
@@ -95,6 +97,40 @@ class WeaponStat(models.Model):
         return f"{self.weapon_name or self.weapon_path} ({self.kills}K)"
 
 
+class WeaponStatDelta(models.Model):
+    """How much a weapon's counters moved in one archive run.
+
+    Written only for weapons that changed, so the series is as sparse as play.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="weapon_deltas",
+    )
+    weapon_path = models.CharField(max_length=255)
+    captured_at = models.DateTimeField()
+
+    fired = models.BigIntegerField(default=0)
+    hits = models.BigIntegerField(default=0)
+    kills = models.BigIntegerField(default=0)
+    headshots = models.BigIntegerField(default=0)
+    assists = models.BigIntegerField(default=0)
+    equip_time_seconds = models.FloatField(default=0)
+    xp = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["profile", "weapon_path", "captured_at"]),
+            models.Index(fields=["profile", "captured_at"]),
+        ]
+        ordering = ["-captured_at"]
+
+    def __str__(self):
+        return f"{self.weapon_path} +{self.kills}K @ {self.captured_at:%Y-%m-%d %H:%M}"
+
+
 class MissionStat(models.Model):
     """Per-node mission completion counts."""
 
@@ -145,7 +181,12 @@ class Affiliation(models.Model):
 
 
 class Snapshot(models.Model):
-    """Timestamped snapshot of cumulative stats — for progression tracking."""
+    """Timestamped snapshot of cumulative stats — for progression tracking.
+
+    Keyframes (`keyframe` is null) keep the full fetched blob in
+    `raw_profile`; every other snapshot stores a JSON patch against its
+    keyframe in `raw_delta`. Use `full_profile()` to read the blob.
+    """
 
     TRIGGERS = [
         ("manual", "Manual"),
@@ -170,6 +211,18 @@ class Snapshot(models.Model):
     weapons_tracked = models.IntegerField(default=0)
 
     raw_profile = models.JSONField(default=dict, blank=True)
+    # Retention re-bases a keyframe's deltas before deleting it, so the cascade
+    # only takes deltas with it when the whole profile is going.
+    keyframe = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="deltas",
+    )
+    raw_delta = models.JSONField(default=list, blank=True)
+    # sha256 of the fetched profile blob; scheduled archives skip when it matches.
+    content_hash = models.CharField(max_length=64, blank=True)
 
     class Meta:
         ordering = ["-captured_at"]
@@ -177,6 +230,57 @@ class Snapshot(models.Model):
     def __str__(self):
         return f"{self.profile.display_name or self.profile.account_id} @ {self.captured_at:%Y-%m-%d}"
 
+    @property
+    def is_keyframe(self) -> bool:
+        return self.keyframe_id is None
+
+    def full_profile(self) -> dict:
+        if self.is_keyframe:
+            return self.raw_profile
+        return apply_patch(self.keyframe.raw_profile, self.raw_delta)
+
+
+class Session(models.Model):
+    """One play session, recorded when its `session_end` archive lands.
+
+    Counters are how far the profile moved since the previous session ended;
+    `standing` maps syndicate tag -> standing change for syndicates that moved.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="sessions",
+    )
+    snapshot = models.OneToOneField(
+        Snapshot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="session",
+    )
+
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+
+    time_played_seconds = models.BigIntegerField(default=0)
+    kills = models.BigIntegerField(default=0)
+    missions_completed = models.IntegerField(default=0)
+    mastery_rank = models.IntegerField(default=0)
+    mastery_rank_gained = models.IntegerField(default=0)
+    standing = models.JSONField(default=dict, blank=True)
+    standing_gained = models.BigIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["profile", "-ended_at"])]
+        ordering = ["-ended_at"]
+
+    def __str__(self):
+        return f"Session @ {self.ended_at:%Y-%m-%d %H:%M} ({self.time_played_seconds // 60}m)"
+
 
 class CatalogItem(models.Model):
     """A vendored Warframe item from the WFCD warframe-items dataset.
@@ -202,6 +306,8 @@ class CatalogItem(models.Model):
     product_category = models.CharField(max_length=100, blank=True)
 
     raw = models.JSONField(default=dict, blank=True)
+    # sha256 of the synced fields; unchanged items are skipped on re-sync.
+    content_hash = models.CharField(max_length=64, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -211,3 +317,63 @@ class CatalogItem(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.category})"
+
+
+class CatalogSource(models.Model):
+    """HTTP validators for one WFCD category file, for conditional re-fetches."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    category = models.CharField(max_length=50, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    item_count = models.IntegerField(default=0)
+
+    last_fetched = models.DateTimeField(null=True, blank=True)
+    last_changed = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["category"]
+
+    def __str__(self):
+        return self.category
+
+
+class ItemMastery(models.Model):
+    """Lifetime affinity and mastery state for one item, from XPInfo.
+
+    `item` joins on the catalog's `unique_name` without a DB constraint, so
+    XP for gear the catalog doesn't know yet is still kept.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="item_mastery",
+    )
+    item = models.ForeignKey(
+        CatalogItem,
+        to_field="unique_name",
+        db_column="unique_name",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="masteries",
+    )
+
+    xp = models.BigIntegerField(default=0)
+    mastered = models.BooleanField(default=False)
+    # Percent of the max-rank threshold, 0-100.
+    progress = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("profile", "item")]
+        indexes = [models.Index(fields=["profile", "mastered"])]
+        verbose_name_plural = "item mastery"
+
+    def __str__(self):
+        return f"{self.item_id}: {self.progress}%"
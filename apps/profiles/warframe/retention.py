@@ -0,0 +1,113 @@
+"""Snapshot retention for the Warframe archive.
+
+Mid-session archives add up to 48 snapshots a day. `prune_snapshots` thins
+older ones by age tier:
+
+- newer than KEEP_ALL_DAYS: everything
+- up to PER_SESSION_DAYS: one per session (its session_end snapshot)
+- up to PER_DAY_DAYS: plus the latest snapshot of each day
+- older: plus the latest snapshot of each week
+
+Session-end snapshots are never pruned (the progression summary counts
+them), nor are the profile's first and last snapshots (they anchor the
+velocity math). Deletes run in short batches by primary key, so readers are
+never blocked behind one long transaction.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Profile
+from .models import Snapshot
+from .snapshot_delta import apply_patch
+from .snapshot_delta import make_patch
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALL_DAYS = 7
+PER_SESSION_DAYS = 30
+PER_DAY_DAYS = 365
+BATCH_SIZE = 500
+
+
+def snapshots_to_prune(rows: list[tuple], now: datetime) -> list:
+    """Ids to delete from (id, captured_at, trigger) rows, ordered oldest first."""
+    if len(rows) <= 2:
+        return []
+
+    keep_all_after = now - timedelta(days=KEEP_ALL_DAYS)
+    per_session_after = now - timedelta(days=PER_SESSION_DAYS)
+    per_day_after = now - timedelta(days=PER_DAY_DAYS)
+
+    keep = {rows[0][0], rows[-1][0]}
+    latest_in_period: dict[tuple, object] = {}
+    for pk, captured_at, trigger in rows:
+        if trigger == "session_end" or captured_at >= keep_all_after:
+            keep.add(pk)
+        elif captured_at >= per_session_after:
+            continue
+        elif captured_at >= per_day_after:
+            latest_in_period[("day", captured_at.date())] = pk
+        else:
+            latest_in_period[("week", *captured_at.isocalendar()[:2])] = pk
+    keep.update(latest_in_period.values())
+
+    return [pk for pk, _, _ in rows if pk not in keep]
+
+
+def _rebase_deltas(keyframe: Snapshot, survivors: list[Snapshot]) -> None:
+    """Make the earliest survivor a keyframe and re-patch the rest against it."""
+    blobs = [apply_patch(keyframe.raw_profile, s.raw_delta) for s in survivors]
+    head = survivors[0]
+    head.keyframe = None
+    head.raw_profile = blobs[0]
+    head.raw_delta = []
+    head.save(update_fields=["keyframe", "raw_profile", "raw_delta"])
+    for snap, blob in zip(survivors[1:], blobs[1:], strict=True):
+        snap.keyframe = head
+        snap.raw_delta = make_patch(head.raw_profile, blob)
+        snap.save(update_fields=["keyframe", "raw_delta"])
+
+
+def prune_snapshots(profile: Profile, now: datetime) -> int:
+    """Apply the retention policy to one profile's snapshots; returns rows deleted."""
+    rows = list(
+        profile.snapshots.order_by("captured_at").values_list(
+            "id", "captured_at", "trigger"
+        )
+    )
+    doomed = snapshots_to_prune(rows, now)
+    if not doomed:
+        return 0
+
+    keyframe_ids = set(
+        Snapshot.objects.filter(pk__in=doomed, keyframe__isnull=True).values_list(
+            "pk", flat=True
+        )
+    )
+    deleted = 0
+
+    # Deltas first: nothing depends on them.
+    deltas = [pk for pk in doomed if pk not in keyframe_ids]
+    for start in range(0, len(deltas), BATCH_SIZE):
+        with transaction.atomic():
+            deleted += Snapshot.objects.filter(
+                pk__in=deltas[start : start + BATCH_SIZE]
+            ).delete()[0]
+
+    # A keyframe can only go once its surviving deltas are re-based.
+    for pk in keyframe_ids:
+        with transaction.atomic():
+            keyframe = Snapshot.objects.select_for_update().get(pk=pk)
+            survivors = list(keyframe.deltas.order_by("captured_at"))
+            if survivors:
+                _rebase_deltas(keyframe, survivors)
+            deleted += Snapshot.objects.filter(pk=pk).delete()[0]
+
+    logger.info("Pruned %d Warframe snapshots for %s", deleted, profile)
+    return deleted
@@ -0,0 +1,101 @@
+"""Session ledger for the Warframe archive.
+
+Every `session_end` archive records a Session: how far the cumulative
+counters moved since the previous session ended (or, for the first one, since
+the earliest snapshot). Session views and weekly rollups read these rows
+instead of re-diffing snapshots.
+
+The API has no session start time, so `started_at` is estimated as the end
+minus in-game time played, never earlier than the previous session's end.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from .models import Profile
+from .models import Session
+from .models import Snapshot
+
+# Snapshot columns a session diffs, as (snapshot field, session field).
+SESSION_COUNTERS = (
+    ("time_played_seconds", "time_played_seconds"),
+    ("total_weapon_kills", "kills"),
+    ("missions_completed", "missions_completed"),
+    ("mastery_rank", "mastery_rank_gained"),
+)
+SNAPSHOT_FIELDS = ("captured_at", *(f for f, _ in SESSION_COUNTERS))
+
+
+def standings(blob: dict) -> dict[str, int] | None:
+    """Standing per syndicate in a fetched profile blob; None if it has no profile."""
+    results = (blob or {}).get("Results")
+    if not results:
+        return None
+    return {
+        a["Tag"]: int(a.get("Standing", 0) or 0)
+        for a in results[0].get("Affiliations") or []
+        if a.get("Tag")
+    }
+
+
+def session_fields(
+    baseline: dict,
+    end: dict,
+    standing_before: dict[str, int] | None,
+    standing_after: dict[str, int] | None,
+) -> dict:
+    """Session column values between two snapshots (dicts of SNAPSHOT_FIELDS)."""
+    fields = {
+        session_field: end[field] - baseline[field]
+        for field, session_field in SESSION_COUNTERS
+    }
+    standing = {}
+    if standing_before is not None and standing_after is not None:
+        for tag in sorted(standing_before.keys() | standing_after.keys()):
+            moved = standing_after.get(tag, 0) - standing_before.get(tag, 0)
+            if moved:
+                standing[tag] = moved
+
+    ended_at = end["captured_at"]
+    started_at = max(
+        baseline["captured_at"],
+        ended_at - timedelta(seconds=fields["time_played_seconds"]),
+    )
+    return {
+        **fields,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "mastery_rank": end["mastery_rank"],
+        "standing": standing,
+        "standing_gained": sum(standing.values()),
+    }
+
+
+def session_baseline(profile: Profile, snapshot: Snapshot) -> Snapshot | None:
+    """The snapshot a session ending at `snapshot` is measured from."""
+    earlier = profile.snapshots.filter(captured_at__lt=snapshot.captured_at)
+    return (
+        earlier.filter(trigger="session_end").order_by("-captured_at").first()
+        or earlier.order_by("captured_at").first()
+    )
+
+
+def record_session(profile: Profile, snapshot: Snapshot, data: dict) -> Session | None:
+    """Record the session ending at `snapshot` (whose fetched blob is `data`).
+
+    Returns None on a profile's first snapshot: there's nothing to measure from.
+    """
+    baseline = session_baseline(profile, snapshot)
+    if baseline is None:
+        return None
+    fields = session_fields(
+        {f: getattr(baseline, f) for f in SNAPSHOT_FIELDS},
+        {f: getattr(snapshot, f) for f in SNAPSHOT_FIELDS},
+        standings(baseline.full_profile()),
+        standings(data),
+    )
+    session, _ = Session.objects.update_or_create(
+        snapshot=snapshot, defaults={"profile": profile, **fields}
+    )
+    return session
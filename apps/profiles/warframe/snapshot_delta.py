@@ -0,0 +1,102 @@
+"""Delta storage for Warframe snapshots.
+
+Most snapshots store only an RFC 6902 JSON patch against the most recent
+keyframe (a snapshot that keeps the full blob), so each one costs roughly what
+changed since that keyframe. A fresh keyframe is written every
+`KEYFRAME_EVERY` snapshots, or sooner once the patch stops paying for itself.
+
+Patching against the keyframe rather than the previous snapshot keeps every
+rebuild to a single patch, and lets any delta snapshot be deleted without
+re-basing its neighbours.
+
+Only the operations `make_patch` emits (add / remove / replace) are supported.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any
+
+# ~a day of 30-minute mid-session archives.
+KEYFRAME_EVERY = 48
+# Store a keyframe instead once the patch is over this fraction of the blob.
+MAX_DELTA_RATIO = 0.5
+
+
+def _escape(token: str | int) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> list[dict]:
+    """JSON patch ops turning `old` into `new`.
+
+    Dicts are diffed key by key and lists index by index (tail appends and
+    truncations become add/remove), so a stat ticking up is one small op.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [
+            {"op": "remove", "path": f"{path}/{_escape(k)}"}
+            for k in old
+            if k not in new
+        ]
+        for k, value in new.items():
+            child = f"{path}/{_escape(k)}"
+            if k in old:
+                ops.extend(make_patch(old[k], value, child))
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old), len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        return ops
+
+    # `type` check keeps True vs 1 (equal in Python) from being dropped.
+    if type(old) is not type(new) or old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(doc: Any, ops: list[dict]) -> Any:
+    """Apply `make_patch` output to a copy of `doc`."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        if op["path"] == "":
+            doc = copy.deepcopy(op.get("value"))
+            continue
+        *parents, last = [_unescape(t) for t in op["path"][1:].split("/")]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+
+        key: str | int = int(last) if isinstance(target, list) else last
+        if op["op"] == "remove":
+            del target[key]
+        elif op["op"] == "add" and isinstance(target, list):
+            target.insert(key, copy.deepcopy(op["value"]))
+        else:
+            target[key] = copy.deepcopy(op["value"])
+    return doc
+
+
+def delta_against(
+    keyframe: dict | None, deltas_since: int, data: dict
+) -> list[dict] | None:
+    """The patch to store for `data`, or None if it should be a new keyframe."""
+    if keyframe is None or deltas_since >= KEYFRAME_EVERY - 1:
+        return None
+    patch = make_patch(keyframe, data)
+    if len(json.dumps(patch)) > len(json.dumps(data)) * MAX_DELTA_RATIO:
+        return None
+    return patch
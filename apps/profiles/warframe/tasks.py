@@ -1,23 +1,21 @@
 """Celery tasks for the Warframe archive.
 
-The `poll_steam_warframe` task is scheduled every 5 minutes via Celery
-beat (see `config/celery.py`). It detects Warframe session transitions
-via the Steam Web API and triggers an archive on session end.
+Session detection and session-end archiving run through the shared Steam
+poller (`apps/integrations/tasks.py`, registered in `steam_sessions.py`).
 
 `check_warframe_staleness` runs daily as a safety net — it alerts (Sentry +
 event) if the archive has gone stale despite recent play, catching silent
 failures like an upstream endpoint moving.
+
+`prune_snapshots` runs daily to thin old snapshots by age tier (see
+`retention.py`).
 """
 
 from __future__ import annotations
 
-import asyncio
 import logging
-import time
 from datetime import datetime
 
-import httpx
-import redis
 import sentry_sdk
 from celery import shared_task
 from django.conf import settings
@@ -25,119 +23,12 @@ from django.core.management import call_command
 from django.utils import timezone
 
 from apps.integrations.steam import SteamClient
+from apps.integrations.steam_sessions import get_poller
 from apps.profiles.warframe.events import publish_warframe_event
 
 logger = logging.getLogger(__name__)
 
-STATE_KEY = "questlog:steam:warframe_state"
-STATE_TTL = 3600  # 1 hour — auto-resets if polling stops
 STALENESS_THRESHOLD_HOURS = 48
-LAST_ARCHIVE_KEY = "questlog:steam:warframe_last_archive"
-# Archive at most this often during an active session — conservative vs DE's
-# unofficial endpoint (the home IP also logs into the game). ~2 calls/hour.
-PERIODIC_INTERVAL = 1800  # 30 minutes
-
-
-@shared_task(bind=True, ignore_result=True, name="apps.profiles.warframe.tasks.poll_steam_warframe")
-def poll_steam_warframe(self):
-    """Detect Warframe session transitions and trigger archive on session end.
-
-    Logic:
-        1. Ask Steam whether we're currently in Warframe
-        2. Compare against previous state in Redis
-        3. On `playing -> not_playing`, invoke `archive_warframe --trigger=session_end`
-        4. Always refresh the state key TTL
-    """
-    if not settings.STEAM_API_KEY or not settings.STEAM_ID:
-        logger.info("STEAM_API_KEY or STEAM_ID not set, skipping Warframe poll")
-        return
-
-    try:
-        current_state = _check_current_state()
-    except httpx.TransportError as exc:
-        # Transient network blip reaching Steam — skip this tick. The state key
-        # is left untouched, so a real session transition is still caught on a
-        # later poll. The daily staleness check is the backstop.
-        logger.warning("Steam poll skipped — transient network error: %s", exc)
-        return
-    except httpx.HTTPStatusError as exc:
-        # Upstream 5xx (Steam hiccup, e.g. 502) — skip like a network blip. A
-        # 4xx is a real problem (bad API key, revoked access), so let it surface.
-        if exc.response.status_code >= 500:
-            logger.warning("Steam poll skipped — upstream %s", exc.response.status_code)
-            return
-        raise
-
-    redis_client = redis.from_url(settings.REDIS_URL)
-
-    previous_raw = redis_client.get(STATE_KEY)
-    previous_state = previous_raw.decode() if previous_raw else None
-
-    logger.info("Steam state: previous=%s, current=%s", previous_state, current_state)
-
-    if previous_state == current_state:
-        redis_client.set(STATE_KEY, current_state, ex=STATE_TTL)
-        # Still in a session — refresh the grind data periodically so it stays
-        # current while the user is actively mastering things.
-        if current_state == "playing":
-            _maybe_periodic_archive(redis_client)
-        return
-
-    redis_client.set(STATE_KEY, current_state, ex=STATE_TTL)
-
-    if current_state == "playing":
-        logger.info("Warframe session detected")
-        publish_warframe_event(
-            "warframe:session_detected",
-            {"steam_id": settings.STEAM_ID},
-        )
-        return
-
-    if current_state == "not_playing" and previous_state == "playing":
-        logger.info("Warframe session ended — triggering archive")
-        publish_warframe_event(
-            "warframe:session_end",
-            {"steam_id": settings.STEAM_ID},
-        )
-        _run_archive(redis_client, "session_end", raise_on_error=True)
-
-
-def _maybe_periodic_archive(redis_client) -> None:
-    """Archive mid-session if PERIODIC_INTERVAL has elapsed since the last one."""
-    last_raw = redis_client.get(LAST_ARCHIVE_KEY)
-    last_ts = int(last_raw) if last_raw else 0
-    if time.time() - last_ts < PERIODIC_INTERVAL:
-        return
-    logger.info("Periodic mid-session archive")
-    _run_archive(redis_client, "scheduled", raise_on_error=False)
-
-
-def _run_archive(redis_client, trigger: str, *, raise_on_error: bool) -> None:
-    """Run archive_warframe, stamp the last-archive time, surface failures.
-
-    Periodic runs swallow errors (the next poll retries); session-end re-raises
-    so the failure is loud (Sentry + a failed Celery task).
-    """
-    try:
-        call_command("archive_warframe", trigger=trigger)
-        redis_client.set(LAST_ARCHIVE_KEY, int(time.time()))
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("archive_warframe failed (trigger=%s)", trigger)
-        sentry_sdk.capture_exception(exc)
-        publish_warframe_event("warframe:archive_failed", {"error": str(exc)})
-        if raise_on_error:
-            raise
-
-
-def _check_current_state() -> str:
-    """Run the async Steam check in a sync context (Celery tasks are sync)."""
-    return asyncio.run(_check_current_state_async())
-
-
-async def _check_current_state_async() -> str:
-    client = SteamClient()
-    playing = await client.is_playing(settings.STEAM_ID, SteamClient.WARFRAME_APPID)
-    return "playing" if playing else "not_playing"
 
 
 def staleness_alert_needed(
@@ -160,12 +51,9 @@ def staleness_alert_needed(
 
 
 def _warframe_played_recently() -> bool:
-    return asyncio.run(_warframe_played_recently_async())
-
-
-async def _warframe_played_recently_async() -> bool:
-    client = SteamClient()
-    games = await client.get_recent_games(settings.STEAM_ID)
+    # Reuse the Steam poller's loop and HTTP pool rather than spinning up new ones.
+    poller = get_poller()
+    games = poller.run(poller.steam.get_recent_games(settings.STEAM_ID))
     return any(
         str(g.get("appid")) == str(SteamClient.WARFRAME_APPID)
         and (g.get("playtime_2weeks", 0) or 0) > 0
@@ -212,10 +100,22 @@ def check_warframe_staleness(self):
 def sync_catalog(self):
     """Refresh the WFCD item catalog weekly so newly-released frames classify.
 
-    Idempotent — update_or_create on uniqueName. Logs and swallows errors so a
-    transient GitHub/network failure never crashes the beat worker.
+    Idempotent, and conditional per category file — an idle upstream costs a
+    304 each. Logs and swallows errors so a transient GitHub/network failure
+    never crashes the beat worker.
     """
     try:
         call_command("sync_warframe_catalog")
     except Exception:  # noqa: BLE001
         logger.exception("sync_warframe_catalog failed")
+
+
+@shared_task(bind=True, ignore_result=True, name="apps.profiles.warframe.tasks.prune_snapshots")
+def prune_snapshots(self):
+    """Apply the snapshot retention policy to every Warframe profile."""
+    from apps.profiles.warframe.models import Profile
+    from apps.profiles.warframe.retention import prune_snapshots as prune_profile
+
+    now = timezone.now()
+    for profile in Profile.objects.all():
+        prune_profile(profile, now)
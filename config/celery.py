@@ -21,14 +21,18 @@ app.autodiscover_tasks()
 app.conf.beat_scheduler = "celery.beat:Scheduler"
 
 app.conf.beat_schedule = {
-    "poll-steam-warframe": {
-        "task": "apps.profiles.warframe.tasks.poll_steam_warframe",
+    "poll-steam-sessions": {
+        "task": "apps.integrations.tasks.poll_steam_sessions",
         "schedule": 300.0,  # Every 5 minutes
     },
     "sync-warframe-catalog": {
         "task": "apps.profiles.warframe.tasks.sync_catalog",
         "schedule": crontab(day_of_week=0, hour=4, minute=0),  # Sundays 04:00 UTC
     },
+    "prune-warframe-snapshots": {
+        "task": "apps.profiles.warframe.tasks.prune_snapshots",
+        "schedule": crontab(hour=5, minute=0),  # Daily 05:00 UTC
+    },
     "check-warframe-staleness": {
         "task": "apps.profiles.warframe.tasks.check_warframe_staleness",
         "schedule": crontab(hour=12, minute=0),  # Daily 12:00 UTC
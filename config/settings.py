@@ -83,6 +83,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # Local apps
+    "apps.integrations",
     "apps.library",
     "apps.journal",
     "apps.lists",
@@ -222,6 +223,11 @@ STEAM_RATE_LIMIT = 4  # requests per second
 WARFRAME_ACCOUNT_ID = env("WARFRAME_ACCOUNT_ID", default="")
 WARFRAME_PLATFORM = env("WARFRAME_PLATFORM", default="pc")
 
+# IronMON live events (Synthform XADDs to this stream on synthcore Redis)
+IRONMON_REDIS_URL = env("IRONMON_REDIS_URL", default=REDIS_URL)
+IRONMON_STREAM = env("IRONMON_STREAM", default="events:synthform:ironmon")
+IRONMON_STREAM_GROUP = env("IRONMON_STREAM_GROUP", default="questlog")
+
 # Celery
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
@@ -23,6 +23,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 sys.path.insert(0, str(Path(__file__).parent.parent))
 django.setup()
 
+from apps.profiles.ironmon.funnel import rebuild_funnel  # noqa: E402
 from apps.profiles.ironmon.models import Challenge
 from apps.profiles.ironmon.models import Checkpoint
 from apps.profiles.ironmon.models import CheckpointResult
@@ -116,6 +117,9 @@ def import_ironmon():
 
     print(f"  Updated {updated} runs with highest checkpoint")
 
+    # Bulk inserts bypass the funnel counters
+    print(f"  Rebuilt {rebuild_funnel()} checkpoint funnel rows")
+
     # Summary
     print("\nImport complete!")
     print(f"  Challenges: {Challenge.objects.count()}")
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 import pytest
+from django.core.cache import cache
 from django.test import Client
+from django.utils import timezone
 
 from apps.library.models import Edition
 from apps.library.models import Franchise
@@ -15,12 +19,16 @@ from apps.profiles.destiny.models import CarnageReport as DestinyCarnageReport
 from apps.profiles.destiny.models import CarnageReportEntry as DestinyCarnageReportEntry
 from apps.profiles.destiny.models import Character as DestinyCharacter
 from apps.profiles.destiny.models import Profile as DestinyProfile
+from apps.profiles.warframe import catalog_index
+from apps.profiles.warframe.mastery import refresh_item_mastery
 from apps.profiles.warframe.models import Affiliation as WarframeAffiliation
 from apps.profiles.warframe.models import CatalogItem as WarframeCatalogItem
 from apps.profiles.warframe.models import MissionStat as WarframeMissionStat
 from apps.profiles.warframe.models import Profile as WarframeProfile
+from apps.profiles.warframe.models import Session as WarframeSession
 from apps.profiles.warframe.models import Snapshot as WarframeSnapshot
 from apps.profiles.warframe.models import WeaponStat as WarframeWeaponStat
+from apps.profiles.warframe.models import WeaponStatDelta as WarframeWeaponStatDelta
 
 TEST_API_KEY = "test-api-key"
 
@@ -36,6 +44,22 @@ def _set_api_key(settings):
     settings.API_KEY = TEST_API_KEY
 
 
+@pytest.fixture(autouse=True)
+def _locmem_cache(settings):
+    """Per-test in-process cache so cached responses never leak between tests."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_catalog_index(monkeypatch):
+    """Start every test without a process-cached Warframe catalog index."""
+    monkeypatch.setattr(catalog_index, "_cached", None)
+
+
 @pytest.fixture
 def auth_headers():
     return {"HTTP_AUTHORIZATION": f"Bearer {TEST_API_KEY}"}
@@ -298,6 +322,54 @@ def warframe_weapons(db, warframe_profile):
     ]
 
 
+@pytest.fixture
+def warframe_weapon_deltas(db, warframe_weapons):
+    """Daily gains for a few weapons; one falls outside the last week."""
+    now = timezone.now()
+    rows = [
+        (warframe_weapons[0], now - timedelta(days=1), 30),
+        (warframe_weapons[0], now - timedelta(days=1, hours=1), 20),
+        (warframe_weapons[0], now - timedelta(days=3), 5),
+        (warframe_weapons[1], now - timedelta(days=2), 40),
+        (warframe_weapons[2], now - timedelta(days=20), 500),
+    ]
+    return WarframeWeaponStatDelta.objects.bulk_create(
+        WarframeWeaponStatDelta(
+            profile=weapon.profile,
+            weapon_path=weapon.weapon_path,
+            captured_at=at,
+            kills=kills,
+            fired=kills * 3,
+        )
+        for weapon, at, kills in rows
+    )
+
+
+@pytest.fixture
+def warframe_sessions(db, warframe_profile):
+    """Three sessions: two this week, one a month ago."""
+    now = timezone.now()
+    rows = [
+        (now - timedelta(hours=2), 7200, 300, {"CetusSyndicate": 2000}),
+        (now - timedelta(days=1), 3600, 100, {}),
+        (now - timedelta(days=30), 1800, 50, {"SolarisSyndicate": -500}),
+    ]
+    return WarframeSession.objects.bulk_create(
+        WarframeSession(
+            profile=warframe_profile,
+            started_at=ended_at - timedelta(seconds=played),
+            ended_at=ended_at,
+            time_played_seconds=played,
+            kills=kills,
+            missions_completed=kills // 50,
+            mastery_rank=11,
+            standing=standing,
+            standing_gained=sum(standing.values()),
+        )
+        for ended_at, played, kills, standing in rows
+    )
+
+
 @pytest.fixture
 def warframe_mission(db, warframe_profile):
     return WarframeMissionStat.objects.create(
@@ -429,6 +501,7 @@ def warframe_completion_setup(db, warframe_work):
         unique_name="/Lotus/Types/Sentinels/Sentinel",
         name="Some Skin", category="Sentinels", masterable=False, max_level_cap=30,
     )
+    refresh_item_mastery(profile)
     return profile
 
 
@@ -464,6 +537,7 @@ def warframe_remaining_setup(db, warframe_work):
             masterable=True, max_level_cap=30, is_prime=prime, vaulted=vaulted,
             acquisition=acq, tags=tags,
         )
+    refresh_item_mastery(profile)
     return profile
 
 
@@ -2,6 +2,21 @@ from __future__ import annotations
 
 import pytest
 
+from apps.library.models import Work
+from apps.profiles.destiny.models import Profile
+from apps.profiles.destiny.rollups import rebuild_activity_rollups
+
+
+@pytest.fixture
+def other_destiny_profile(db):
+    """A second archived profile whose rows must not leak into the served one."""
+    return Profile.objects.create(
+        work=Work.objects.create(name="Destiny 2 (alt)", slug="destiny-2-alt"),
+        bungie_name="Alt",
+        bungie_name_code=5678,
+        membership_id="4611686018400000009",
+    )
+
 
 @pytest.mark.django_db
 class TestDestinyProfile:
@@ -192,6 +207,7 @@ class TestDestinyRaids:
             kills=40,
             deaths=5,
         )
+        rebuild_activity_rollups(destiny_profile)
 
         response = api_client.get("/api/destiny/raids/stats")
         assert response.status_code == 200
@@ -204,3 +220,294 @@ class TestDestinyRaids:
         assert data["raids"][0]["activity_name"] == "Last Wish"
         assert data["raids"][0]["attempts"] == 2
         assert data["raids"][0]["clears"] == 1
+
+    def test_raid_stats_scoped_to_served_profile(self, api_client, destiny_profile, other_destiny_profile):
+        from apps.profiles.destiny.models import ActivityRollup
+
+        for profile in (destiny_profile, other_destiny_profile):
+            ActivityRollup.objects.create(
+                profile=profile, activity_name=profile.bungie_name, mode_category="raid", attempts=1
+            )
+
+        data = api_client.get("/api/destiny/raids/stats").json()
+        assert data["total_attempts"] == 1
+        assert [r["activity_name"] for r in data["raids"]] == [Profile.objects.first().bungie_name]
+
+    def test_raid_stats_fastest_clear(self, api_client, destiny_raid_activity, destiny_profile):
+        rebuild_activity_rollups(destiny_profile)
+        response = api_client.get("/api/destiny/raids/stats")
+        assert response.json()["raids"][0]["fastest_seconds"] == 3200
+
+
+@pytest.mark.django_db
+class TestDestinyWeapons:
+    def test_weapons_empty(self, api_client):
+        response = api_client.get("/api/destiny/weapons")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_weapons_aggregate_across_reports(self, api_client, destiny_pgcr):
+        from apps.profiles.destiny.models import CarnageWeaponUsage
+
+        mine = destiny_pgcr.entries.get(is_self=True)
+        other = destiny_pgcr.entries.get(is_self=False)
+        CarnageWeaponUsage.objects.create(entry=mine, weapon_hash=1, weapon_name="Izanagi's Burden", kills=30, precision_kills=30)
+        CarnageWeaponUsage.objects.create(entry=mine, weapon_hash=2, weapon_name="Gjallarhorn", kills=80, precision_kills=0)
+        CarnageWeaponUsage.objects.create(entry=other, weapon_hash=1, weapon_name="Izanagi's Burden", kills=90, precision_kills=45)
+
+        data = api_client.get("/api/destiny/weapons").json()
+        assert [w["weapon_name"] for w in data] == ["Gjallarhorn", "Izanagi's Burden"]
+        assert data[1]["precision_rate"] == 1.0
+        assert data[1]["activities"] == 1
+
+        data = api_client.get("/api/destiny/weapons?self_only=false").json()
+        assert data[0]["weapon_name"] == "Izanagi's Burden"
+        assert data[0]["kills"] == 120
+        assert data[0]["precision_kills"] == 75
+
+        assert api_client.get("/api/destiny/weapons?mode_category=pvp").json() == []
+
+    def test_weapons_scoped_to_served_profile(self, api_client, destiny_pgcr, other_destiny_profile):
+        from django.utils import timezone
+
+        from apps.profiles.destiny.models import Activity
+        from apps.profiles.destiny.models import CarnageReport
+        from apps.profiles.destiny.models import CarnageWeaponUsage
+        from apps.profiles.destiny.models import Character
+
+        alt = Activity.objects.create(
+            profile=other_destiny_profile,
+            character=Character.objects.create(profile=other_destiny_profile, character_id="2305843009300000009"),
+            instance_id="alt1",
+            activity_hash=1,
+            mode_category="raid",
+            period=timezone.now(),
+        )
+        alt_report = CarnageReport.objects.create(activity=alt, instance_id="alt1", period=alt.period)
+        for profile, report in ((destiny_pgcr.activity.profile, destiny_pgcr), (other_destiny_profile, alt_report)):
+            entry = report.entries.create(membership_id=profile.membership_id, is_self=True)
+            CarnageWeaponUsage.objects.create(entry=entry, weapon_hash=1, weapon_name=profile.bungie_name, kills=10)
+
+        data = api_client.get("/api/destiny/weapons").json()
+        assert [(w["weapon_name"], w["kills"]) for w in data] == [(Profile.objects.first().bungie_name, 10)]
+
+
+@pytest.mark.django_db
+class TestDestinyFireteam:
+    def test_fireteam_empty(self, api_client):
+        response = api_client.get("/api/destiny/fireteam")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_fireteam(self, api_client, destiny_pgcr, destiny_profile):
+        from apps.profiles.destiny.rollups import rebuild_co_players
+
+        rebuild_co_players(destiny_profile)
+        data = api_client.get("/api/destiny/fireteam").json()
+        assert len(data) == 1
+        assert data[0]["display_name"] == "Fireteam Mate"
+        assert data[0]["activities_together"] == 1
+        assert data[0]["clears_together"] == 1
+
+    def test_fireteam_scoped_to_served_profile(self, api_client, destiny_profile, other_destiny_profile):
+        from django.utils import timezone
+
+        from apps.profiles.destiny.models import CoPlayer
+
+        for profile in (destiny_profile, other_destiny_profile):
+            CoPlayer.objects.create(
+                profile=profile, membership_id="1", display_name=profile.bungie_name, last_seen=timezone.now()
+            )
+
+        data = api_client.get("/api/destiny/fireteam").json()
+        assert [c["display_name"] for c in data] == [Profile.objects.first().bungie_name]
+
+
+@pytest.mark.django_db
+class TestDestinyTriumphs:
+    @pytest.fixture
+    def nodes(self, destiny_profile):
+        from apps.profiles.destiny.models import PresentationNodeProgress
+
+        for node_hash, name, parent, completed, total in [
+            (1, "Triumphs", None, 30, 40),
+            (10, "Raids", 1, 25, 30),
+            (11, "Seasons", 1, 5, 10),
+        ]:
+            PresentationNodeProgress.objects.create(
+                profile=destiny_profile,
+                kind="records",
+                node_hash=node_hash,
+                name=name,
+                parent_node_hash=parent,
+                completed=completed,
+                total=total,
+            )
+
+    def test_triumphs_empty(self, api_client):
+        response = api_client.get("/api/destiny/triumphs")
+        assert response.status_code == 200
+        assert response.json()["nodes"] == []
+        assert response.json()["percent"] == 0.0
+
+    def test_triumphs_roots(self, api_client, nodes):
+        data = api_client.get("/api/destiny/triumphs").json()
+        assert [n["name"] for n in data["nodes"]] == ["Triumphs"]
+        assert data["percent"] == 75.0
+
+    def test_triumphs_drill_down(self, api_client, nodes):
+        data = api_client.get("/api/destiny/triumphs?parent_node_hash=1").json()
+        assert [n["name"] for n in data["nodes"]] == ["Raids", "Seasons"]
+        assert data["nodes"][1]["percent"] == 50.0
+        assert (data["completed"], data["total"]) == (30, 40)
+
+    def test_collections_separate_from_triumphs(self, api_client, nodes):
+        assert api_client.get("/api/destiny/collections").json()["nodes"] == []
+
+    def test_scoped_to_served_profile(self, api_client, destiny_profile, other_destiny_profile):
+        from apps.profiles.destiny.models import PresentationNodeProgress
+
+        for kind in ("records", "collectibles"):
+            for profile, completed in ((destiny_profile, 1), (other_destiny_profile, 3)):
+                PresentationNodeProgress.objects.create(
+                    profile=profile, kind=kind, node_hash=1, name=profile.bungie_name, completed=completed, total=4
+                )
+
+        served = Profile.objects.first().bungie_name
+        for path in ("/api/destiny/triumphs", "/api/destiny/collections"):
+            data = api_client.get(path).json()
+            assert [n["name"] for n in data["nodes"]] == [served]
+            assert data["total"] == 4
+
+
+@pytest.mark.django_db
+class TestDestinyModeStats:
+    def test_dungeon_stats_empty(self, api_client):
+        response = api_client.get("/api/destiny/dungeons/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["mode_category"] == "dungeon"
+        assert data["total_attempts"] == 0
+        assert data["activities"] == []
+
+    def test_trials_stats_excludes_raids(self, api_client, destiny_raid_activity, destiny_profile, destiny_character):
+        from django.utils import timezone
+
+        from apps.profiles.destiny.models import Activity
+
+        Activity.objects.create(
+            profile=destiny_profile,
+            character=destiny_character,
+            instance_id="trials1",
+            activity_hash=111,
+            activity_name="Burnout",
+            mode=84,
+            mode_category="trials",
+            period=timezone.now(),
+            completed=True,
+            kills=12,
+            deaths=4,
+        )
+        rebuild_activity_rollups(destiny_profile)
+
+        response = api_client.get("/api/destiny/trials/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_attempts"] == 1
+        assert data["total_kills"] == 12
+        assert data["activities"][0]["activity_name"] == "Burnout"
+
+
+@pytest.mark.django_db
+class TestDestinyActivityTimeline:
+    @pytest.fixture
+    def make_activity(self, destiny_profile, destiny_character):
+        from apps.profiles.destiny.models import Activity
+
+        def make(instance_id, period, **fields):
+            return Activity.objects.create(
+                profile=destiny_profile,
+                character=destiny_character,
+                instance_id=instance_id,
+                activity_hash=1,
+                activity_name="Strike",
+                mode=3,
+                mode_category=fields.pop("mode_category", "strike"),
+                period=period,
+                **fields,
+            )
+
+        return make
+
+    def test_timeline_empty(self, api_client):
+        response = api_client.get("/api/destiny/activity/timeline")
+        assert response.status_code == 200
+        assert response.json() == {"bucket": "day", "mode_category": None, "buckets": []}
+
+    def test_invalid_bucket(self, api_client):
+        response = api_client.get("/api/destiny/activity/timeline?bucket=year")
+        assert response.status_code == 422
+
+    def test_daily_buckets(self, api_client, make_activity):
+        from django.utils import timezone
+
+        now = timezone.now()
+        make_activity("a", now - timezone.timedelta(days=3), duration_seconds=600, kills=10, deaths=1)
+        make_activity("b", now - timezone.timedelta(days=3), duration_seconds=400, kills=5, deaths=2)
+        make_activity("c", now, duration_seconds=300, kills=7)
+
+        data = api_client.get("/api/destiny/activity/timeline?bucket=day").json()
+        assert [b["activities"] for b in data["buckets"]] == [2, 1]
+        assert data["buckets"][0]["seconds_played"] == 1000
+        assert data["buckets"][0]["kills"] == 15
+        assert data["buckets"][0]["deaths"] == 3
+
+    def test_mode_category_filter(self, api_client, make_activity):
+        from django.utils import timezone
+
+        make_activity("a", timezone.now())
+        make_activity("b", timezone.now(), mode_category="raid")
+
+        data = api_client.get("/api/destiny/activity/timeline?mode_category=raid").json()
+        assert data["mode_category"] == "raid"
+        assert sum(b["activities"] for b in data["buckets"]) == 1
+
+    def test_closed_buckets_cached_until_next_archive(self, api_client, make_activity, destiny_profile):
+        from django.utils import timezone
+
+        past = timezone.now() - timezone.timedelta(days=40)
+        make_activity("a", past)
+        url = "/api/destiny/activity/timeline?bucket=month"
+        assert api_client.get(url).json()["buckets"][0]["activities"] == 1
+
+        # Current bucket is always live; closed buckets come from the cache.
+        make_activity("b", past)
+        make_activity("c", timezone.now())
+        buckets = api_client.get(url).json()["buckets"]
+        assert [b["activities"] for b in buckets] == [1, 1]
+
+        # A new archive run (last_synced changes) invalidates the closed buckets.
+        destiny_profile.last_synced = timezone.now()
+        destiny_profile.save(update_fields=["last_synced"])
+        buckets = api_client.get(url).json()["buckets"]
+        assert [b["activities"] for b in buckets] == [2, 1]
+
+    def test_scoped_to_served_profile(self, api_client, make_activity, other_destiny_profile):
+        from django.utils import timezone
+
+        from apps.profiles.destiny.models import Activity
+        from apps.profiles.destiny.models import Character
+
+        past = timezone.now() - timezone.timedelta(days=40)
+        make_activity("a", past)
+        Activity.objects.create(
+            profile=other_destiny_profile,
+            character=Character.objects.create(profile=other_destiny_profile, character_id="2305843009300000009"),
+            instance_id="alt1",
+            activity_hash=1,
+            period=past,
+        )
+
+        served = Profile.objects.first()
+        buckets = api_client.get("/api/destiny/activity/timeline?bucket=month").json()["buckets"]
+        assert [b["activities"] for b in buckets] == [served.activities.count()]
@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+
+from apps.profiles.destiny.management.commands.archive_destiny import build_aggregate
+from apps.profiles.destiny.management.commands.archive_destiny import (
+    extract_weapon_usage,
+)
+from apps.profiles.destiny.management.commands.archive_destiny import played_watermark
+from apps.profiles.destiny.management.commands.archive_destiny import save_aggregates
+from apps.profiles.destiny.management.commands.archive_destiny import store_pgcr
+from apps.profiles.destiny.management.commands.archive_destiny import watermark_changes
+from apps.profiles.destiny.models import Activity
+from apps.profiles.destiny.models import ActivityRollup
+from apps.profiles.destiny.models import AggregateStats
+from apps.profiles.destiny.models import CarnageWeaponUsage
+from apps.profiles.destiny.models import CoPlayer
+from apps.profiles.destiny.models import PresentationNodeProgress
+from apps.profiles.destiny.models import RecordState
+from apps.profiles.destiny.rollups import apply_activity_rollups
+from apps.profiles.destiny.rollups import rebuild_activity_rollups
+from apps.profiles.destiny.rollups import rebuild_co_players
+from apps.profiles.destiny.triumphs import sync_triumphs
+
+
+def _all_time(kills: int) -> dict:
+    return {
+        "kills": {"basic": {"value": kills}},
+        "fastestCompletionMs": {"basic": {"value": 90_000}},
+    }
+
+
+@pytest.mark.django_db
+class TestBuildAggregate:
+    def test_maps_stats_and_converts_fastest_completion(self, destiny_profile):
+        row = build_aggregate(destiny_profile, None, "account", "raid", _all_time(10))
+        assert row.kills == 10
+        assert row.fastest_completion == 90.0  # ms -> seconds
+        assert row.character is None
+
+
+@pytest.mark.django_db
+class TestSaveAggregates:
+    @pytest.fixture(autouse=True)
+    def _needs_nulls_not_distinct(self):
+        # The upsert targets a NULLS NOT DISTINCT constraint (PostgreSQL 15+).
+        if not connection.features.supports_nulls_distinct_unique_constraints:
+            pytest.skip("requires NULLS NOT DISTINCT unique constraints")
+
+    def test_character_rows_update_in_place(self, destiny_profile, destiny_character):
+        save_aggregates(
+            [
+                build_aggregate(
+                    destiny_profile,
+                    destiny_character,
+                    "character",
+                    "raid",
+                    _all_time(10),
+                )
+            ]
+        )
+        save_aggregates(
+            [
+                build_aggregate(
+                    destiny_profile,
+                    destiny_character,
+                    "character",
+                    "raid",
+                    _all_time(25),
+                )
+            ]
+        )
+
+        rows = AggregateStats.objects.filter(scope="character", mode="raid")
+        assert rows.count() == 1
+        assert rows.get().kills == 25
+
+    def test_account_rows_update_in_place(self, destiny_profile):
+        # character=NULL rows must collide too, or every run would duplicate them.
+        save_aggregates(
+            [build_aggregate(destiny_profile, None, "account", "allPvE", _all_time(10))]
+        )
+        save_aggregates(
+            [build_aggregate(destiny_profile, None, "account", "allPvE", _all_time(99))]
+        )
+
+        rows = AggregateStats.objects.filter(scope="account", mode="allPvE")
+        assert rows.count() == 1
+        assert rows.get().kills == 99
+
+
+def _activity(profile, character, instance_id: str, **fields) -> Activity:
+    from django.utils import timezone
+
+    defaults = {
+        "activity_hash": 260765522,
+        "activity_name": "Last Wish",
+        "mode": 4,
+        "mode_category": "raid",
+        "period": timezone.now(),
+    }
+    defaults.update(fields)
+    return Activity.objects.create(
+        profile=profile, character=character, instance_id=instance_id, **defaults
+    )
+
+
+@pytest.mark.django_db
+class TestActivityRollups:
+    def test_incremental_matches_rebuild(self, destiny_profile, destiny_character):
+        first = [
+            _activity(
+                destiny_profile,
+                destiny_character,
+                "1",
+                completed=True,
+                duration_seconds=3000,
+                kills=100,
+                deaths=2,
+            ),
+            _activity(
+                destiny_profile,
+                destiny_character,
+                "2",
+                completed=False,
+                duration_seconds=900,
+                kills=30,
+                deaths=6,
+            ),
+        ]
+        apply_activity_rollups(destiny_profile, first)
+        second = [
+            _activity(
+                destiny_profile,
+                destiny_character,
+                "3",
+                completed=True,
+                duration_seconds=2500,
+                kills=90,
+                deaths=1,
+            ),
+        ]
+        apply_activity_rollups(destiny_profile, second)
+
+        rollup = ActivityRollup.objects.get(activity_name="Last Wish")
+        assert rollup.attempts == 3
+        assert rollup.clears == 2
+        assert rollup.fastest_clear_seconds == 2500
+        assert rollup.kills == 220
+        assert rollup.deaths == 9
+
+        incremental = {
+            f: getattr(rollup, f)
+            for f in ("attempts", "clears", "fastest_clear_seconds", "kills", "deaths")
+        }
+        rebuild_activity_rollups(destiny_profile)
+        rebuilt = ActivityRollup.objects.get(activity_name="Last Wish")
+        assert {f: getattr(rebuilt, f) for f in incremental} == incremental
+
+    def test_empty_batch_is_noop(self, destiny_profile):
+        assert apply_activity_rollups(destiny_profile, []) == 0
+        assert not ActivityRollup.objects.exists()
+
+
+def _pgcr_entry(
+    membership_id: str,
+    weapons: list[tuple[int, int, int]],
+    kills: int = 0,
+    name: str = "Guardian",
+    completed: bool = True,
+) -> dict:
+    return {
+        "characterId": "2305843009301234567",
+        "player": {
+            "destinyUserInfo": {
+                "membershipId": membership_id,
+                "membershipType": 3,
+                "displayName": name,
+            },
+            "characterClass": "Warlock",
+            "lightLevel": 1810,
+        },
+        "values": {
+            "kills": {"basic": {"value": kills}},
+            "completed": {"basic": {"value": 1 if completed else 0}},
+        },
+        "extended": {
+            "weapons": [
+                {
+                    "referenceId": h,
+                    "values": {
+                        "uniqueWeaponKills": {"basic": {"value": k}},
+                        "uniqueWeaponPrecisionKills": {"basic": {"value": p}},
+                    },
+                }
+                for h, k, p in weapons
+            ]
+        },
+    }
+
+
+class TestExtractWeaponUsage:
+    def test_reads_extended_weapons(self):
+        entry = _pgcr_entry("1", [(1363886209, 40, 12), (2919334548, 5, 0)])
+        assert extract_weapon_usage(entry) == [
+            {"weapon_hash": 1363886209, "kills": 40, "precision_kills": 12},
+            {"weapon_hash": 2919334548, "kills": 5, "precision_kills": 0},
+        ]
+
+    def test_missing_extended_block(self):
+        assert extract_weapon_usage({"values": {}}) == []
+
+
+@pytest.mark.django_db
+class TestStorePgcr:
+    def test_writes_entries_and_weapon_usage(
+        self, destiny_profile, destiny_raid_activity
+    ):
+        data = {
+            "period": "2026-10-01T20:00:00Z",
+            "entries": [
+                _pgcr_entry(
+                    destiny_profile.membership_id, [(1363886209, 40, 12)], kills=40
+                ),
+                _pgcr_entry(
+                    "4611686018400000001",
+                    [(1363886209, 10, 1), (2919334548, 7, 0)],
+                    kills=17,
+                ),
+            ],
+        }
+        report = store_pgcr(destiny_profile, destiny_raid_activity, data)
+
+        entries = list(report.entries.order_by("-kills"))
+        assert [e.is_self for e in entries] == [True, False]
+        assert CarnageWeaponUsage.objects.count() == 3
+        mine = CarnageWeaponUsage.objects.get(entry__is_self=True)
+        assert (mine.weapon_hash, mine.kills, mine.precision_kills) == (
+            1363886209,
+            40,
+            12,
+        )
+        assert mine.weapon_name == ""
+
+    def test_entries_stored_once(self, destiny_profile, destiny_raid_activity):
+        data = {
+            "period": "2026-10-01T20:00:00Z",
+            "activityDetails": {"instanceId": destiny_raid_activity.instance_id},
+            "entries": [
+                _pgcr_entry("4611686018400000001", [], kills=5),
+                _pgcr_entry(destiny_profile.membership_id, [], kills=40),
+            ],
+        }
+        report = store_pgcr(destiny_profile, destiny_raid_activity, data)
+
+        assert "entries" not in report.raw_data
+        assert report.entries.get(is_self=True).entry_index == 1
+        assert report.full_raw_data() == data
+
+
+@pytest.mark.django_db
+class TestCoPlayers:
+    def test_folds_fireteam_as_reports_are_stored(
+        self, destiny_profile, destiny_character
+    ):
+        me = destiny_profile.membership_id
+        cleared = _activity(destiny_profile, destiny_character, "10", completed=True)
+        store_pgcr(
+            destiny_profile,
+            cleared,
+            {
+                "period": "2026-10-01T20:00:00Z",
+                "entries": [
+                    _pgcr_entry(me, []),
+                    _pgcr_entry("111", [], name="Old Name"),
+                    # Character swap mid-raid: two entries, one activity together.
+                    _pgcr_entry("111", [], name="Old Name", completed=False),
+                    _pgcr_entry("222", [], name="Sherpa"),
+                ],
+            },
+        )
+        failed = _activity(destiny_profile, destiny_character, "11", completed=False)
+        store_pgcr(
+            destiny_profile,
+            failed,
+            {
+                "period": "2026-10-08T20:00:00Z",
+                "entries": [
+                    _pgcr_entry(me, []),
+                    _pgcr_entry("111", [], name="New Name"),
+                ],
+            },
+        )
+
+        mate = CoPlayer.objects.get(membership_id="111")
+        assert mate.activities_together == 2
+        assert mate.clears_together == 1
+        assert mate.display_name == "New Name"
+        assert mate.last_seen.day == 8
+        assert CoPlayer.objects.get(membership_id="222").activities_together == 1
+        assert not CoPlayer.objects.filter(membership_id=me).exists()
+
+        fields = ("activities_together", "clears_together", "display_name", "last_seen")
+        incremental = {
+            c.membership_id: [getattr(c, f) for f in fields]
+            for c in CoPlayer.objects.all()
+        }
+        assert rebuild_co_players(destiny_profile) == 2
+        rebuilt = {
+            c.membership_id: [getattr(c, f) for f in fields]
+            for c in CoPlayer.objects.all()
+        }
+        assert rebuilt == incremental
+
+
+class _FakeResolver:
+    """Manifest stand-in: root 1 → category 10 → records 100/101, collectible 200."""
+
+    ENTRIES = {
+        1: {"name": "Triumphs", "parent_node_hash": None},
+        10: {"name": "Raids", "parent_node_hash": 1},
+        100: {"name": "Petra's Run", "parent_node_hash": 10},
+        101: {"name": "Flawless", "parent_node_hash": 10},
+        200: {"name": "One Thousand Voices", "parent_node_hash": 10},
+    }
+
+    def resolve_presentation_entry(self, table: str, hash_id: int) -> dict:
+        return dict(self.ENTRIES.get(hash_id, {"name": "", "parent_node_hash": None}))
+
+
+def _records(*states: tuple[int, int]) -> dict:
+    return {"records": {str(h): {"state": s, "objectives": []} for h, s in states}}
+
+
+@pytest.mark.django_db
+class TestSyncTriumphs:
+    def test_writes_only_changed_states(self, destiny_profile):
+        resolver = _FakeResolver()
+        collectibles = {"collectibles": {"200": {"state": 1}}}
+
+        first = sync_triumphs(
+            destiny_profile, _records((100, 0), (101, 4)), collectibles, resolver
+        )
+        assert first == {"records": 2, "collectibles": 1, "nodes": 4}
+        raids = PresentationNodeProgress.objects.get(kind="records", node_hash=10)
+        assert (raids.name, raids.completed, raids.total) == ("Raids", 1, 2)
+        root = PresentationNodeProgress.objects.get(kind="records", node_hash=1)
+        assert root.parent_node_hash is None
+        assert root.total == 2
+
+        again = sync_triumphs(
+            destiny_profile, _records((100, 0), (101, 4)), collectibles, resolver
+        )
+        assert again == {"records": 0, "collectibles": 0, "nodes": 0}
+
+        changed = sync_triumphs(
+            destiny_profile, _records((100, 0), (101, 1)), collectibles, resolver
+        )
+        assert changed["records"] == 1
+        assert RecordState.objects.get(record_hash=101).completed
+        assert (
+            PresentationNodeProgress.objects.get(kind="records", node_hash=10).completed
+            == 2
+        )
+
+    def test_keeps_names_without_manifest(self, destiny_profile):
+        sync_triumphs(destiny_profile, _records((100, 4)), {}, _FakeResolver())
+        sync_triumphs(destiny_profile, _records((100, 0)), {}, None)
+
+        record = RecordState.objects.get(record_hash=100)
+        assert record.name == "Petra's Run"
+        assert record.completed
+        assert PresentationNodeProgress.objects.get(node_hash=1).completed == 1
+
+    def test_invisible_records_excluded_from_totals(self, destiny_profile):
+        sync_triumphs(
+            destiny_profile, _records((100, 0), (101, 16 | 4)), {}, _FakeResolver()
+        )
+        assert PresentationNodeProgress.objects.get(node_hash=10).total == 1
+
+
+class TestPlayedWatermark:
+    PROFILE = {"dateLastPlayed": "2026-10-01T20:00:00Z", "characterIds": ["1", "2"]}
+    CHARACTERS = {
+        "1": {"dateLastPlayed": "2026-10-01T20:00:00Z"},
+        "2": {"dateLastPlayed": "2026-09-12T18:00:00Z"},
+    }
+
+    def test_unchanged_is_none(self):
+        mark = played_watermark(self.PROFILE, self.CHARACTERS)
+        assert (
+            watermark_changes(mark, played_watermark(self.PROFILE, self.CHARACTERS))
+            is None
+        )
+
+    def test_only_played_characters(self):
+        old = played_watermark(self.PROFILE, self.CHARACTERS)
+        new = played_watermark(
+            {**self.PROFILE, "dateLastPlayed": "2026-10-02T21:00:00Z"},
+            {**self.CHARACTERS, "2": {"dateLastPlayed": "2026-10-02T21:00:00Z"}},
+        )
+        assert watermark_changes(old, new) == {"2"}
+
+    def test_new_character(self):
+        old = played_watermark(self.PROFILE, self.CHARACTERS)
+        new = played_watermark(
+            {**self.PROFILE, "characterIds": ["1", "2", "3"]},
+            {**self.CHARACTERS, "3": {"dateLastPlayed": "2026-10-02T21:00:00Z"}},
+        )
+        assert watermark_changes(old, new) == {"3"}
+
+    def test_first_run_refreshes_everything(self):
+        assert watermark_changes(
+            {}, played_watermark(self.PROFILE, self.CHARACTERS)
+        ) == {"1", "2"}
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import Client
 
+from apps.profiles.ironmon import events as ingest
 from apps.profiles.ironmon.models import Challenge
 from apps.profiles.ironmon.models import Checkpoint
+from apps.profiles.ironmon.models import CheckpointFunnel
 from apps.profiles.ironmon.models import CheckpointResult
 from apps.profiles.ironmon.models import Run
 
@@ -79,6 +83,38 @@ class TestChallengeEndpoint:
         assert response.status_code == 200
 
 
+@pytest.mark.django_db
+class TestListRuns:
+    @pytest.fixture
+    def many_runs(self, challenge, checkpoints):
+        Run.objects.bulk_create(
+            Run(seed_number=n, challenge=challenge, highest_checkpoint=checkpoints[n % 3])
+            for n in range(1, 26)
+        )
+
+    def test_pages_newest_first(self, api_client, many_runs):
+        data = api_client.get("/api/ironmon/runs?limit=10&offset=10").json()
+        assert data["count"] == 25
+        assert [r["seed_number"] for r in data["items"]] == list(range(15, 5, -1))
+        assert data["items"][0]["challenge"] == "Kaizo"
+        assert data["items"][0]["highest_checkpoint"] == "Brock"
+        assert data["items"][0]["highest_checkpoint_order"] == 1
+
+    def test_latest_keyset(self, api_client, many_runs):
+        first = api_client.get("/api/ironmon/runs/latest?limit=10").json()
+        assert [r["seed_number"] for r in first["items"]] == list(range(25, 15, -1))
+        assert first["next_before"] == 16
+
+        last = api_client.get("/api/ironmon/runs/latest?limit=10&before=6").json()
+        assert [r["seed_number"] for r in last["items"]] == [5, 4, 3, 2, 1]
+        assert last["next_before"] is None
+
+    def test_latest_filters_challenge(self, api_client, many_runs):
+        Challenge.objects.create(slug="super-kaizo", name="Super Kaizo")
+        data = api_client.get("/api/ironmon/runs/latest?challenge=super-kaizo").json()
+        assert data == {"items": [], "next_before": None}
+
+
 # --- Write endpoints (auth required) ---
 
 
@@ -318,3 +354,175 @@ class TestRecordDefeat:
             content_type="application/json",
         )
         assert response.status_code == 401
+
+
+# --- Checkpoint funnel ---
+
+
+@pytest.mark.django_db
+class TestCheckpointFunnel:
+    def _play(self, api_client, auth_headers, seed, cleared):
+        api_client.post(
+            "/api/ironmon/runs",
+            data={"seed_number": seed, "challenge_slug": "kaizo"},
+            content_type="application/json",
+            **auth_headers,
+        )
+        for name in cleared:
+            api_client.post(
+                f"/api/ironmon/runs/{seed}/results",
+                data={"checkpoint_name": name},
+                content_type="application/json",
+                **auth_headers,
+            )
+
+    def _funnel(self):
+        return [
+            (f.checkpoint.name, f.entered, f.survived)
+            for f in CheckpointFunnel.objects.select_related("checkpoint").order_by("checkpoint__order")
+        ]
+
+    def test_writes_maintain_counters(self, api_client, auth_headers, checkpoints):
+        self._play(api_client, auth_headers, 1, ["Brock", "Misty"])
+        self._play(api_client, auth_headers, 2, ["Brock", "Brock"])
+        self._play(api_client, auth_headers, 2, [])
+        self._play(api_client, auth_headers, 3, [])
+
+        assert self._funnel() == [("Brock", 3, 2), ("Misty", 2, 1), ("Surge", 1, 0)]
+
+        stats = api_client.get("/api/ironmon/checkpoints/stats").json()
+        assert [(c["entered"], c["survived"]) for c in stats] == [(3, 2), (2, 1), (1, 0)]
+        assert stats[0]["survival_rate"] == pytest.approx(2 / 3)
+
+    def test_rebuild_matches_raw_results(self, api_client, auth_headers, challenge, checkpoints):
+        self._play(api_client, auth_headers, 1, ["Brock", "Misty"])
+        self._play(api_client, auth_headers, 2, ["Brock"])
+
+        CheckpointFunnel.objects.all().delete()
+        run = Run.objects.create(seed_number=3, challenge=challenge)
+        CheckpointResult.objects.create(run=run, checkpoint=checkpoints[0])
+        call_command("rebuild_checkpoint_funnel")
+
+        assert self._funnel() == [("Brock", 3, 3), ("Misty", 3, 1), ("Surge", 1, 0)]
+
+    def test_stats_read_counters(self, api_client, auth_headers, checkpoints):
+        self._play(api_client, auth_headers, 1, ["Brock"])
+        data = api_client.get("/api/ironmon/stats").json()
+        assert (data["total_runs"], data["runs_with_results"], data["victories"]) == (1, 1, 0)
+        assert data["checkpoints"][0]["survived"] == 1
+
+    def test_stats_totals_come_from_funnel(self, api_client, auth_headers, checkpoints, django_assert_num_queries):
+        self._play(api_client, auth_headers, 1, ["Brock", "Misty", "Surge"])
+        self._play(api_client, auth_headers, 2, ["Brock"])
+        self._play(api_client, auth_headers, 3, [])
+
+        # The challenge, then checkpoints joined to their counters; no Run scan.
+        with django_assert_num_queries(2):
+            data = api_client.get("/api/ironmon/stats").json()
+        assert (data["total_runs"], data["runs_with_results"], data["victories"]) == (3, 2, 1)
+        assert data["victory_rate"] == pytest.approx(1 / 3)
+
+
+# --- Batched events ---
+
+
+@pytest.mark.django_db
+class TestIngestEvents:
+    def _post(self, api_client, auth_headers, events):
+        return api_client.post(
+            "/api/ironmon/events",
+            data={"events": events},
+            content_type="application/json",
+            **auth_headers,
+        )
+
+    def test_applies_mixed_batch_in_order(self, api_client, auth_headers, checkpoints):
+        response = self._post(
+            api_client,
+            auth_headers,
+            [
+                {"type": "seed", "seed_number": 7, "challenge_slug": "kaizo"},
+                {"type": "checkpoint", "seed_number": 7, "checkpoint_name": "Brock"},
+                {"type": "checkpoint", "seed_number": 7, "checkpoint_name": "Misty"},
+                {"type": "defeat", "seed_number": 7, "pokemon": "Starmie", "level": 21},
+            ],
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["applied"], data["duplicates"], data["errors"]) == (4, 0, 0)
+
+        run = Run.objects.get(seed_number=7)
+        assert run.highest_checkpoint.name == "Misty"
+        assert run.defeated_by == {"pokemon": "Starmie", "is_wild": False, "level": 21}
+        assert CheckpointResult.objects.filter(run=run).count() == 2
+        funnel = {f.checkpoint.name: (f.entered, f.survived) for f in CheckpointFunnel.objects.select_related("checkpoint")}
+        assert funnel == {"Brock": (1, 1), "Misty": (1, 1), "Surge": (1, 0)}
+
+    def test_replay_is_idempotent(self, api_client, auth_headers, run, checkpoints):
+        events = [
+            {"type": "checkpoint", "seed_number": 100, "checkpoint_name": "Brock"},
+            {"type": "defeat", "seed_number": 100, "pokemon": "Onix"},
+        ]
+        self._post(api_client, auth_headers, events)
+        data = self._post(
+            api_client,
+            auth_headers,
+            [{"type": "seed", "seed_number": 100, "challenge_slug": "kaizo"}, *events],
+        ).json()
+
+        assert [r["status"] for r in data["results"]] == ["duplicate"] * 3
+        assert CheckpointResult.objects.count() == 1
+        assert CheckpointFunnel.objects.get(checkpoint__name="Brock").survived == 1
+
+    def test_errors_do_not_fail_batch(self, api_client, auth_headers, checkpoints):
+        data = self._post(
+            api_client,
+            auth_headers,
+            [
+                {"type": "seed", "seed_number": 1, "challenge_slug": "nope"},
+                {"type": "checkpoint", "seed_number": 2, "checkpoint_name": "Brock"},
+                {"type": "seed", "seed_number": 3, "challenge_slug": "kaizo"},
+                {"type": "checkpoint", "seed_number": 3, "checkpoint_name": "Giovanni"},
+            ],
+        ).json()
+
+        assert [r["status"] for r in data["results"]] == ["error", "error", "applied", "error"]
+        assert data["results"][3]["detail"] == "Checkpoint 'Giovanni' not found"
+        assert list(Run.objects.values_list("seed_number", flat=True)) == [3]
+
+    def test_concurrent_insert_retries_batch(self, api_client, auth_headers, challenge, checkpoints, monkeypatch):
+        apply_batch = ingest._apply_events
+        calls = []
+
+        def racing_apply(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                # Another batch commits the same seed; our insert then conflicts.
+                Run.objects.create(seed_number=9, challenge=challenge)
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return apply_batch(batch)
+
+        monkeypatch.setattr(ingest, "_apply_events", racing_apply)
+        response = self._post(
+            api_client,
+            auth_headers,
+            [
+                {"type": "seed", "seed_number": 9, "challenge_slug": "kaizo"},
+                {"type": "checkpoint", "seed_number": 9, "checkpoint_name": "Brock"},
+            ],
+        )
+
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == ["duplicate", "applied"]
+        assert len(calls) == 2
+        assert Run.objects.get().highest_checkpoint.name == "Brock"
+
+    def test_rejects_unknown_event_type(self, api_client, auth_headers, challenge):
+        response = self._post(api_client, auth_headers, [{"type": "reset", "seed_number": 1}])
+        assert response.status_code == 422
+
+    def test_rejects_no_auth(self, api_client, challenge):
+        response = api_client.post(
+            "/api/ironmon/events", data={"events": []}, content_type="application/json"
+        )
+        assert response.status_code == 401
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+import redis
+from django.db import DataError
+
+from apps.profiles.ironmon import stream
+from apps.profiles.ironmon.models import Challenge
+from apps.profiles.ironmon.models import Checkpoint
+from apps.profiles.ironmon.models import CheckpointFunnel
+from apps.profiles.ironmon.models import Run
+from apps.profiles.ironmon.stream import StreamConsumer
+
+
+class FakeStream:
+    """Just enough of a consumer group: one stream, one consumer."""
+
+    def __init__(self):
+        self.entries: list[tuple[str, dict]] = []
+        self.delivered = 0
+        self.pending: list[str] = []
+        self.groups: set[str] = set()
+        self.dead: list[dict] = []
+
+    def add(self, **event) -> str:
+        entry_id = f"{len(self.entries) + 1}-0"
+        self.entries.append((entry_id, {"data": json.dumps(event)}))
+        return entry_id
+
+    def xgroup_create(self, name, group, id="$", mkstream=False):
+        if group in self.groups:
+            raise redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups.add(group)
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        ((name, cursor),) = streams.items()
+        if cursor == "0":
+            batch = [e for e in self.entries if e[0] in self.pending][:count]
+        else:
+            batch = self.entries[self.delivered : self.delivered + count]
+            self.delivered += len(batch)
+            self.pending.extend(entry_id for entry_id, _ in batch)
+        return [[name, batch]] if batch else []
+
+    def xack(self, name, group, *ids):
+        self.pending = [p for p in self.pending if p not in ids]
+
+    def xadd(self, name, fields):
+        assert name.endswith(":dead")
+        self.dead.append(fields)
+
+
+@pytest.fixture
+def kaizo(db):
+    challenge = Challenge.objects.create(slug="kaizo", name="Kaizo")
+    for order, name in enumerate(["Brock", "Misty"], start=1):
+        Checkpoint.objects.create(
+            challenge=challenge, name=name, trainer=name, order=order
+        )
+    return challenge
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        stream,
+        "publish_event_sync",
+        lambda source, event_type, data: events.append(data),
+    )
+    return events
+
+
+@pytest.mark.django_db
+class TestStreamConsumer:
+    def _consumer(self, fake):
+        return StreamConsumer(
+            fake, "events:synthform:ironmon", "questlog", "test", batch_size=10
+        )
+
+    def test_applies_and_acks_batch(self, kaizo, published):
+        fake = FakeStream()
+        fake.add(type="seed", seed_number=1, challenge_slug="kaizo")
+        fake.add(type="checkpoint", seed_number=1, checkpoint_name="Brock")
+        consumer = self._consumer(fake)
+
+        consumer.ensure_group()
+        consumer.ensure_group()  # existing group is fine
+        assert consumer.process(consumer.read(pending=False)) == 2
+
+        assert Run.objects.get().highest_checkpoint.name == "Brock"
+        assert CheckpointFunnel.objects.get(checkpoint__name="Brock").survived == 1
+        assert fake.pending == []
+        assert published == [{"applied": 2, "seeds": [1]}]
+
+    def test_resumes_with_unacked_entries(self, kaizo, published):
+        fake = FakeStream()
+        fake.add(type="seed", seed_number=1, challenge_slug="kaizo")
+        # Delivered to this consumer but never acked (crashed mid-batch).
+        self._consumer(fake).read(pending=False)
+        fake.add(type="checkpoint", seed_number=1, checkpoint_name="Brock")
+
+        stops = iter([False, True])
+        applied = self._consumer(fake).run(stop=lambda: next(stops))
+
+        assert applied == 2
+        assert Run.objects.get().highest_checkpoint.name == "Brock"
+        assert fake.pending == []
+
+    def test_replayed_batch_is_idempotent(self, kaizo, published):
+        fake = FakeStream()
+        fake.add(type="seed", seed_number=1, challenge_slug="kaizo")
+        consumer = self._consumer(fake)
+        entries = consumer.read(pending=False)
+        consumer.process(entries)
+
+        assert consumer.process(entries) == 0
+        assert Run.objects.count() == 1
+
+    def test_malformed_entries_are_acked(self, kaizo, published):
+        fake = FakeStream()
+        fake.entries.append(("1-0", {"data": "{not json"}))
+        fake.entries.append(("2-0", {"other": "field"}))
+        fake.add(type="seed", seed_number=5, challenge_slug="kaizo")
+        consumer = self._consumer(fake)
+
+        assert consumer.process(consumer.read(pending=False)) == 1
+        assert fake.pending == []
+        assert Run.objects.get().seed_number == 5
+
+    def test_db_error_dead_letters_only_the_failing_event(
+        self, kaizo, published, monkeypatch
+    ):
+        fake = FakeStream()
+        fake.add(type="seed", seed_number=1, challenge_slug="kaizo")
+        bad = fake.add(type="seed", seed_number=2**31, challenge_slug="kaizo")
+        fake.add(type="checkpoint", seed_number=1, checkpoint_name="Brock")
+
+        def apply_events(events):
+            # SQLite stores any int; stand in for Postgres rejecting int4 overflow.
+            if any(e.seed_number >= 2**31 for e in events):
+                raise DataError("integer out of range")
+            return real_apply(events)
+
+        real_apply = stream.apply_events
+        monkeypatch.setattr(stream, "apply_events", apply_events)
+        consumer = self._consumer(fake)
+
+        assert consumer.process(consumer.read(pending=False)) == 2
+        assert Run.objects.get().highest_checkpoint.name == "Brock"
+        assert fake.pending == []
+        assert [(d["entry_id"], d["error"]) for d in fake.dead] == [
+            (bad, "integer out of range")
+        ]
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from apps.integrations import steam_sessions
+from apps.integrations import tasks
+from apps.integrations.steam import SteamClient
+from apps.integrations.steam_sessions import PRESENCE_KEY
+from apps.integrations.steam_sessions import SteamPresencePoller
+from apps.integrations.steam_sessions import classify
+from apps.integrations.steam_sessions import tracked_games
+from apps.integrations.tasks import poll_steam_sessions
+
+
+class FakeRedis:
+    def __init__(self, **presence: str):
+        self.hashes = {
+            PRESENCE_KEY: {k.encode(): v.encode() for k, v in presence.items()}
+        }
+        self.published = []
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field.encode())
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        self.hashes.setdefault(key, {}).update(
+            {k.encode(): str(v).encode() for k, v in values.items()}
+        )
+
+    def expire(self, key, ttl):
+        pass
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)["event_type"]))
+
+    def state(self, source):
+        return self.hget(PRESENCE_KEY, f"{source}:state")
+
+
+@pytest.fixture(autouse=True)
+def _steam_configured(settings):
+    settings.STEAM_API_KEY = "test-key"
+    settings.STEAM_ID = "76561198009545200"
+    settings.BUNGIE_API_KEY = "test-bungie-key"
+
+
+class TestTrackedGames:
+    def test_registry_covers_warframe_and_destiny(self):
+        by_appid = {g.appid: g for g in tracked_games()}
+        assert by_appid[SteamClient.WARFRAME_APPID].command == "archive_warframe"
+        destiny = by_appid[SteamClient.DESTINY2_APPID]
+        assert destiny.command == "archive_destiny"
+        assert destiny.session_end_options == {"incremental": True, "pgcr": True}
+
+    def test_unconfigured_games_skipped(self, settings):
+        settings.BUNGIE_API_KEY = ""
+        assert SteamClient.DESTINY2_APPID not in {g.appid for g in tracked_games()}
+
+
+class TestClassify:
+    def test_transitions(self):
+        assert classify(None, "playing") == "session_start"
+        assert classify("not_playing", "playing") == "session_start"
+        assert classify("playing", "not_playing") == "session_end"
+        assert classify("playing", "playing") == "still_playing"
+        assert classify("not_playing", "not_playing") is None
+        assert classify(None, "not_playing") is None
+
+
+class TestSteamPresencePoller:
+    @pytest.fixture
+    def commands(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            steam_sessions,
+            "call_command",
+            lambda name, **opts: calls.append((name, opts)),
+        )
+        return calls
+
+    def _poller(self, redis_client):
+        return SteamPresencePoller(steam=MagicMock(), redis_client=redis_client)
+
+    def test_destiny_session_end_runs_incremental_archive(self, commands):
+        redis_client = FakeRedis(**{"destiny:state": "playing"})
+        transitions = self._poller(redis_client).dispatch(None)
+
+        assert transitions["destiny"] == "session_end"
+        assert commands == [("archive_destiny", {"incremental": True, "pgcr": True})]
+        assert redis_client.state("destiny") == b"not_playing"
+        assert (
+            "events:questlog:destiny",
+            "destiny:session_end",
+        ) in redis_client.published
+
+    def test_all_games_share_one_hash(self, commands):
+        # Switching straight from Warframe to Destiny ends the Warframe session.
+        redis_client = FakeRedis(**{"warframe:state": "playing"})
+        transitions = self._poller(redis_client).dispatch(SteamClient.DESTINY2_APPID)
+
+        assert transitions == {"warframe": "session_end", "destiny": "session_start"}
+        assert commands == [("archive_warframe", {"trigger": "session_end"})]
+        assert set(redis_client.hgetall(PRESENCE_KEY)) >= {
+            b"warframe:state",
+            b"destiny:state",
+        }
+
+    def test_periodic_archive_only_for_games_with_interval(self, commands):
+        redis_client = FakeRedis(**{"warframe:state": "playing"})
+        self._poller(redis_client).dispatch(SteamClient.WARFRAME_APPID)
+        assert commands == [("archive_warframe", {"trigger": "scheduled"})]
+        assert redis_client.hget(PRESENCE_KEY, "warframe:last_archive") is not None
+
+        # Within the interval: no second archive.
+        commands.clear()
+        self._poller(redis_client).dispatch(SteamClient.WARFRAME_APPID)
+        assert commands == []
+
+        redis_client = FakeRedis(**{"destiny:state": "playing"})
+        self._poller(redis_client).dispatch(SteamClient.DESTINY2_APPID)
+        assert commands == []
+
+    def test_session_end_failure_raised_after_all_games(self, monkeypatch):
+        def fail(name, **opts):
+            raise RuntimeError(f"{name} broke")
+
+        monkeypatch.setattr(steam_sessions, "call_command", fail)
+        monkeypatch.setattr(steam_sessions.sentry_sdk, "capture_exception", MagicMock())
+        redis_client = FakeRedis(
+            **{"warframe:state": "playing", "destiny:state": "not_playing"}
+        )
+
+        with pytest.raises(RuntimeError, match="archive_warframe broke"):
+            self._poller(redis_client).dispatch(SteamClient.DESTINY2_APPID)
+        assert redis_client.state("destiny") == b"playing"
+        assert (
+            "events:questlog:warframe",
+            "warframe:archive_failed",
+        ) in redis_client.published
+
+
+class TestPollSteamSessions:
+    @pytest.fixture
+    def poller(self, monkeypatch):
+        poller = MagicMock()
+        monkeypatch.setattr(tasks, "get_poller", lambda: poller)
+        return poller
+
+    def test_transient_steam_error_skips_tick(self, poller):
+        # A network blip reaching Steam must not raise (no Sentry noise) and
+        # must not touch Redis state — the transition is caught on a later poll.
+        def boom():
+            raise httpx.ConnectTimeout("connect timed out")
+
+        poller.current_appid.side_effect = boom
+
+        assert poll_steam_sessions() is None
+        poller.dispatch.assert_not_called()
+
+    def test_unexpected_error_propagates(self, poller):
+        # Non-network failures are real bugs and should still surface.
+        def boom():
+            raise ValueError("not a network problem")
+
+        poller.current_appid.side_effect = boom
+
+        with pytest.raises(ValueError, match="not a network problem"):
+            poll_steam_sessions()
+
+    def test_upstream_5xx_skips_tick(self, poller):
+        # A Steam 502 is a transient upstream hiccup — skip like a network blip.
+        def boom():
+            raise _steam_http_error(502)
+
+        poller.current_appid.side_effect = boom
+
+        assert poll_steam_sessions() is None
+        poller.dispatch.assert_not_called()
+
+    def test_upstream_4xx_propagates(self, poller):
+        # A 4xx (e.g. revoked API key) is a real problem; don't swallow it.
+        def boom():
+            raise _steam_http_error(403)
+
+        poller.current_appid.side_effect = boom
+
+        with pytest.raises(httpx.HTTPStatusError):
+            poll_steam_sessions()
+
+
+def _steam_http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request(
+        "GET", "https://api.steampowered.com/x?key=SECRET&steamids=1"
+    )
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(
+        f"Server error '{status_code}'", request=request, response=response
+    )
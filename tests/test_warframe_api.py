@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 import pytest
 
+from apps.profiles.warframe.models import Snapshot
+
 
 @pytest.mark.django_db
 class TestWarframeProfile:
@@ -205,6 +209,39 @@ class TestWarframeProgression:
         # MR13 < 30 with positive velocity -> a projection exists
         assert data["projected_mr30_date"] is not None
 
+    def test_progression_points_downsamples(self, api_client, warframe_profile, warframe_mastery_history):
+        series = api_client.get("/api/warframe/progression?points=3").json()["series"]
+        assert len(series) == 3
+        # First and last snapshots always survive.
+        assert series[0]["mastery_rank"] == 11
+        assert series[-1]["time_played_hours"] == 112.5
+
+    def test_progression_bucket_keeps_latest_per_period(
+        self, api_client, warframe_profile, warframe_mastery_history
+    ):
+        # A second snapshot on the last day collapses into that day's bucket.
+        last = warframe_mastery_history[-1]
+        extra = Snapshot.objects.create(
+            profile=warframe_profile, mastery_rank=13, time_played_seconds=409000, missions_completed=700
+        )
+        Snapshot.objects.filter(pk=extra.pk).update(
+            captured_at=Snapshot.objects.get(pk=last.pk).captured_at + timedelta(minutes=30)
+        )
+
+        assert len(api_client.get("/api/warframe/progression").json()["series"]) == 7
+        series = api_client.get("/api/warframe/progression?bucket=day").json()["series"]
+        assert len(series) == 6
+        assert series[-1]["missions_completed"] == 700
+
+    def test_progression_summary_cache_tracks_new_snapshots(
+        self, api_client, warframe_profile, warframe_mastery_history
+    ):
+        assert api_client.get("/api/warframe/progression").json()["summary"]["sessions"] == 6
+        Snapshot.objects.create(profile=warframe_profile, trigger="session_end", mastery_rank=14)
+        summary = api_client.get("/api/warframe/progression").json()["summary"]
+        assert summary["sessions"] == 7
+        assert summary["current_mastery_rank"] == 14
+
 
 @pytest.mark.django_db
 class TestWarframeCompletion:
@@ -339,3 +376,52 @@ class TestWarframeFrames:
         data = response.json()
         assert len(data) == 1
         assert data[0]["name"] == "Gauss Prime"
+
+
+@pytest.mark.django_db
+class TestWarframeWeaponHistory:
+    def test_history_groups_by_day(self, api_client, warframe_weapon_deltas):
+        response = api_client.get("/api/warframe/weapons/Lotus/Weapons/Test/Weapon0/history")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["weapon_name"] == "Weapon 0"
+        assert [p["kills"] for p in data["points"]] == [5, 50]
+        assert data["points"][1]["fired"] == 150
+
+    def test_history_unknown_weapon(self, api_client, warframe_weapons):
+        response = api_client.get("/api/warframe/weapons/Lotus/Nope/history")
+        assert response.status_code == 404
+
+    def test_most_improved_this_week(self, api_client, warframe_weapon_deltas):
+        response = api_client.get("/api/warframe/weapons/improved")
+        assert response.status_code == 200
+        data = response.json()
+        assert [(w["weapon_name"], w["kills"]) for w in data] == [("Weapon 0", 55), ("Weapon 1", 40)]
+        assert data[0]["total_kills"] == 100
+
+
+@pytest.mark.django_db
+class TestWarframeSessions:
+    def test_list_empty(self, api_client):
+        assert api_client.get("/api/warframe/sessions").json() == []
+
+    def test_list_sessions(self, api_client, warframe_sessions):
+        data = api_client.get("/api/warframe/sessions").json()
+        assert [s["time_played_hours"] for s in data] == [2.0, 1.0, 0.5]
+        assert data[0]["standing"] == {"CetusSyndicate": 2000}
+        assert data[0]["kills"] == 300
+
+    def test_days_filter(self, api_client, warframe_sessions):
+        assert len(api_client.get("/api/warframe/sessions?days=7").json()) == 2
+
+    def test_weekly_totals(self, api_client, warframe_sessions):
+        weeks = api_client.get("/api/warframe/sessions/weekly?weeks=52").json()
+        assert sum(w["sessions"] for w in weeks) == 3
+        assert sum(w["kills"] for w in weeks) == 450
+        assert sum(w["standing_gained"] for w in weeks) == 1500
+
+    def test_progression_averages_recorded_sessions(
+        self, api_client, warframe_profile, warframe_mastery_history, warframe_sessions
+    ):
+        summary = api_client.get("/api/warframe/progression").json()["summary"]
+        assert summary["avg_session_hours"] == round(12600 / 3 / 3600, 2)
@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.profiles.warframe.management.commands import archive_warframe
+from apps.profiles.warframe.management.commands.archive_warframe import CHANGES_LIMIT
+from apps.profiles.warframe.management.commands.archive_warframe import profile_hash
+from apps.profiles.warframe.management.commands.archive_warframe import snapshot_storage
+from apps.profiles.warframe.management.commands.archive_warframe import (
+    sync_profile_rows,
+)
+from apps.profiles.warframe.management.commands.archive_warframe import weapon_rows
+from apps.profiles.warframe.mastery import refresh_item_mastery
+from apps.profiles.warframe.models import Affiliation
+from apps.profiles.warframe.models import CatalogItem
+from apps.profiles.warframe.models import ItemMastery
+from apps.profiles.warframe.models import MissionStat
+from apps.profiles.warframe.models import Session
+from apps.profiles.warframe.models import Snapshot
+from apps.profiles.warframe.models import WeaponStat
+from apps.profiles.warframe.models import WeaponStatDelta
+from apps.profiles.warframe.retention import prune_snapshots
+from apps.profiles.warframe.retention import snapshots_to_prune
+from apps.profiles.warframe.sessions import record_session
+from apps.profiles.warframe.snapshot_delta import KEYFRAME_EVERY
+from apps.profiles.warframe.snapshot_delta import apply_patch
+from apps.profiles.warframe.snapshot_delta import make_patch
+
+BRATON = "/Lotus/Weapons/Tenno/Rifle/Rifle"
+LATO = "/Lotus/Weapons/Tenno/Pistol/Pistol"
+
+
+def _stats(*weapons: tuple[str, int]) -> dict:
+    return {
+        "Weapons": [
+            {"type": path, "fired": kills * 10, "hits": kills * 5, "kills": kills}
+            for path, kills in weapons
+        ]
+    }
+
+
+def _result(completes: int = 3, standing: int = 1000) -> dict:
+    return {
+        "Missions": [
+            {"Tag": "SolNode1", "Completes": completes},
+            {"Tag": "SolNode2", "Completes": 1},
+        ],
+        "Affiliations": [{"Tag": "CetusSyndicate", "Standing": standing, "Title": 2}],
+    }
+
+
+class TestSyncProfileRows:
+    def test_first_run_writes_everything(self, warframe_profile):
+        weapons = weapon_rows(warframe_profile, _stats((BRATON, 10), (LATO, 4)))
+        written, _ = sync_profile_rows(warframe_profile, weapons, _result())
+
+        assert written == {
+            "weapons": 2,
+            "weapon_deltas": 0,
+            "missions": 2,
+            "affiliations": 1,
+            "item_mastery": 0,
+        }
+        braton = WeaponStat.objects.get(profile=warframe_profile, weapon_path=BRATON)
+        assert braton.kills == 10
+        assert braton.accuracy == 0.5
+
+    def test_only_changed_rows_written(self, warframe_profile):
+        sync_profile_rows(
+            warframe_profile,
+            weapon_rows(warframe_profile, _stats((BRATON, 10), (LATO, 4))),
+            _result(),
+        )
+        lato_id = WeaponStat.objects.get(weapon_path=LATO).id
+
+        written, _ = sync_profile_rows(
+            warframe_profile,
+            weapon_rows(warframe_profile, _stats((BRATON, 12), (LATO, 4))),
+            _result(completes=4),
+        )
+
+        assert written == {
+            "weapons": 1,
+            "weapon_deltas": 1,
+            "missions": 1,
+            "affiliations": 0,
+            "item_mastery": 0,
+        }
+        assert WeaponStat.objects.get(weapon_path=BRATON).kills == 12
+        assert WeaponStat.objects.get(weapon_path=LATO).id == lato_id
+        assert MissionStat.objects.get(node_tag="SolNode1").completes == 4
+        delta = WeaponStatDelta.objects.get()
+        assert (delta.weapon_path, delta.kills, delta.fired) == (BRATON, 2, 20)
+        assert WeaponStat.objects.count() == 2
+
+    def test_unchanged_run_writes_nothing(self, warframe_profile):
+        weapons = _stats((BRATON, 10))
+        sync_profile_rows(
+            warframe_profile, weapon_rows(warframe_profile, weapons), _result()
+        )
+
+        written, _ = sync_profile_rows(
+            warframe_profile, weapon_rows(warframe_profile, weapons), _result()
+        )
+
+        assert written == {
+            "weapons": 0,
+            "weapon_deltas": 0,
+            "missions": 0,
+            "affiliations": 0,
+            "item_mastery": 0,
+        }
+        assert Affiliation.objects.get().standing == 1000
+
+    def test_changes_summarise_what_moved(self, warframe_profile):
+        CatalogItem.objects.create(
+            unique_name=LATO, name="Lato", category="Secondary", masterable=True
+        )
+        _, first = sync_profile_rows(
+            warframe_profile,
+            weapon_rows(warframe_profile, _stats((BRATON, 10))),
+            _result(),
+        )
+        assert first["new_weapons"] == {"items": [], "total": 0}
+
+        result = {**_result(standing=1500), **_xp_info(Pistol=450_000)}
+        result["LoadOutInventory"]["XPInfo"][0]["ItemType"] = LATO
+        _, changes = sync_profile_rows(
+            warframe_profile,
+            weapon_rows(warframe_profile, _stats((BRATON, 12), (LATO, 1))),
+            result,
+        )
+
+        assert changes["new_weapons"] == {
+            "items": [{"path": LATO, "name": "Pistol"}],
+            "total": 1,
+        }
+        assert changes["mastered"] == {
+            "items": [{"path": LATO, "name": "Lato"}],
+            "total": 1,
+        }
+        assert changes["standing"]["items"] == [
+            {"syndicate": "CetusSyndicate", "standing": 1500, "change": 500}
+        ]
+
+    def test_changes_are_bounded(self, warframe_profile):
+        sync_profile_rows(
+            warframe_profile,
+            weapon_rows(warframe_profile, _stats((BRATON, 1))),
+            _result(),
+        )
+        many = _stats(*((f"/Lotus/Weapons/W{i}", 1) for i in range(CHANGES_LIMIT + 5)))
+        _, changes = sync_profile_rows(
+            warframe_profile, weapon_rows(warframe_profile, many), _result()
+        )
+        assert len(changes["new_weapons"]["items"]) == CHANGES_LIMIT
+        assert changes["new_weapons"]["total"] == CHANGES_LIMIT + 5
+
+
+class TestUnchangedArchive:
+    @pytest.fixture
+    def archive(self, monkeypatch, warframe_profile):
+        events = []
+        payload = {
+            "data": {
+                "Results": [{"DisplayName": "Avalonstar", **_result()}],
+                "Stats": _stats((BRATON, 10)),
+            }
+        }
+
+        async def get_profile(self, account_id, platform="pc"):
+            return payload["data"]
+
+        monkeypatch.setattr(archive_warframe.redis, "from_url", lambda url: MagicMock())
+        monkeypatch.setattr(archive_warframe.WarframeClient, "get_profile", get_profile)
+        monkeypatch.setattr(
+            archive_warframe,
+            "publish_warframe_event",
+            lambda event_type, data: events.append(event_type),
+        )
+
+        def run(trigger="scheduled"):
+            events.clear()
+            call_command(
+                "archive_warframe",
+                trigger=trigger,
+                work_slug=warframe_profile.work.slug,
+            )
+            return events
+
+        run.payload = payload
+        return run
+
+    def test_hash_ignores_key_order(self):
+        assert profile_hash({"a": 1, "b": [1, 2]}) == profile_hash(
+            {"b": [1, 2], "a": 1}
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_scheduled_run_skips_identical_profile(self, archive):
+        assert archive() == ["warframe:archive_complete"]
+        assert archive() == ["warframe:archive_unchanged"]
+        assert Snapshot.objects.count() == 1
+
+        archive.payload["data"]["Stats"] = _stats((BRATON, 11))
+        assert archive() == ["warframe:archive_complete"]
+        assert Snapshot.objects.count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_session_end_always_snapshots(self, archive):
+        archive()
+        assert archive(trigger="session_end") == ["warframe:archive_complete"]
+        assert Snapshot.objects.count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_session_end_records_session(self, archive):
+        archive()
+        archive.payload["data"]["Stats"] = _stats((BRATON, 15))
+        archive(trigger="session_end")
+        session = Session.objects.get()
+        assert session.snapshot == Snapshot.objects.get(trigger="session_end")
+        assert session.kills == 5
+
+
+class TestSnapshotDelta:
+    def test_patch_round_trips(self):
+        old = {"Rank": 3, "a/b": [1, 2, 3], "gone": True, "Weapons": [{"kills": 1}]}
+        new = {
+            "Rank": 4,
+            "a/b": [1, 5],
+            "new": {"x": 1},
+            "Weapons": [{"kills": 2}, {"kills": 0}],
+        }
+        assert apply_patch(old, make_patch(old, new)) == new
+        assert apply_patch(new, make_patch(new, old)) == old
+
+    def test_bool_vs_int_not_dropped(self):
+        assert make_patch({"x": 1}, {"x": True}) == [
+            {"op": "replace", "path": "/x", "value": True}
+        ]
+
+    def _snapshot(self, profile, data):
+        # Real blobs are mostly static (missions, loadouts); pad to match.
+        data = {
+            **data,
+            "Missions": [{"Tag": f"SolNode{i}", "Completes": 1} for i in range(50)],
+        }
+        return Snapshot.objects.create(
+            profile=profile, **snapshot_storage(profile, data)
+        )
+
+    def test_deltas_rebuild_against_keyframe(self, warframe_profile):
+        blobs = [
+            {"Stats": _stats((BRATON, kills), (LATO, 4))} for kills in (10, 11, 12)
+        ]
+        snaps = [self._snapshot(warframe_profile, blob) for blob in blobs]
+
+        assert [s.is_keyframe for s in snaps] == [True, False, False]
+        assert snaps[2].keyframe == snaps[0]
+        assert snaps[2].raw_profile == {}
+        rebuilt = [Snapshot.objects.get(pk=s.pk).full_profile() for s in snaps]
+        assert [r["Stats"] for r in rebuilt] == [b["Stats"] for b in blobs]
+        assert rebuilt[2] == snaps[2].keyframe.raw_profile | {
+            "Stats": blobs[2]["Stats"]
+        }
+
+    def test_profile_with_deltas_can_be_deleted(self, warframe_profile):
+        for kills in (10, 11, 12):
+            self._snapshot(warframe_profile, {"Stats": _stats((BRATON, kills))})
+        assert Snapshot.objects.filter(keyframe__isnull=False).exists()
+
+        warframe_profile.work.delete()
+
+        assert not Snapshot.objects.exists()
+
+    def test_new_keyframe_after_interval(self, warframe_profile):
+        for kills in range(KEYFRAME_EVERY + 1):
+            self._snapshot(warframe_profile, {"Stats": _stats((BRATON, kills))})
+        assert Snapshot.objects.filter(keyframe__isnull=True).count() == 2
+
+
+def _xp_info(**xp: int) -> dict:
+    return {
+        "LoadOutInventory": {
+            "XPInfo": [{"ItemType": f"/w/{k}", "XP": v} for k, v in xp.items()]
+        }
+    }
+
+
+class TestRefreshItemMastery:
+    def test_judges_against_catalog_and_writes_only_changes(self, warframe_profile):
+        CatalogItem.objects.create(
+            unique_name="/w/rifle", name="Rifle", category="Primary", masterable=True
+        )
+
+        assert (
+            refresh_item_mastery(warframe_profile, _xp_info(rifle=225_000, mystery=10))
+            == 2
+        )
+        rifle = ItemMastery.objects.get(item_id="/w/rifle")
+        assert (rifle.mastered, rifle.progress) == (False, 50)
+        # Not in the catalog: XP kept, can't be judged yet.
+        assert ItemMastery.objects.get(item_id="/w/mystery").progress == 0
+
+        assert (
+            refresh_item_mastery(warframe_profile, _xp_info(rifle=450_000, mystery=10))
+            == 1
+        )
+        assert ItemMastery.objects.get(item_id="/w/rifle").mastered is True
+
+    def test_rejudged_once_catalog_knows_item(self, warframe_profile):
+        warframe_profile.profile_data = _xp_info(frame=900_000)
+        refresh_item_mastery(warframe_profile)
+        CatalogItem.objects.create(
+            unique_name="/w/frame", name="Frame", category="Warframes", masterable=True
+        )
+
+        assert refresh_item_mastery(warframe_profile) == 1
+        assert ItemMastery.objects.get().mastered is True
+
+
+class TestSnapshotRetention:
+    @pytest.fixture
+    def now(self):
+        return timezone.now()
+
+    def _snap(
+        self,
+        profile,
+        now,
+        days_ago: float,
+        trigger: str,
+        kills: int,
+        node: str = "SolNode",
+    ) -> Snapshot:
+        data = {
+            "Stats": _stats((BRATON, kills)),
+            "Missions": [{"Tag": f"{node}{i}", "Completes": 1} for i in range(50)],
+        }
+        snap = Snapshot.objects.create(
+            profile=profile, trigger=trigger, **snapshot_storage(profile, data)
+        )
+        Snapshot.objects.filter(pk=snap.pk).update(
+            captured_at=now - timedelta(days=days_ago)
+        )
+        return Snapshot.objects.get(pk=snap.pk)
+
+    def test_policy_tiers(self, now):
+        def at(days_ago):
+            return now - timedelta(days=days_ago)
+
+        rows = sorted(
+            [
+                ("first", at(800), "scheduled"),
+                ("old-week-a", at(500), "scheduled"),
+                ("old-week-b", at(500.01), "scheduled"),
+                ("old-session", at(400), "session_end"),
+                ("day-a", at(100.2), "scheduled"),
+                ("day-b", at(100.1), "manual"),
+                ("session-tier", at(20), "scheduled"),
+                ("session-end", at(19), "session_end"),
+                ("recent", at(1), "scheduled"),
+                ("last", at(0), "scheduled"),
+            ],
+            key=lambda r: r[1],
+        )
+        assert sorted(snapshots_to_prune(rows, now)) == [
+            "day-a",
+            "old-week-b",
+            "session-tier",
+        ]
+
+    def test_deleted_keyframe_rebases_its_survivors(self, warframe_profile, now):
+        first = self._snap(warframe_profile, now, 60, "scheduled", kills=1)
+        # Different missions: too big a patch, so this becomes a keyframe.
+        keyframe = self._snap(
+            warframe_profile, now, 20, "scheduled", kills=2, node="EventNode"
+        )
+        session_end = self._snap(
+            warframe_profile, now, 19, "session_end", kills=3, node="EventNode"
+        )
+        last = self._snap(
+            warframe_profile, now, 0, "scheduled", kills=4, node="EventNode"
+        )
+        assert keyframe.is_keyframe and session_end.keyframe_id == keyframe.pk
+        expected = {s.pk: s.full_profile() for s in (first, session_end, last)}
+
+        assert prune_snapshots(warframe_profile, now) == 1
+
+        remaining = {s.pk: s for s in Snapshot.objects.all()}
+        assert {pk: s.full_profile() for pk, s in remaining.items()} == expected
+        assert remaining[session_end.pk].is_keyframe
+        assert remaining[last.pk].keyframe_id == session_end.pk
+
+
+class TestSessionLedger:
+    def _snap(self, profile, trigger, at, standing, **counters):
+        data = {"Results": [_result(standing=standing)], "Stats": _stats((BRATON, 10))}
+        snap = Snapshot.objects.create(
+            profile=profile,
+            trigger=trigger,
+            **counters,
+            **snapshot_storage(profile, data),
+        )
+        Snapshot.objects.filter(pk=snap.pk).update(captured_at=at)
+        snap.refresh_from_db()
+        return snap, data
+
+    def test_measures_from_previous_session_end(self, warframe_profile):
+        start = timezone.now() - timedelta(days=1)
+        self._snap(warframe_profile, "manual", start, 0, time_played_seconds=0)
+        previous, _ = self._snap(
+            warframe_profile,
+            "session_end",
+            start + timedelta(hours=1),
+            1000,
+            time_played_seconds=3600,
+            total_weapon_kills=50,
+            mastery_rank=11,
+        )
+        self._snap(
+            warframe_profile,
+            "scheduled",
+            start + timedelta(hours=6),
+            1200,
+            time_played_seconds=5400,
+        )
+        end, data = self._snap(
+            warframe_profile,
+            "session_end",
+            start + timedelta(hours=7),
+            1500,
+            time_played_seconds=7200,
+            total_weapon_kills=80,
+            missions_completed=4,
+            mastery_rank=12,
+        )
+
+        session = record_session(warframe_profile, end, data)
+
+        assert (
+            session.time_played_seconds,
+            session.kills,
+            session.missions_completed,
+        ) == (3600, 30, 4)
+        assert (session.mastery_rank, session.mastery_rank_gained) == (12, 1)
+        assert session.standing == {"CetusSyndicate": 500}
+        assert session.started_at == end.captured_at - timedelta(hours=1)
+        assert session.ended_at == end.captured_at
+        assert previous.captured_at < session.started_at
+
+    def test_first_snapshot_has_no_session(self, warframe_profile):
+        snap, data = self._snap(warframe_profile, "session_end", timezone.now(), 0)
+        assert record_session(warframe_profile, snap, data) is None
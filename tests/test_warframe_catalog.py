@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import redis
+from django.core.management import call_command
+
+from apps.profiles.warframe import catalog_index
+from apps.profiles.warframe.catalog_index import bump_catalog_generation
+from apps.profiles.warframe.catalog_index import get_catalog_index
+from apps.profiles.warframe.management.commands import sync_warframe_catalog
+from apps.profiles.warframe.models import CatalogItem
+from apps.profiles.warframe.models import CatalogSource
+
+SOMA = {
+    "uniqueName": "/Lotus/Weapons/Tenno/Rifle/TennoAR",
+    "name": "Soma",
+    "category": "Primary",
+    "masterable": True,
+}
+LATO = {
+    "uniqueName": "/Lotus/Weapons/Tenno/Pistol/Lato",
+    "name": "Lato",
+    "category": "Primary",
+    "masterable": True,
+}
+
+
+@pytest.fixture
+def wfcd(monkeypatch):
+    """Fake WFCD host honouring If-None-Match; records each request's headers."""
+    state = {"items": [SOMA, LATO], "etag": '"v1"', "requests": []}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request.headers)
+        if request.headers.get("If-None-Match") == state["etag"]:
+            return httpx.Response(304)
+        return httpx.Response(200, json=state["items"], headers={"ETag": state["etag"]})
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        sync_warframe_catalog.httpx,
+        "Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    return state
+
+
+def _sync(**options):
+    call_command("sync_warframe_catalog", categories=["Primary"], **options)
+
+
+@pytest.mark.django_db
+class TestConditionalCatalogSync:
+    def test_stores_validators_and_sends_them_back(self, wfcd):
+        _sync()
+        assert CatalogItem.objects.count() == 2
+        assert CatalogSource.objects.get(category="Primary").etag == '"v1"'
+
+        _sync()
+        assert wfcd["requests"][-1]["If-None-Match"] == '"v1"'
+
+    def test_only_changed_items_rewritten(self, wfcd):
+        _sync()
+        lato_updated = CatalogItem.objects.get(name="Lato").updated_at
+
+        wfcd["items"] = [{**SOMA, "masteryReq": 3}, LATO]
+        wfcd["etag"] = '"v2"'
+        _sync()
+
+        assert CatalogItem.objects.get(name="Soma").mastery_req == 3
+        assert CatalogItem.objects.get(name="Lato").updated_at == lato_updated
+
+    def test_force_ignores_validators(self, wfcd):
+        _sync()
+        _sync(force=True)
+        assert "If-None-Match" not in wfcd["requests"][-1]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+
+
+class DownRedis:
+    def get(self, key):
+        raise redis.ConnectionError("down")
+
+
+@pytest.mark.django_db
+class TestCatalogIndex:
+    def test_lookups(self, warframe_catalog):
+        index = get_catalog_index(FakeRedis())
+        assert len(index) == 3
+        gauss = index.get("/Lotus/Powersuits/Runner/GaussPrime")
+        assert (gauss.name, gauss.category, gauss.is_prime, gauss.image_name) == (
+            "Gauss Prime",
+            "Warframes",
+            True,
+            "gauss-prime.png",
+        )
+        assert index.get("/Lotus/Nope") is None
+        assert set(index.paths("Warframes")) == {
+            "/Lotus/Powersuits/Runner/GaussPrime",
+            "/Lotus/Powersuits/Excalibur/Excalibur",
+        }
+        assert index.paths("Warframes", prime_only=True) == [
+            "/Lotus/Powersuits/Runner/GaussPrime"
+        ]
+
+    def test_rebuilds_only_when_generation_moves(self, warframe_catalog):
+        client = FakeRedis()
+        index = get_catalog_index(client)
+        CatalogItem.objects.create(
+            unique_name="/Lotus/Powersuits/Mag/Mag", name="Mag", category="Warframes"
+        )
+
+        assert get_catalog_index(client) is index
+        bump_catalog_generation(client)
+        rebuilt = get_catalog_index(client)
+        assert rebuilt is not index
+        assert "/Lotus/Powersuits/Mag/Mag" in rebuilt
+
+    def test_generation_checked_at_most_once_per_interval(
+        self, warframe_catalog, monkeypatch
+    ):
+        clock = [1000.0]
+        monkeypatch.setattr(catalog_index.time, "monotonic", lambda: clock[0])
+        client = FakeRedis()
+        index = get_catalog_index(client)
+        assert get_catalog_index(client) is index
+        assert client.gets == 1
+
+        clock[0] += catalog_index.GENERATION_CHECK_SECONDS
+        assert get_catalog_index(client) is index
+        assert client.gets == 2
+
+    def test_redis_down_serves_last_index(self, warframe_catalog, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(catalog_index.time, "monotonic", lambda: clock[0])
+        index = get_catalog_index(DownRedis())
+        assert len(index) == 3
+
+        clock[0] += catalog_index.GENERATION_CHECK_SECONDS
+        assert get_catalog_index(DownRedis()) is index
@@ -3,21 +3,14 @@ from __future__ import annotations
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
-from unittest.mock import MagicMock
 
-import httpx
-import pytest
-
-from apps.profiles.warframe import tasks
-from apps.profiles.warframe.api import compute_completion
-from apps.profiles.warframe.api import compute_remaining
-from apps.profiles.warframe.api import mastery_threshold
-from apps.profiles.warframe.api import mastery_value
-from apps.profiles.warframe.api import summarize_by_acquisition
 from apps.profiles.warframe.management.commands.sync_warframe_catalog import (
     _acquisition,
 )
-from apps.profiles.warframe.tasks import poll_steam_warframe
+from apps.profiles.warframe.mastery import mastery_state
+from apps.profiles.warframe.mastery import mastery_threshold
+from apps.profiles.warframe.mastery import mastery_value
+from apps.profiles.warframe.mastery import xp_by_path
 from apps.profiles.warframe.tasks import staleness_alert_needed
 
 NOW = datetime(2026, 6, 19, 12, 0, tzinfo=UTC)
@@ -40,38 +33,23 @@ class TestMasteryThreshold:
         assert mastery_threshold("Mystery", 30) == 450_000
 
 
-class TestComputeCompletion:
-    def test_empty(self):
-        result = compute_completion({}, [])
-        assert result["total_masterable"] == 0
-        assert result["completion_pct"] == 0.0
-
-    def test_mastered_vs_partial_vs_absent(self):
-        items = [
-            ("/w/maxed", "Primary", 30),     # 450k threshold
-            ("/w/partial", "Primary", 30),   # below threshold
-            ("/w/absent", "Secondary", 30),  # not in xp at all
-            ("/f/maxed", "Warframes", 30),   # 900k threshold
-        ]
-        xp = {
-            "/w/maxed": 500_000,      # >= 450k -> mastered
-            "/w/partial": 100_000,    # < 450k -> not
-            "/f/maxed": 10_000_000,   # >= 900k -> mastered
-        }
-        result = compute_completion(xp, items)
-        assert result["total_masterable"] == 4
-        assert result["total_mastered"] == 2
-        assert result["completion_pct"] == 50.0
-        by_cat = {c["category"]: c for c in result["categories"]}
-        assert by_cat["Primary"]["mastered"] == 1
-        assert by_cat["Primary"]["total"] == 2
-        assert by_cat["Warframes"]["mastered"] == 1
-        assert by_cat["Secondary"]["mastered"] == 0
+class TestMasteryState:
+    def test_mastered_vs_partial(self):
+        assert mastery_state(500_000, ("Primary", 30)) == (True, 100)   # >= 450k
+        assert mastery_state(225_000, ("Primary", 30)) == (False, 50)
+        assert mastery_state(10_000_000, ("Warframes", 30)) == (True, 100)
 
     def test_rank40_boundary(self):
-        items = [("/w/kuva", "Melee", 40)]  # 800k threshold
-        assert compute_completion({"/w/kuva": 799_999}, items)["total_mastered"] == 0
-        assert compute_completion({"/w/kuva": 800_000}, items)["total_mastered"] == 1
+        assert mastery_state(799_999, ("Melee", 40))[0] is False  # 800k threshold
+        assert mastery_state(800_000, ("Melee", 40))[0] is True
+
+    def test_unknown_to_catalog(self):
+        assert mastery_state(999_999, None) == (False, 0)
+
+    def test_xp_by_path(self):
+        data = {"LoadOutInventory": {"XPInfo": [{"ItemType": "/w/a", "XP": 5}, {"XP": 1}]}}
+        assert xp_by_path(data) == {"/w/a": 5}
+        assert xp_by_path({}) == {}
 
 
 class TestMasteryValue:
@@ -84,56 +62,6 @@ class TestMasteryValue:
         assert mastery_value("Sentinels", 30) == 6000
 
 
-class TestComputeRemaining:
-    # (unique_name, name, category, mastery_req, cap, is_prime, vaulted,
-    #  acquisition, tags, vault_date)
-    ITEMS = [
-        ("/w/maxed", "Maxed Rifle", "Primary", 0, 30, False, False, "Market", [], ""),
-        ("/w/base", "Base Rifle", "Primary", 5, 30, False, False, "Market", [], ""),
-        ("/f/frame", "Cool Frame", "Warframes", 8, 30, False, False, "Foundry", [], ""),
-        ("/w/vault", "Vaulted Prime", "Melee", 0, 30, True, True, "Void Relic", ["Prime"], "2020-01-01"),
-        ("/w/gated", "Gated Gun", "Secondary", 30, 30, False, False, "Kuva Lich", ["Kuva Lich"], ""),
-    ]
-
-    def test_excludes_mastered_ranks_by_value(self):
-        xp = {"/w/maxed": 999_999}  # only the maxed rifle is mastered
-        out = compute_remaining(xp, self.ITEMS, current_mr=27)
-        names = [r["name"] for r in out]
-        assert "Maxed Rifle" not in names
-        assert len(out) == 4
-        # sorted by mastery_value desc -> frame (6000) first
-        assert out[0]["name"] == "Cool Frame"
-        assert out[0]["mastery_value"] == 6000
-
-    def test_equippable_flag(self):
-        out = {r["name"]: r for r in compute_remaining({}, self.ITEMS, current_mr=27)}
-        assert out["Base Rifle"]["equippable"] is True       # req 5 <= 27
-        assert out["Gated Gun"]["equippable"] is False        # req 30 > 27
-        assert out["Vaulted Prime"]["vaulted"] is True
-
-    def test_carries_judge_fields(self):
-        out = {r["name"]: r for r in compute_remaining({}, self.ITEMS, current_mr=27)}
-        frame = out["Cool Frame"]
-        assert frame["category"] == "Warframes"
-        assert frame["mastery_req"] == 8
-        assert frame["acquisition"] == "Foundry"
-        assert frame["is_prime"] is False
-        # New fields carry through.
-        gun = out["Gated Gun"]
-        assert gun["acquisition"] == "Kuva Lich"
-        assert gun["tags"] == ["Kuva Lich"]
-        assert out["Vaulted Prime"]["vault_date"] == "2020-01-01"
-
-    def test_owned_and_progress(self):
-        # Base Rifle at half its 450k Primary threshold -> owned, 50%.
-        # Cool Frame with no affinity -> not owned, 0%.
-        out = {r["name"]: r for r in compute_remaining({"/w/base": 225_000}, self.ITEMS, current_mr=27)}
-        assert out["Base Rifle"]["owned"] is True
-        assert out["Base Rifle"]["mastery_progress"] == 50
-        assert out["Cool Frame"]["owned"] is False
-        assert out["Cool Frame"]["mastery_progress"] == 0
-
-
 class TestAcquisitionClassifier:
     def test_kuva_by_name(self):
         assert _acquisition({"name": "Kuva Bramma", "tags": ["Grineer", "Kuva Lich"]}) == "Kuva Lich"
@@ -186,24 +114,6 @@ class TestAcquisitionClassifier:
         assert _acquisition({"name": "Mk1-Braton", "tags": ["Tenno"]}) == "Market"
 
 
-class TestSummarizeByAcquisition:
-    def test_groups_counts_and_points_sorted(self):
-        items = [
-            {"acquisition": "Kuva Lich", "mastery_value": 4000},
-            {"acquisition": "Kuva Lich", "mastery_value": 4000},
-            {"acquisition": "Market", "mastery_value": 3000},
-            {"acquisition": "", "mastery_value": 6000},
-        ]
-        out = summarize_by_acquisition(items)
-        # Sorted by mastery_points desc: Kuva (8000), Unknown (6000), Market (3000)
-        assert [g["acquisition"] for g in out] == ["Kuva Lich", "Unknown", "Market"]
-        assert out[0] == {"acquisition": "Kuva Lich", "count": 2, "mastery_points": 8000}
-        assert out[1]["acquisition"] == "Unknown"  # blank acquisition bucketed
-
-    def test_empty(self):
-        assert summarize_by_acquisition([]) == []
-
-
 class TestStalenessAlertNeeded:
     def test_never_synced_no_alert(self):
         assert staleness_alert_needed(None, NOW, played_recently=True) is False
@@ -227,63 +137,3 @@ class TestStalenessAlertNeeded:
         assert staleness_alert_needed(at_threshold, NOW, played_recently=True) is False
         just_over = NOW - timedelta(hours=48, minutes=1)
         assert staleness_alert_needed(just_over, NOW, played_recently=True) is True
-
-
-class TestPollSteamWarframe:
-    @pytest.fixture(autouse=True)
-    def _steam_configured(self, settings):
-        settings.STEAM_API_KEY = "test-key"
-        settings.STEAM_ID = "76561198009545200"
-
-    def test_transient_steam_error_skips_tick(self, monkeypatch):
-        # A network blip reaching Steam must not raise (no Sentry noise) and
-        # must not touch Redis state — the transition is caught on a later poll.
-        def boom():
-            raise httpx.ConnectTimeout("connect timed out")
-
-        redis_factory = MagicMock()
-        monkeypatch.setattr(tasks, "_check_current_state", boom)
-        monkeypatch.setattr(tasks.redis, "from_url", redis_factory)
-
-        assert poll_steam_warframe() is None
-        redis_factory.assert_not_called()
-
-    def test_unexpected_error_propagates(self, monkeypatch):
-        # Non-network failures are real bugs and should still surface.
-        def boom():
-            raise ValueError("not a network problem")
-
-        monkeypatch.setattr(tasks, "_check_current_state", boom)
-        monkeypatch.setattr(tasks.redis, "from_url", MagicMock())
-
-        with pytest.raises(ValueError, match="not a network problem"):
-            poll_steam_warframe()
-
-    def test_upstream_5xx_skips_tick(self, monkeypatch):
-        # A Steam 502 is a transient upstream hiccup — skip like a network blip.
-        def boom():
-            raise _steam_http_error(502)
-
-        redis_factory = MagicMock()
-        monkeypatch.setattr(tasks, "_check_current_state", boom)
-        monkeypatch.setattr(tasks.redis, "from_url", redis_factory)
-
-        assert poll_steam_warframe() is None
-        redis_factory.assert_not_called()
-
-    def test_upstream_4xx_propagates(self, monkeypatch):
-        # A 4xx (e.g. revoked API key) is a real problem; don't swallow it.
-        def boom():
-            raise _steam_http_error(403)
-
-        monkeypatch.setattr(tasks, "_check_current_state", boom)
-        monkeypatch.setattr(tasks.redis, "from_url", MagicMock())
-
-        with pytest.raises(httpx.HTTPStatusError):
-            poll_steam_warframe()
-
-
-def _steam_http_error(status_code: int) -> httpx.HTTPStatusError:
-    request = httpx.Request("GET", "https://api.steampowered.com/x?key=SECRET&steamids=1")
-    response = httpx.Response(status_code, request=request)
-    return httpx.HTTPStatusError(f"Server error '{status_code}'", request=request, response=response)